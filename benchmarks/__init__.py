@@ -0,0 +1 @@
+"""Performance benchmarks: synthetic corpus generator and regression harness."""
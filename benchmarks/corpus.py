@@ -0,0 +1,163 @@
+"""
+Deterministic synthetic corpus generator.
+
+Produces a package tree of N modules with tunable import fan-out, defs per
+module, nesting depth and dead-code ratio. The same arguments and seed always
+give byte-identical output, so benchmark runs are comparable.
+"""
+import argparse
+import random
+import shutil
+from pathlib import Path
+
+STDLIB_MODULES = ("os", "sys", "json", "re", "math", "time", "typing", "itertools",
+                  "functools", "collections", "pathlib", "logging")
+
+
+class CorpusSpec:
+    """Knobs for generate_corpus()."""
+
+    def __init__(self, files=1000, fanout=4, defs=8, classes=2, depth=3,
+                 dead_ratio=0.2, seed=0):
+        self.files = files
+        self.fanout = fanout          # cross-module imports per file
+        self.defs = defs              # top-level functions per file
+        self.classes = classes        # classes per file (two methods each)
+        self.depth = depth            # package nesting and block nesting inside functions
+        self.dead_ratio = dead_ratio  # share of defs nothing refers to
+        self.seed = seed
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+def _module_path(index, depth):
+    """Spread modules over nested packages: pkg_a/pkg_b/.../mod_<index>.py."""
+    parts = []
+    n = index
+    for level in range(max(0, depth - 1)):
+        parts.append(f"pkg{level}_{n % 4}")
+        n //= 4
+    return parts, f"mod_{index}"
+
+
+def _nested_body(rng, depth, indent, callee):
+    """A function body with `depth` levels of if/for blocks around a call."""
+    lines = []
+    pad = "    " * indent
+    for level in range(depth):
+        if level % 2 == 0:
+            lines.append(f"{pad}if x > {rng.randrange(100)}:")
+        else:
+            lines.append(f"{pad}for i{level} in range(x):")
+        indent += 1
+        pad = "    " * indent
+    lines.append(f"{pad}x = {callee}(x) if {callee} else x")
+    return lines
+
+
+def generate_corpus(dest, spec: CorpusSpec):
+    """Write the corpus under dest (replacing it) and return the list of files written."""
+    dest = Path(dest)
+    if dest.exists():
+        shutil.rmtree(dest)
+    rng = random.Random(spec.seed)
+
+    # Decide every module's public (live) and dead defs up front so imports can target them
+    modules = []
+    for i in range(spec.files):
+        parts, name = _module_path(i, spec.depth)
+        funcs = [f"func_{i}_{k}" for k in range(spec.defs)]
+        dead = set(rng.sample(funcs, int(round(len(funcs) * spec.dead_ratio))))
+        classes = [f"Class_{i}_{k}" for k in range(spec.classes)]
+        dead_classes = set(rng.sample(classes, int(round(len(classes) * spec.dead_ratio))))
+        modules.append((parts, name, funcs, dead, classes, dead_classes))
+
+    written = []
+    for i, (parts, name, funcs, dead, classes, dead_classes) in enumerate(modules):
+        live = [f for f in funcs if f not in dead]
+        lines = ['"""Generated module."""']
+
+        # Stdlib imports; roughly dead_ratio of them are left unused
+        stdlib = rng.sample(STDLIB_MODULES, min(3, len(STDLIB_MODULES)))
+        used_stdlib = [m for m in stdlib if rng.random() >= spec.dead_ratio]
+        lines += [f"import {m}" for m in stdlib]
+
+        # Cross-module imports of live functions from earlier modules
+        imported = []
+        for _ in range(min(spec.fanout, i)):
+            j = rng.randrange(i)
+            target = modules[j]
+            target_live = [f for f in target[2] if f not in target[3]]
+            if not target_live:
+                continue
+            func = rng.choice(target_live)
+            module = ".".join(target[0] + [target[1]])
+            lines.append(f"from {module} import {func}")
+            imported.append(func)
+        lines.append("")
+
+        for k, func in enumerate(funcs):
+            callee = imported[k % len(imported)] if imported else "None"
+            lines.append("")
+            lines.append(f"def {func}(x=0):")
+            if func in dead:
+                lines.append("    unused_local = x * 2")
+            lines += _nested_body(rng, spec.depth, 1, callee)
+            lines.append("    return x")
+            if func in dead and k % 2 == 0:
+                lines.append("    x += 1  # unreachable")
+
+        for cls in classes:
+            lines.append("")
+            lines.append("")
+            lines.append(f"class {cls}:")
+            lines.append("    def __init__(self):")
+            lines.append("        self.value = 0")
+            lines.append("")
+            lines.append("    def compute(self, x):")
+            lines.append("        return x + self.value")
+
+        # Module-level uses keep the live defs and used imports reachable
+        lines.append("")
+        lines.append("")
+        lines.append("def _touch():")
+        lines.append("    return [" + ", ".join(live + [c for c in classes if c not in dead_classes]) + "]")
+        for m in used_stdlib:
+            lines.append(f"    {m}")
+        lines.append("")
+        lines.append("")
+        lines.append("TOUCHED = _touch()")
+        lines.append("")
+
+        directory = dest.joinpath(*parts)
+        directory.mkdir(parents=True, exist_ok=True)
+        for depth in range(len(parts)):
+            init = dest.joinpath(*parts[:depth + 1]) / "__init__.py"
+            if not init.exists():
+                init.write_text("", encoding="utf-8")
+        path = directory / f"{name}.py"
+        path.write_text("\n".join(lines), encoding="utf-8")
+        written.append(path)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic Python corpus")
+    parser.add_argument("dest")
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--fanout", type=int, default=4)
+    parser.add_argument("--defs", type=int, default=8)
+    parser.add_argument("--classes", type=int, default=2)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--dead-ratio", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    spec = CorpusSpec(args.files, args.fanout, args.defs, args.classes, args.depth,
+                      args.dead_ratio, args.seed)
+    files = generate_corpus(args.dest, spec)
+    print(f"[+] Wrote {len(files)} modules to {args.dest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,451 @@
+"""
+Benchmark harness: scan, report, removal, startup and AST traversal costs on a synthetic corpus.
+
+Each scenario runs in a fresh interpreter so its peak RSS is its own. Results
+are compared against a stored baseline and the run fails (exit status 1) when
+a metric regresses past the threshold. A missing baseline, or one recorded
+with other corpus settings, fails the run too (exit status 2): a regression
+check that compares against nothing must not pass. Baselines are
+machine-specific, so none is committed; record one with --save-baseline,
+or pass --no-compare to only measure.
+
+    python -m benchmarks.harness --files 5000 --save-baseline
+    python -m benchmarks.harness --files 5000
+    python -m benchmarks.harness --files 5000 --no-compare
+"""
+import argparse
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.corpus import CorpusSpec, generate_corpus
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_THRESHOLD = 0.25
+# Phases shorter than this are timer noise, not regressions
+NOISE_FLOOR_SECONDS = 0.05
+# Startup metrics are medians of repeated runs, so much smaller values are stable
+SCENARIO_NOISE_FLOORS = {"startup": 0.005}
+STARTUP_RUNS = 7
+
+# Metrics compared against the baseline, and which direction is better
+LOWER_IS_BETTER = ("seconds", "peak_rss_mb", "bytes")
+HIGHER_IS_BETTER = ("per_sec",)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process and its finished children, in MiB."""
+    if resource is None:
+        return 0.0
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    scale = 1 if sys.platform == "darwin" else 1024  # macOS reports bytes, Linux KiB
+    return round(max(own, children) * scale / (1024 * 1024), 1)
+
+
+class Timer:
+    """Collects named phase durations."""
+
+    def __init__(self):
+        self.phases = {}
+
+    def phase(self, name):
+        timer = self
+
+        class _Phase:
+            def __enter__(self):
+                self.started = time.perf_counter()
+
+            def __exit__(self, *exc):
+                timer.phases[name] = round(time.perf_counter() - self.started, 4)
+
+        return _Phase()
+
+
+def bench_scan(corpus, jobs):
+    """Walk, parse/visit and graph phases of DeadCodeAnalyzer.scan, without the cache."""
+    from deadcode_finder.analyzer import DeadCodeAnalyzer
+
+    timer = Timer()
+    analyzer = DeadCodeAnalyzer(corpus, jobs=jobs)
+    with timer.phase("walk_seconds"):
+        files = list(analyzer.walker)
+    with timer.phase("summarize_seconds"):
+        analyzer.summaries = {s.path: s for s in analyzer._summarize_all(files) if s is not None}
+    with timer.phase("graph_seconds"):
+        analyzer._rebuild()
+    total = sum(timer.phases.values())
+    report = analyzer.get_report()
+    return dict(timer.phases,
+                files=len(files),
+                total_seconds=round(total, 4),
+                files_per_sec=round(len(files) / total, 1) if total else 0.0,
+                functions_reported=len(report["unused_functions"]),
+                peak_rss_mb=peak_rss_mb())
+
+
+def bench_report(corpus, jobs):
+    """HTML (auto mode) and JSON rendering of a finished scan."""
+    from cli import score_report
+    from deadcode_finder.analyzer import DeadCodeAnalyzer
+    from deadcode_finder.formats import write_json
+    from deadcode_finder.report import ReportGenerator
+
+    analyzer = DeadCodeAnalyzer(corpus, jobs=jobs)
+    analyzer.scan()
+    report = analyzer.get_report()
+    total_issues, health, color = score_report(report)
+    report.update(health=health, health_color=color, total_issues=total_issues,
+                  generated_at="benchmark", server_url="")
+
+    timer = Timer()
+    out_dir = Path(tempfile.mkdtemp(prefix="deadcode-bench-"))
+    try:
+        html_path = out_dir / "report.html"
+        with timer.phase("html_seconds"):
+            ReportGenerator().generate(html_path, report, mode="auto")
+        buf = io.StringIO()
+        with timer.phase("json_seconds"):
+            write_json(report, buf, {"total_issues": total_issues})
+        return dict(timer.phases,
+                    html_bytes=html_path.stat().st_size,
+                    json_bytes=len(buf.getvalue().encode("utf-8")),
+                    peak_rss_mb=peak_rss_mb())
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+def bench_remove(corpus, jobs):
+    """Single and batched removals on a scratch copy of the corpus."""
+    from deadcode_finder.analyzer import DeadCodeAnalyzer
+    from deadcode_finder.remover import CodeRemover
+
+    scratch = Path(tempfile.mkdtemp(prefix="deadcode-bench-")) / "corpus"
+    shutil.copytree(corpus, scratch)
+    try:
+        analyzer = DeadCodeAnalyzer(scratch, jobs=jobs)
+        analyzer.scan()
+        report = analyzer.get_report()
+        remover = CodeRemover(str(scratch))
+        timer = Timer()
+
+        # One request per function, as clicking through the report would send
+        singles = report["unused_functions"][:200]
+        with timer.phase("single_seconds"):
+            for file, line, name in singles:
+                remover.remove_function(file, name, line)
+
+        batch = [{"type": "import", "file": file, "name": name, "line": line}
+                 for file, imports in report["unused_imports"].items()
+                 for name, line in imports]
+        with timer.phase("batch_seconds"):
+            result = remover.remove_batch(batch)
+
+        return dict(timer.phases,
+                    single_per_sec=round(len(singles) / timer.phases["single_seconds"], 1)
+                    if timer.phases["single_seconds"] else 0.0,
+                    batch_items=len(batch),
+                    batch_removed=result.get("removed", 0),
+                    batch_per_sec=round(len(batch) / timer.phases["batch_seconds"], 1)
+                    if timer.phases["batch_seconds"] else 0.0,
+                    peak_rss_mb=peak_rss_mb())
+    finally:
+        shutil.rmtree(scratch.parent, ignore_errors=True)
+
+
+def _median_run(cmd, ok=(0,)):
+    """Median wall time of cmd over STARTUP_RUNS runs, after one warm-up run."""
+    times = []
+    for _ in range(STARTUP_RUNS + 1):
+        started = time.perf_counter()
+        proc = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+        times.append(time.perf_counter() - started)
+        if proc.returncode not in ok:
+            raise RuntimeError(f"{' '.join(cmd)} failed:\n{proc.stderr}")
+    times = sorted(times[1:])
+    return round(times[len(times) // 2], 4)
+
+
+def _import_seconds(module):
+    """Cumulative import time of module as reported by -X importtime (median)."""
+    samples = []
+    for _ in range(STARTUP_RUNS):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                              cwd=ROOT, capture_output=True, text=True, check=True)
+        for line in proc.stderr.splitlines():
+            # "import time:  self [us] | cumulative | imported package"
+            parts = [part.strip() for part in line.split("|")]
+            if len(parts) == 3 and parts[2] == module:
+                samples.append(int(parts[1]) / 1e6)
+    samples.sort()
+    return round(samples[len(samples) // 2], 4)
+
+
+def bench_startup(corpus, jobs):
+    """Interpreter, import and pre-commit style costs of one short CLI invocation."""
+    from jinja2 import Environment, FileSystemLoader
+
+    from deadcode_finder.report import TEMPLATE_DIR, TEMPLATE_NAME, _BytecodeCache
+
+    sample = min(Path(corpus).rglob("*.py"))
+    cli = [sys.executable, str(ROOT / "cli.py")]
+    metrics = {
+        "interpreter_seconds": _median_run([sys.executable, "-c", "pass"]),
+        "import_seconds": _import_seconds("cli"),
+        "help_seconds": _median_run(cli + ["--help"]),
+        # Exit status 1 just means the file has unused imports
+        "fast_hook_seconds": _median_run(cli + ["--only", "imports", "--fast", str(sample)],
+                                         ok=(0, 1)),
+    }
+
+    timer = Timer()
+    cache_dir = tempfile.mkdtemp(prefix="deadcode-bench-")
+    try:
+        loader = FileSystemLoader(str(TEMPLATE_DIR))
+        with timer.phase("template_compile_seconds"):
+            Environment(loader=loader).get_template(TEMPLATE_NAME)
+        # Prime the bytecode cache, then load through a fresh environment as a new process would
+        Environment(loader=loader, bytecode_cache=_BytecodeCache(cache_dir)).get_template(TEMPLATE_NAME)
+        with timer.phase("template_cached_seconds"):
+            Environment(loader=loader, bytecode_cache=_BytecodeCache(cache_dir)).get_template(TEMPLATE_NAME)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    return dict(metrics, **timer.phases, peak_rss_mb=peak_rss_mb())
+
+
+# Per-file results the fused traversal must reproduce from the old visitor (unused_vars
+# is left out: the visitor's "assigned, never loaded anywhere" became dead-store analysis)
+TRAVERSAL_FIELDS = ("imports", "used_names", "function_defs", "class_defs",
+                    "entry_points", "decorated_functions")
+
+
+def bench_traversal(corpus, jobs):
+    """Per-file analysis end to end: parse + the NodeVisitor it replaced, against
+    parse + analyze_module() with its default passes, as a scan runs it.
+
+    traversal_seconds (no passes) and checks_seconds (what the control-flow
+    passes add) break the new side down; neither includes the parse.
+    """
+    import ast
+
+    from benchmarks.visitor_baseline import DeadCodeVisitor
+    from deadcode_finder.traversal import analyze_module
+
+    sources = []
+    for path in sorted(Path(corpus).rglob("*.py")):
+        data = path.read_bytes()
+        try:
+            ast.parse(data)
+        except (SyntaxError, ValueError, RecursionError):
+            continue
+        sources.append((path, data))
+
+    parse_seconds = visit_seconds = analyze_seconds = traversal_seconds = 0.0
+    for path, data in sources:
+        started = time.perf_counter()
+        tree = ast.parse(data)
+        parsed = time.perf_counter()
+        visitor = DeadCodeVisitor()
+        visitor.visit(tree)
+        visited = time.perf_counter()
+        module = analyze_module(tree)
+        analyzed = time.perf_counter()
+        analyze_module(tree, passes=())
+        traversed = time.perf_counter()
+        parse_seconds += parsed - started
+        visit_seconds += visited - parsed
+        analyze_seconds += analyzed - visited
+        traversal_seconds += traversed - analyzed
+        # A faster engine that finds different things is not an improvement
+        for field in TRAVERSAL_FIELDS:
+            if getattr(visitor, field) != getattr(module, field):
+                raise RuntimeError(f"{path}: {field} differs from the NodeVisitor result")
+        if ({owner: list(refs.items()) for owner, refs in visitor.sites.items()}
+                != {owner: list(refs.items()) for owner, refs in module.sites.items()}):
+            raise RuntimeError(f"{path}: reference sites differ from the NodeVisitor result")
+
+    files = len(sources) or 1
+    visitor_seconds = parse_seconds + visit_seconds
+    analysis_seconds = parse_seconds + analyze_seconds
+    return dict(files=len(sources),
+                parse_seconds=round(parse_seconds, 4),
+                visitor_seconds=round(visitor_seconds, 4),
+                analysis_seconds=round(analysis_seconds, 4),
+                visitor_per_file_seconds=round(visitor_seconds / files, 6),
+                analysis_per_file_seconds=round(analysis_seconds / files, 6),
+                analysis_files_per_sec=round(len(sources) / analysis_seconds, 1)
+                if analysis_seconds else 0.0,
+                speedup=round(visitor_seconds / analysis_seconds, 2) if analysis_seconds else 0.0,
+                traversal_seconds=round(traversal_seconds, 4),
+                checks_seconds=round(max(analyze_seconds - traversal_seconds, 0.0), 4),
+                peak_rss_mb=peak_rss_mb())
+
+
+SCENARIOS = {
+    "scan": bench_scan,
+    "report": bench_report,
+    "remove": bench_remove,
+    "startup": bench_startup,
+    "traversal": bench_traversal,
+}
+
+
+def run_isolated(name, corpus, jobs):
+    """Run one scenario in a child interpreter and return its metrics."""
+    cmd = [sys.executable, "-m", "benchmarks.harness", "--child", name,
+           "--corpus", str(corpus), "--jobs", str(jobs)]
+    proc = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"scenario {name} failed:\n{proc.stderr}")
+    # Library code may print progress; the metrics are the last line
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _direction(metric):
+    if metric.endswith(HIGHER_IS_BETTER):
+        return 1
+    if metric.endswith(LOWER_IS_BETTER):
+        return -1
+    return 0
+
+
+def compare(results, baseline, threshold):
+    """Return (rows, regressions); rows are (scenario, metric, base, now, change)."""
+    rows = []
+    regressions = []
+    for scenario, metrics in results.items():
+        base_metrics = baseline.get(scenario, {})
+        for metric, value in metrics.items():
+            base = base_metrics.get(metric)
+            direction = _direction(metric)
+            if not direction or not isinstance(base, (int, float)) or not base:
+                rows.append((scenario, metric, base, value, None))
+                continue
+            change = (value - base) / base
+            rows.append((scenario, metric, base, value, change))
+            floor = SCENARIO_NOISE_FLOORS.get(scenario, NOISE_FLOOR_SECONDS)
+            if metric.endswith("seconds") and max(base, value) < floor:
+                continue
+            if change * -direction > threshold:
+                regressions.append((scenario, metric, base, value, change))
+    return rows, regressions
+
+
+def print_table(rows):
+    print(f"{'scenario':<9} {'metric':<26} {'baseline':>12} {'current':>12} {'change':>8}")
+    for scenario, metric, base, value, change in rows:
+        base_s = "-" if base is None else f"{base:g}"
+        change_s = "" if change is None else f"{change:+.0%}"
+        print(f"{scenario:<9} {metric:<26} {base_s:>12} {value:>12g} {change_s:>8}")
+
+
+def load_baseline(path, corpus_key, jobs, scenarios):
+    """Stored results to compare against; ValueError unless they cover this exact run."""
+    if not os.path.exists(path):
+        raise ValueError(f"No baseline at {path}; record one on this machine with "
+                         f"--save-baseline, or pass --no-compare to only measure")
+    stored = json.loads(Path(path).read_text(encoding="utf-8"))
+    if stored.get("corpus") != corpus_key or stored.get("jobs") != jobs:
+        raise ValueError(f"Baseline {path} was recorded with other corpus settings or --jobs; "
+                         f"re-record it with --save-baseline")
+    missing = [name for name in scenarios if name not in stored.get("results", {})]
+    if missing:
+        raise ValueError(f"Baseline {path} has no results for {', '.join(missing)}; "
+                         f"re-record it with --save-baseline")
+    return stored["results"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark py-deadcode-finder on a synthetic corpus")
+    parser.add_argument("--files", type=int, default=2000, help="Modules in the generated corpus")
+    parser.add_argument("--fanout", type=int, default=4)
+    parser.add_argument("--defs", type=int, default=8)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--dead-ratio", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--corpus", default=None,
+                        help="Benchmark this directory instead of generating a corpus")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Scan worker processes (default: 1, for stable numbers)")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Scenario to run (repeatable, default: all)")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed relative regression before failing (default: 0.25)")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Store these results as the new baseline")
+    parser.add_argument("--no-compare", action="store_true",
+                        help="Only print the results; don't require or compare against a baseline")
+    parser.add_argument("--output", "-o", default=None, help="Also write results as JSON here")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(SCENARIOS[args.child](args.corpus, args.jobs)))
+        return 0
+
+    spec = CorpusSpec(files=args.files, fanout=args.fanout, defs=args.defs,
+                      depth=args.depth, dead_ratio=args.dead_ratio, seed=args.seed)
+    corpus_key = spec.as_dict() if args.corpus is None else {"path": str(args.corpus)}
+    scenarios = args.scenario or list(SCENARIOS)
+    baseline = {}
+    if not (args.save_baseline or args.no_compare):
+        # Checked before the (slow) run: a comparison against nothing must not pass
+        try:
+            baseline = load_baseline(args.baseline, corpus_key, args.jobs, scenarios)
+        except ValueError as e:
+            print(f"[!] {e}", file=sys.stderr)
+            return 2
+    workdir = None
+    corpus = args.corpus
+    if corpus is None:
+        workdir = Path(tempfile.mkdtemp(prefix="deadcode-bench-"))
+        corpus = workdir / "corpus"
+        print(f"[*] Generating {spec.files} modules in {corpus}")
+        generate_corpus(corpus, spec)
+
+    try:
+        results = {}
+        for name in scenarios:
+            print(f"[*] Running {name}...")
+            results[name] = run_isolated(name, corpus, args.jobs)
+    finally:
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    document = {"corpus": corpus_key, "jobs": args.jobs, "results": results}
+    if args.output:
+        Path(args.output).write_text(json.dumps(document, indent=2) + "\n", encoding="utf-8")
+
+    if args.save_baseline:
+        Path(args.baseline).write_text(json.dumps(document, indent=2) + "\n", encoding="utf-8")
+        print(f"[+] Baseline saved to {args.baseline}")
+        print_table(compare(results, {}, args.threshold)[0])
+        return 0
+
+    if args.no_compare:
+        print_table(compare(results, {}, args.threshold)[0])
+        return 0
+
+    rows, regressions = compare(results, baseline, args.threshold)
+    print_table(rows)
+    if regressions:
+        print(f"[!] {len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+The NodeVisitor that per-file analysis used before deadcode_finder.traversal.
+
+Kept unchanged as the reference for the traversal benchmark: the fused
+engine must give the same results (bar unreachable code, which this visitor
+never reported) in less time.
+"""
+import ast
+
+
+class DeadCodeVisitor(ast.NodeVisitor):
+    def __init__(self):
+        self.imports = []
+        self.used_names = set()
+        self.function_defs = {}
+        self.class_defs = {}
+        self.unused_vars = []
+        self.unreachable = []
+        self.scope = []
+        self.entry_points = set()
+        self.decorated_functions = set()
+        self.in_function = False
+        self.after_return = False
+        # Call/reference graph input: for each def (by qualified name, '' for module
+        # level) the names it loads, mapped to the line of their first use
+        self.sites = {'': {}}
+        self._refs = self.sites['']
+        self._qual = []  # enclosing class/def names
+
+    def _visit_fields(self, node, skip=()):
+        """generic_visit, minus the named fields."""
+        for field, value in ast.iter_fields(node):
+            if field in skip:
+                continue
+            if isinstance(value, list):
+                for item in value:
+                    if isinstance(item, ast.AST):
+                        self.visit(item)
+            elif isinstance(value, ast.AST):
+                self.visit(value)
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            # Use the alias if present, otherwise use the import name
+            name_used = alias.asname if alias.asname else alias.name
+            self.imports.append((name_used, node.lineno))
+        self.generic_visit(node)
+
+    def visit_ImportFrom(self, node):
+        for alias in node.names:
+            # Use the alias if present, otherwise use the import name
+            name_used = alias.asname if alias.asname else alias.name
+            self.imports.append((name_used, node.lineno))
+        self.generic_visit(node)
+
+    def visit_FunctionDef(self, node):
+        # Check for decorators
+        if node.decorator_list:
+            self.decorated_functions.add(node.name)
+            # Track decorator names as used
+            for decorator in node.decorator_list:
+                if isinstance(decorator, ast.Name):
+                    self.used_names.add(decorator.id)
+                elif isinstance(decorator, ast.Call) and isinstance(decorator.func, ast.Name):
+                    self.used_names.add(decorator.func.id)
+        
+        # Check for entry points
+        if node.name in ('main', 'run', 'execute'):
+            self.entry_points.add(node.name)
+        # Check for test functions
+        if node.name.startswith('test_'):
+            self.entry_points.add(node.name)
+            
+        qual = '.'.join(self._qual + [node.name])
+        self.function_defs[qual] = (node.name, node.lineno)
+        # Decorators run in the enclosing scope; everything else belongs to this def
+        for decorator in node.decorator_list:
+            self.visit(decorator)
+        outer_refs = self._refs
+        self._refs = self.sites.setdefault(qual, {})
+        self._qual.append(node.name)
+        self.scope.append(set())
+        old_in_function = self.in_function
+        old_after_return = self.after_return
+        self.in_function = True
+        self.after_return = False
+        
+        self._visit_fields(node, skip=('decorator_list',))
+        
+        self.in_function = old_in_function
+        self.after_return = old_after_return
+        self._refs = outer_refs
+        self._qual.pop()
+        assigned = self.scope.pop()
+        unused = assigned - self.used_names
+        # Sorted so results don't depend on the per-process string hash seed
+        for v in sorted(unused):
+            self.unused_vars.append((node.lineno, v))
+
+    def visit_ClassDef(self, node):
+        qual = '.'.join(self._qual + [node.name])
+        self.class_defs[qual] = (node.name, node.lineno)
+        for decorator in node.decorator_list:
+            self.visit(decorator)
+        outer_refs = self._refs
+        self._refs = self.sites.setdefault(qual, {})
+        self._qual.append(node.name)
+        self._visit_fields(node, skip=('decorator_list',))
+        self._qual.pop()
+        self._refs = outer_refs
+
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Load):
+            self.used_names.add(node.id)
+            self._refs.setdefault(node.id, node.lineno)
+        self.generic_visit(node)
+
+    def visit_Attribute(self, node):
+        # `obj.method` can't be resolved statically, so it references every def named `method`
+        if isinstance(node.ctx, ast.Load):
+            self._refs.setdefault('.' + node.attr, node.lineno)
+        self.generic_visit(node)
+
+    def visit_Assign(self, node):
+        if isinstance(node.targets[0], ast.Name):
+            if self.scope:
+                self.scope[-1].add(node.targets[0].id)
+        self.generic_visit(node)
+
+    def visit_Return(self, node):
+        if self.in_function:
+            self.after_return = True
+        self.generic_visit(node)
+
+    def visit_stmt_after_return(self, node):
+        """Helper to detect unreachable code after return"""
+        if self.after_return and self.in_function:
+            if not isinstance(node, (ast.FunctionDef, ast.ClassDef, ast.Return)):
+                self.unreachable.append((node.lineno, "code after return"))
+        return node
+
+    def visit_If(self, node):
+        """Check for __main__ entry point"""
+        if isinstance(node.test, ast.Compare):
+            if (isinstance(node.test.left, ast.Name) and 
+                node.test.left.id == '__name__' and
+                any(isinstance(comp, ast.Constant) and comp.value == '__main__' 
+                    for comp in node.test.comparators)):
+                # Mark functions called in __main__ as entry points
+                for child in ast.walk(node):
+                    if isinstance(child, ast.Call) and isinstance(child.func, ast.Name):
+                        self.entry_points.add(child.func.id)
+        self.generic_visit(node)
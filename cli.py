@@ -1,32 +1,19 @@
 import argparse
-from datetime import datetime, timezone
+import os
+import sys
+import time
 
+# Only what every invocation needs is imported here; jinja2, the server, the
+# watcher, tqdm and git plumbing are imported on the paths that use them.
 from deadcode_finder.analyzer import DeadCodeAnalyzer
-from deadcode_finder.report import ReportGenerator
-from deadcode_finder.server import RemovalServer
+from deadcode_finder.cache import AnalysisCache
+from deadcode_finder.findings import FILE_LOCAL_KINDS, KINDS, diff_findings, iter_findings
+from deadcode_finder.formats import (FORMATS, JsonlWriter, iter_project_findings, write_json,
+                                     write_sarif, write_text)
+from deadcode_finder.ingest import DEFAULT_LIMITS, Limits, parse_size
 
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument("path")
-    parser.add_argument("--output", "-o", default="deadcode_report.html")
-    parser.add_argument("--port", "-p", type=int, default=8765, help="Port for removal server")
-    parser.add_argument("--no-server", action="store_true", help="Don't start removal server")
-    args = parser.parse_args()
-
-    print("[*] Scanning:", args.path)
-    analyzer = DeadCodeAnalyzer(args.path)
-    analyzer.scan()
-
-    # Start removal server
-    server = None
-    server_url = None
-    if not args.no_server:
-        server = RemovalServer(args.path, args.port)
-        server_url = server.start()
-        if server_url:
-            print(f"[+] Removal server started at {server_url}")
-
-    report = analyzer.get_report()
+def score_report(report):
+    """Return (total_issues, health, health_color) for a get_report() dict."""
     # === IMPROVED SCORING (much more realistic) ===
     total_issues = sum([
         len(report.get("unused_imports", [])),
@@ -62,6 +49,169 @@ def main():
     else:
         color = "#ff6b6b"  # red
     # ================================================
+    return total_issues, health, color
+
+def watch(analyzer, server, polling=False):
+    """Re-analyze changed files as they are saved and push finding deltas to the report."""
+    from deadcode_finder.watcher import create_watcher
+
+    watcher = create_watcher(analyzer.walker, polling=polling)
+    print(f"[*] Watching {analyzer.root} for changes ({type(watcher).__name__}). Press Ctrl+C to stop.")
+    try:
+        for changed in watcher.changes():
+            before = analyzer.get_report()
+            started = time.perf_counter()
+            if changed is None:
+                analyzer.scan()
+                label = "event queue overflowed, rescanned"
+            else:
+                analyzer.update(changed)
+                label = f"{len(changed)} file(s) changed"
+            delta = diff_findings(before, analyzer.get_report())
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            print(f"[*] {label}: +{len(delta['added'])} / -{len(delta['removed'])} / "
+                  f"~{len(delta['moved'])} findings ({elapsed_ms:.0f} ms)")
+            if server and (delta["added"] or delta["removed"] or delta["moved"]):
+                server.publish("delta", dict(delta, generation=analyzer.generation))
+    except KeyboardInterrupt:
+        print("\n[*] Stopping watch mode...")
+    finally:
+        watcher.close()
+        if analyzer.cache is not None:
+            analyzer.cache.save()
+        if server and server.is_running():
+            server.stop()
+            print("[+] Server stopped.")
+
+def run_scan(analyzer, progress=False, on_summary=None, files=None):
+    """analyzer.scan(), optionally with a tqdm progress bar showing files/sec on stderr."""
+    if not progress:
+        analyzer.scan(on_summary=on_summary, files=files)
+        return
+
+    from tqdm import tqdm
+
+    bar = tqdm(desc="Scanning", unit="file", file=sys.stderr, dynamic_ncols=True)
+
+    def tick(summary):
+        bar.update(1)
+        if on_summary is not None:
+            on_summary(summary)
+
+    try:
+        analyzer.scan(on_summary=tick, files=files)
+    finally:
+        bar.close()
+
+def note_baseline(report, log):
+    """Say how many known findings the baseline kept out of the output."""
+    known = report.get("baselined_findings")
+    if known is not None:
+        print(f"[*] Baseline: {known} known finding(s) left out", file=log)
+
+def write_machine_report(args, analyzer, analyze):
+    """Run `analyze(on_summary)` and write json/jsonl/sarif/text output; never loads jinja2 or the server."""
+    from datetime import datetime, timezone
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        if args.format == "jsonl":
+            kinds = [KINDS[kind][0] for kind in args.only] if getattr(args, "only", None) else None
+            writer = JsonlWriter(out, kinds, analyzer.baseline)
+            # File-local findings go out as each file is analyzed, cross-file ones at the end
+            analyze(on_summary=writer.on_summary)
+            report = analyzer.get_report()
+            writer.write_all(iter_project_findings(report))
+            note_baseline(report, sys.stderr)
+            return writer.count
+
+        analyze()
+        report = analyzer.get_report()
+        note_baseline(report, sys.stderr)
+        if args.format == "text":
+            write_text(report, out, str(analyzer.root))
+        elif args.format == "sarif":
+            write_sarif(report, out, str(analyzer.root))
+        else:
+            total_issues, health, _ = score_report(report)
+            summary = {
+                "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "path": args.path,
+                "total_issues": total_issues,
+                "health": health,
+            }
+            if "baselined_findings" in report:
+                summary["baselined"] = report["baselined_findings"]
+            write_json(report, out, summary)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+def note_skipped(analyzer, log):
+    """Say how many files weren't analyzed; every output format lists them with the reason."""
+    skipped = sum(1 for summary in analyzer.summaries.values() if summary.skipped)
+    if skipped:
+        print(f"[!] {skipped} file(s) not analyzed (too large, unparsable or over the time budget)",
+              file=log)
+
+def save_reference_index(analyzer, cache):
+    """After a full scan, persist the reverse index that --since and who-uses rely on."""
+    if cache is None or analyzer.call_graph is None:
+        return  # No cache, or --only skipped the reference graph the index is built from
+    from deadcode_finder.gitdiff import head_commit
+    from deadcode_finder.refindex import ReferenceIndex
+
+    # Outside git there is no base commit; who-uses can still read the index
+    ReferenceIndex.from_analyzer(analyzer, head_commit(analyzer.root)).save(cache.cache_dir)
+
+def scan_since(args, analyzer, log, on_summary=None):
+    """Re-evaluate only what changed since args.since, using the persisted reverse index."""
+    from deadcode_finder.gitdiff import changed_files, resolve_commit
+    from deadcode_finder.refindex import ReferenceIndex
+
+    started = time.perf_counter()
+    cache_dir = AnalysisCache.default_dir(args.path, args.cache_dir)
+    index = ReferenceIndex.load(cache_dir)
+    if index is None or index.base is None:
+        print("[*] No reference index yet; running one full scan to build it", file=log)
+        analyzer.cache = cache = AnalysisCache(args.path, args.cache_dir, analyzer.limits)
+        only, analyzer.only = analyzer.only, None  # The index needs the full reference graph
+        run_scan(analyzer, args.progress)
+        save_reference_index(analyzer, cache)
+        analyzer.cache, analyzer.only = None, only
+        index = ReferenceIndex.load(cache_dir)
+
+    changed = changed_files(analyzer.root, args.since)
+    if index.base != resolve_commit(analyzer.root, args.since):
+        # The index describes another commit: bring files that moved since then up to date too
+        changed = list(dict.fromkeys(changed + changed_files(analyzer.root, index.base)))
+    changed = [path for path in changed if str(path) in index.files or analyzer.walker.accepts(path)]
+    analyzer.scan_changed(changed, index, on_summary=on_summary)
+    elapsed = time.perf_counter() - started
+    print(f"[*] Since {args.since}: {len(changed)} changed file(s), "
+          f"{len(analyzer.summaries)} analyzed in {elapsed:.2f}s", file=log)
+
+def finish_profile(args, profiler, cprofile, log):
+    """Stop profiling and write the timing JSON, the summary and the optional pstats dump."""
+    if cprofile is not None:
+        cprofile.disable()
+        cprofile.dump_stats(args.profile_dump)
+        print(f"[+] cProfile stats written to {args.profile_dump}", file=log)
+    if profiler is not None:
+        profiler.print_summary(log)
+        profiler.write_json(args.profile)
+        print(f"[+] Timings written to {args.profile}", file=log)
+
+def write_html_report(args, analyzer, server_url=None):
+    """Render the interactive HTML report for the analyzer's current results."""
+    # jinja2 is only needed on this path
+    from datetime import datetime, timezone
+
+    from deadcode_finder.report import ReportGenerator
+
+    report = analyzer.get_report()
+    note_baseline(report, sys.stdout)
+    total_issues, health, color = score_report(report)
 
     report["health"] = health
     report["health_color"] = color
@@ -69,15 +219,455 @@ def main():
     report["generated_at"] = datetime.now(timezone.utc).astimezone().strftime("%b %d, %Y %H:%M %Z")
     report["server_url"] = server_url if server_url else ""
 
-    generator = ReportGenerator()
-    generator.generate(args.output, report)
+    with analyzer.phase("render"):
+        generator = ReportGenerator()
+        generator.generate(args.output, report, mode=args.report_mode)
+
+def merge(argv):
+    """`cli.py merge *.bin`: combine shard partials and make the dead-code decision once."""
+    from deadcode_finder.partials import PartialFormatError, merge_partials, read_partial
+
+    parser = argparse.ArgumentParser(prog="cli.py merge",
+                                     description="Merge partials written by scan --emit-partial")
+    parser.add_argument("partials", nargs="+", metavar="PARTIAL")
+    parser.add_argument("--root", default=None,
+                        help="Checkout the partials' relative paths are resolved against "
+                             "(default: the root recorded by the shards)")
+    parser.add_argument("--output", "-o", default=None,
+                        help="Output file (default: deadcode_report.html, or stdout for machine formats)")
+    parser.add_argument("--format", "-f", choices=FORMATS, default="html")
+    parser.add_argument("--report-mode", choices=("auto", "full", "virtual"), default="auto")
+    args = parser.parse_args(argv)
+    machine = args.format != "html"
+    if args.output is None:
+        args.output = "-" if machine else "deadcode_report.html"
+    log = sys.stderr if machine else sys.stdout
+
+    started = time.perf_counter()
+    try:
+        partials = [read_partial(path, args.root) for path in args.partials]
+        summaries = merge_partials(partials)
+    except (OSError, PartialFormatError, ValueError) as e:
+        parser.error(str(e))
+    args.path = partials[0].root
+    print(f"[*] Merging {len(partials)} partial(s): {len(summaries)} files under {args.path}", file=log)
+
+    analyzer = DeadCodeAnalyzer(args.path)
+    if machine:
+        write_machine_report(args, analyzer,
+                             lambda on_summary=None: analyzer.load(summaries, on_summary))
+    else:
+        analyzer.load(summaries)
+        write_html_report(args, analyzer)
+    print(f"[*] Merged in {time.perf_counter() - started:.2f}s", file=log)
+
+def print_usages(result, out=sys.stdout):
+    """Human-readable who-uses answer."""
+    if not result["definitions"]:
+        print(f"[!] No function or class named {result['symbol']!r} is defined in the scanned tree", file=out)
+    for d in result["definitions"]:
+        print(f"{d['kind']} {d['qualname']}  ({d['file']}:{d['line']})", file=out)
+    if result["ambiguous"]:
+        print(f"[!] Several defs match {result['symbol']!r}, or some references can't be resolved "
+              f"statically (attribute access, imports from outside the tree) and may belong to any "
+              f"def named {result['name']!r}", file=out)
+    if result["definitions"]:
+        if result["live"]:
+            print("Alive via: " + " -> ".join(result["alive_via"]), file=out)
+        else:
+            print("Dead: not reachable from module-level code, entry points, decorators or magic methods",
+                  file=out)
+    print(f"{len(result['references'])} reference(s) to {result['name']!r}:", file=out)
+    for ref in result["references"]:
+        print(f"  {ref['file']}:{ref['line']}  in {ref['from']}", file=out)
+
+def who_uses(argv):
+    """`cli.py who-uses <symbol> [path]`: answer from the persisted usage index."""
+    import json
+    from deadcode_finder.refindex import ReferenceIndex
+
+    parser = argparse.ArgumentParser(prog="cli.py who-uses",
+                                     description="Show where a function or class is used and why it is alive")
+    parser.add_argument("symbol", help="Bare name (run) or qualified name (pkg.mod.Class.run, Class.run)")
+    parser.add_argument("path", nargs="?", default=".")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Analysis cache location (default: <path>/.deadcode_cache)")
+    parser.add_argument("--json", action="store_true", help="Print the answer as JSON")
+    args = parser.parse_args(argv)
+
+    cache_dir = AnalysisCache.default_dir(args.path, args.cache_dir)
+    index = ReferenceIndex.load(cache_dir)
+    if index is None:
+        print("[*] No usage index yet; scanning", args.path, "to build it", file=sys.stderr)
+        cache = AnalysisCache(args.path, args.cache_dir)
+        analyzer = DeadCodeAnalyzer(args.path, jobs=os.cpu_count() or 1, cache=cache)
+        analyzer.scan()
+        save_reference_index(analyzer, cache)
+        index = ReferenceIndex.load(cache_dir)
+
+    started = time.perf_counter()
+    result = index.who_uses(args.symbol)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_usages(result)
+        print(f"[*] Answered in {elapsed_ms:.1f} ms from the index (re-run a scan to refresh it)",
+              file=sys.stderr)
+
+def add_tree_options(parser):
+    """Options choosing which files are analyzed and how, shared by scan and update-baseline."""
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes for scanning (default: CPU count)")
+    parser.add_argument("--no-cache", action="store_true", help="Don't read or write the analysis cache")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Analysis cache location (default: <path>/.deadcode_cache)")
+    parser.add_argument("--include", action="append", metavar="GLOB",
+                        help="Only scan files matching GLOB (repeatable, default: *.py)")
+    parser.add_argument("--exclude", action="append", metavar="GLOB",
+                        help="Skip files and directories matching GLOB (repeatable)")
+    parser.add_argument("--no-gitignore", action="store_true", help="Don't honour .gitignore files")
+    parser.add_argument("--max-file-size", default=f"{DEFAULT_LIMITS.max_bytes >> 20}M",
+                        metavar="SIZE",
+                        help="Don't parse larger files (e.g. 500K, 2M; 0 = no limit; default: "
+                             "%(default)s); names in them still count as used")
+    parser.add_argument("--max-file-lines", type=int, default=DEFAULT_LIMITS.max_lines, metavar="N",
+                        help="Don't parse files with more lines (0 = no limit, default: %(default)s)")
+    parser.add_argument("--file-timeout", type=float, default=DEFAULT_LIMITS.time_budget,
+                        metavar="SECONDS",
+                        help="Give up on a file whose parse and visit take longer "
+                             "(0 = no limit, default: %(default)s)")
+
+def parse_limits(args, parser):
+    """Limits from the --max-file-size, --max-file-lines and --file-timeout options."""
+    try:
+        return Limits(parse_size(args.max_file_size), args.max_file_lines, args.file_timeout)
+    except ValueError as e:
+        parser.error(f"--max-file-size: {e}")
+
+def load_baseline(path, root, parser):
+    """The baseline at path ("" = the default file in root); a missing file is an empty baseline."""
+    from deadcode_finder.baseline import DEFAULT_BASELINE_NAME, Baseline, BaselineError
+
+    try:
+        return Baseline.load(path or os.path.join(root, DEFAULT_BASELINE_NAME))
+    except BaselineError as e:
+        parser.error(str(e))
+
+def open_history(path, root, cache_dir=None):
+    """The history store at path ("" = history.sqlite3 in the cache directory)."""
+    from deadcode_finder.history import HistoryStore
+
+    return HistoryStore(path or HistoryStore.path_in(AnalysisCache.default_dir(root, cache_dir)), root)
+
+def record_history(history, analyzer, duration, log):
+    """Store this full scan's counts, findings and summaries; a broken history file only warns."""
+    from deadcode_finder.gitdiff import head_commit
+    from deadcode_finder.history import HistoryError
+
+    report = analyzer.get_report(apply_baseline=False)
+    total_issues, health, _ = score_report(report)
+    try:
+        history.record(analyzer, report, total_issues, health, head_commit(analyzer.root), duration)
+    except HistoryError as e:
+        print(f"[!] Scan not recorded: {e}", file=log)
+        return
+    print(f"[*] Scan recorded in {history.path}", file=log)
+
+def format_trends(scans, out=sys.stdout):
+    """History table, oldest scan first."""
+    from datetime import datetime
+
+    print(f"{'scanned':<17} {'commit':<10} {'findings':>8} {'change':>7} {'health':>6} "
+          f"{'imports':>7} {'funcs':>6} {'classes':>7} {'vars':>5} {'unreach':>7}", file=out)
+    for scan in scans:
+        when = datetime.fromtimestamp(scan["started_at"]).strftime("%Y-%m-%d %H:%M")
+        change = "" if scan["change"] is None else f"{scan['change']:+d}"
+        print(f"{when:<17} {(scan['git_commit'] or '-')[:10]:<10} {scan['findings']:>8} {change:>7} "
+              f"{scan['health']:>5}% {scan['imports']:>7} {scan['functions']:>6} "
+              f"{scan['classes']:>7} {scan['variables']:>5} {scan['unreachable']:>7}", file=out)
+
+def history(argv):
+    """`cli.py history [path]`: finding trends from the recorded scans, without scanning."""
+    import json
+    from deadcode_finder.history import HistoryError
+
+    parser = argparse.ArgumentParser(prog="cli.py history",
+                                     description="Show how findings changed across recorded scans")
+    parser.add_argument("path", nargs="?", default=".", help="Scanned directory the history belongs to")
+    parser.add_argument("--history", default="", metavar="FILE",
+                        help="History file (default: <cache dir>/history.sqlite3)")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Analysis cache location (default: <path>/.deadcode_cache)")
+    parser.add_argument("--limit", "-n", type=int, default=20, help="Latest scans to show (default: 20)")
+    parser.add_argument("--file", default=None,
+                        help="Findings per scan in this file only (path as the scans spelled it)")
+    parser.add_argument("--json", action="store_true", help="Print the scans as JSON")
+    args = parser.parse_args(argv)
+
+    store = open_history(args.history, args.path, args.cache_dir)
+    if not store.path.exists():
+        parser.error(f"no history at {store.path}; record scans with `cli.py {args.path} --history`")
+    started = time.perf_counter()
+    try:
+        scans = store.file_trend(args.file, args.limit) if args.file else store.trends(args.limit)
+    except HistoryError as e:
+        parser.error(str(e))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if args.json:
+        print(json.dumps(scans, indent=2))
+    elif args.file:
+        from datetime import datetime
+        for scan in scans:
+            when = datetime.fromtimestamp(scan["started_at"]).strftime("%Y-%m-%d %H:%M")
+            print(f"{when:<17} {(scan['git_commit'] or '-')[:10]:<10} {scan['findings']:>8}")
+    else:
+        format_trends(scans)
+    print(f"[*] {len(scans)} scan(s) from {store.path} in {elapsed_ms:.1f} ms", file=sys.stderr)
+
+def update_baseline(argv):
+    """`cli.py update-baseline [path]`: accept every current finding, so later scans report only new ones."""
+    parser = argparse.ArgumentParser(prog="cli.py update-baseline",
+                                     description="Record the current findings as known")
+    parser.add_argument("path", nargs="?", default=".", help="Directory to scan")
+    parser.add_argument("--baseline", default="", metavar="FILE",
+                        help="Baseline file to write (default: <path>/.deadcode-baseline.json)")
+    add_tree_options(parser)
+    args = parser.parse_args(argv)
+    limits = parse_limits(args, parser)
+    old = load_baseline(args.baseline, args.path, parser)
+
+    print("[*] Scanning:", args.path)
+    cache = None if args.no_cache else AnalysisCache(args.path, args.cache_dir, limits)
+    analyzer = DeadCodeAnalyzer(args.path, jobs=args.jobs, cache=cache,
+                                include=args.include, exclude=args.exclude,
+                                use_gitignore=not args.no_gitignore, limits=limits)
+    analyzer.scan()
+    save_reference_index(analyzer, cache)
+    note_skipped(analyzer, sys.stdout)
+
+    new = old.write(iter_findings(analyzer.get_report()))
+    print(f"[+] Baseline {new.path}: {len(new)} finding(s), "
+          f"{len(new.fingerprints - old.fingerprints)} added, "
+          f"{len(old.fingerprints - new.fingerprints)} no longer found")
+
+def expand_files(targets, args):
+    """Explicit files as given; directories among them are walked with the usual filters."""
+    from deadcode_finder.walker import FileWalker
+
+    files = []
+    for target in targets:
+        if os.path.isdir(target):
+            files.extend(FileWalker(target, include=args.include, exclude=args.exclude,
+                                    use_gitignore=not args.no_gitignore))
+        else:
+            files.append(target)
+    return files
+
+def scan(argv):
+    """`cli.py [scan] <path>`: analyze a tree, then report, serve, watch or emit a partial."""
+    parser = argparse.ArgumentParser(prog="cli.py [scan]")
+    parser.add_argument("path", help="Directory to scan, or a file")
+    parser.add_argument("files", nargs="*", metavar="FILE",
+                        help="More files to check instead of walking the tree (e.g. from a "
+                             "pre-commit hook); needs --only with file-local kinds")
+    parser.add_argument("--output", "-o", default=None,
+                        help="Output file (default: deadcode_report.html, or stdout for machine formats)")
+    parser.add_argument("--format", "-f", choices=FORMATS, default=None,
+                        help="Output format (default: html, or text with --fast); "
+                             "the others skip the HTML report and the server")
+    parser.add_argument("--report-mode", choices=("auto", "full", "virtual"), default="auto",
+                        help="'virtual' embeds findings as JSON and renders only visible rows "
+                             "(auto: used for large reports)")
+    parser.add_argument("--port", "-p", type=int, default=8765, help="Port for removal server")
+    parser.add_argument("--no-server", action="store_true", help="Don't start removal server")
+    parser.add_argument("--server-workers", type=int, default=4,
+                        help="Removal requests the server processes concurrently")
+    add_tree_options(parser)
+    parser.add_argument("--baseline", nargs="?", const="", default=None, metavar="FILE",
+                        help="Leave out findings recorded in this baseline (default file: "
+                             "<path>/.deadcode-baseline.json; create it with `cli.py update-baseline`)")
+    parser.add_argument("--history", nargs="?", const="", default=None, metavar="FILE",
+                        help="Record this scan in a local SQLite history (default file: "
+                             "<cache dir>/history.sqlite3) and seed a missing cache from it; "
+                             "see `cli.py history`")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and re-analyze files as they change")
+    parser.add_argument("--poll", action="store_true",
+                        help="Use polling instead of inotify in watch mode")
+    parser.add_argument("--progress", action="store_true",
+                        help="Show a progress bar with throughput on stderr")
+    parser.add_argument("--profile", nargs="?", const="deadcode_profile.json", default=None,
+                        metavar="FILE",
+                        help="Record per-phase timings and the slowest files "
+                             "(written to FILE, default: deadcode_profile.json)")
+    parser.add_argument("--profile-top", type=int, default=10, metavar="N",
+                        help="Slowest files to list with --profile (default: 10)")
+    parser.add_argument("--profile-dump", default=None, metavar="FILE",
+                        help="Also run under cProfile and write pstats to FILE "
+                             "(main process only; use --jobs 1 to include parsing)")
+    parser.add_argument("--since", default=None, metavar="REF",
+                        help="Only re-evaluate files changed since git REF and the symbols they "
+                             "could have made dead (uses the index saved by the last full scan)")
+    parser.add_argument("--shard", default=None, metavar="i/N",
+                        help="Analyze only the i-th of N slices of the tree (needs --emit-partial)")
+    parser.add_argument("--emit-partial", default=None, metavar="FILE",
+                        help="Write per-file summaries to FILE for `cli.py merge` instead of reporting")
+    parser.add_argument("--only", action="append", choices=tuple(KINDS), metavar="KIND",
+                        help="Only report this kind of finding (repeatable: "
+                             + ", ".join(KINDS) + "); file-local kinds skip the reference graph")
+    parser.add_argument("--fast", action="store_true",
+                        help="With --only imports: find unused imports with a token scan instead of "
+                             "parsing (files it can't decide are parsed); no cache, exit status 1 "
+                             "when anything is found")
+    args = parser.parse_args(argv)
+    if args.profile:
+        args.progress = True
+    if args.since and (args.no_cache or args.watch or args.emit_partial):
+        parser.error("--since needs the cache and can't be combined with --watch or --emit-partial")
+    if args.fast and args.only != ["imports"]:
+        parser.error("--fast only works with --only imports")
+    explicit = bool(args.files) or os.path.isfile(args.path)
+    if explicit and not set(args.only or KINDS) <= set(FILE_LOCAL_KINDS):
+        parser.error("checking individual files needs --only with file-local kinds ("
+                     + ", ".join(FILE_LOCAL_KINDS) + "); unused defs need the whole tree")
+    if (args.fast or explicit) and (args.since or args.emit_partial):
+        parser.error("--since and --emit-partial need full analysis of the whole tree")
+    if args.history is not None and (args.since or args.emit_partial or args.fast or explicit
+                                     or args.only):
+        parser.error("--history records full scans; it can't be combined with --since, "
+                     "--emit-partial, --fast, --only or explicit files")
+    if args.format is None:
+        args.format = "text" if args.fast else "html"
+    limits = parse_limits(args, parser)
+    shard = None
+    if args.shard:
+        from deadcode_finder.partials import parse_shard
+        if not args.emit_partial:
+            parser.error("--shard needs --emit-partial; dead code is only decided at merge time")
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+    machine = args.format != "html"
+    if args.output is None:
+        args.output = "-" if machine else "deadcode_report.html"
+    # Keep stdout clean for machine-readable output
+    log = sys.stderr if machine else sys.stdout
+
+    profiler = None
+    if args.profile:
+        from deadcode_finder.profiling import Profiler
+        profiler = Profiler(top_n=args.profile_top)
+    cprofile = None
+    if args.profile_dump:
+        import cProfile
+        cprofile = cProfile.Profile()
+        cprofile.enable()
+
+    files = None
+    root = args.path
+    if explicit:
+        files = expand_files([args.path] + args.files, args)
+        root = args.path if os.path.isdir(args.path) else os.path.dirname(args.path) or "."
+    print("[*] Scanning:", args.path if files is None else f"{len(files)} file(s)", file=log)
+    # --since never loads the per-file cache, only the reference index next to it.
+    # --fast summaries are imports-only and explicit file lists are partial, so neither is cached.
+    use_cache = not (args.no_cache or args.since or args.fast or explicit)
+    cache = AnalysisCache(args.path, args.cache_dir, limits) if use_cache else None
+    only = [KINDS[kind][1] for kind in args.only] if args.only else None
+    analyzer = DeadCodeAnalyzer(root, jobs=args.jobs, cache=cache,
+                                include=args.include, exclude=args.exclude,
+                                use_gitignore=not args.no_gitignore,
+                                shard=shard or ((1, 1) if args.emit_partial else None),
+                                only=only, fast=args.fast, limits=limits)
+    analyzer.profiler = profiler
+    if args.baseline is not None and not args.emit_partial:
+        analyzer.baseline = load_baseline(args.baseline, root, parser)
+    history_store = None
+    if args.history is not None:
+        from deadcode_finder.history import HistoryError
+        history_store = open_history(args.history, args.path, args.cache_dir)
+        if cache is not None:
+            try:
+                seeded = history_store.warm_start(cache)
+            except HistoryError as e:
+                parser.error(str(e))
+            if seeded:
+                print(f"[*] History: {seeded} cached summaries offered from the last recorded scan",
+                      file=log)
+    scan_started = time.perf_counter()
+    if args.emit_partial:
+        from deadcode_finder.partials import write_partial
+        run_scan(analyzer, args.progress)
+        write_partial(args.emit_partial, analyzer)
+        index, count = analyzer.shard
+        print(f"[+] Shard {index}/{count}: {len(analyzer.summaries)} of {analyzer.walked_files} files "
+              f"written to {args.emit_partial}", file=log)
+        finish_profile(args, profiler, cprofile, log)
+        return
+
+    if args.since:
+        from deadcode_finder.gitdiff import GitError
+        # Changed files are parsed directly; the per-file cache isn't loaded
+        analyze = lambda on_summary=None: scan_since(args, analyzer, log, on_summary)
+        try:
+            if machine:
+                write_machine_report(args, analyzer, analyze)
+                finish_profile(args, profiler, cprofile, log)
+                return
+            analyze()
+        except GitError as e:
+            parser.error(f"--since: {e}")
+    elif machine:
+        def analyze(on_summary=None):
+            run_scan(analyzer, args.progress, on_summary, files)
+            save_reference_index(analyzer, cache)
+        write_machine_report(args, analyzer, analyze)
+        if cache is not None:
+            print(f"[*] Cache: {cache.hits} reused, {cache.misses} parsed", file=log)
+        note_skipped(analyzer, log)
+        if history_store is not None:
+            record_history(history_store, analyzer, time.perf_counter() - scan_started, log)
+        finish_profile(args, profiler, cprofile, log)
+        if args.fast:
+            # Fail the hook when anything was reported
+            return 1 if any(iter_findings(analyzer.get_report())) else 0
+        return
+    else:
+        run_scan(analyzer, args.progress, files=files)
+        save_reference_index(analyzer, cache)
+        if cache is not None:
+            print(f"[*] Cache: {cache.hits} reused, {cache.misses} parsed")
+        note_skipped(analyzer, log)
+        if history_store is not None:
+            record_history(history_store, analyzer, time.perf_counter() - scan_started, log)
+
+    # HTML-only dependencies (jinja2, http.server) are loaded only on this path
+    from deadcode_finder.server import RemovalServer
+
+    # Start removal server
+    server = None
+    server_url = None
+    if not args.no_server:
+        server = RemovalServer(args.path, args.port, max_workers=args.server_workers,
+                               analyzer=analyzer, history=history_store)
+        server_url = server.start()
+        if server_url:
+            print(f"[+] Removal server started at {server_url}")
+
+    write_html_report(args, analyzer, server_url)
+    finish_profile(args, profiler, cprofile, log)
+
+    if args.watch:
+        watch(analyzer, server, polling=args.poll)
+        return
     
     if server and server.is_running():
         print("[+] Server is running. Keep this terminal open to use removal features.")
         print("[!] Press Ctrl+C to stop the server and exit.")
         try:
             # Keep the main thread alive while server runs
-            import time
             while True:
                 time.sleep(1)
         except KeyboardInterrupt:
@@ -85,5 +675,20 @@ def main():
             server.stop()
             print("[+] Server stopped.")
 
+# Subcommands; anything else is treated as `scan` so `cli.py <path>` keeps working
+COMMANDS = {
+    "scan": scan,
+    "merge": merge,
+    "who-uses": who_uses,
+    "update-baseline": update_baseline,
+    "history": history,
+}
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:])
+    return scan(argv)
+
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
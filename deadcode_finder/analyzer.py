@@ -1,200 +1,546 @@
 import ast
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from array import array
+from functools import partial
 from pathlib import Path
-from deadcode_finder.utils import read_file
+from deadcode_finder.cache import content_digest, fingerprint
+from deadcode_finder.call_graph import build_reference_graph, file_refs, qualify
+from deadcode_finder.ingest import (DEFAULT_LIMITS, SkipFile, budget_reason, check_limits,
+                                    decode_source, names_in, open_source, time_budget)
+from deadcode_finder.records import DefTable, PathTable, intern_names, is_names, is_rows, is_sites
+from deadcode_finder.traversal import analyze_module
+from deadcode_finder.walker import FileWalker
+
+# Below this many files the cost of spawning workers outweighs the gain.
+PARALLEL_MIN_FILES = 64
+
+class FileSummary:
+    """Picklable per-file analysis result, merged into DeadCodeAnalyzer.
+
+    Name collections are tuples rather than sets: they are only iterated after
+    the visit, and a tuple costs a fraction of a set's memory.
+    """
+
+    __slots__ = ('path', 'digest', 'unused_imports', 'function_defs', 'class_defs',
+                 'entry_points', 'decorated_functions', 'unused_vars', 'unreachable',
+                 'sites', 'skipped', 'imports')
+
+    def __init__(self, path, digest, unused_imports, function_defs, class_defs,
+                 entry_points, decorated_functions, unused_vars, unreachable, sites,
+                 skipped=None, imports=()):
+        self.path = path
+        self.digest = digest
+        self.unused_imports = unused_imports
+        self.function_defs = function_defs  # ((name, line, qualified name in module), ...)
+        self.class_defs = class_defs
+        self.entry_points = entry_points
+        self.decorated_functions = decorated_functions
+        self.unused_vars = unused_vars
+        self.unreachable = unreachable
+        # Qualified def name ('' = module level) -> (names it loads, line of each first use);
+        # attribute loads are '.attr'
+        self.sites = sites
+        # Why the file wasn't analyzed (too large, syntax error, ...), or None
+        self.skipped = skipped
+        # ((bound name or '*', module, imported name or '*', level), ...) per `from ... import`
+        self.imports = imports
+
+    def to_record(self) -> tuple:
+        """The fields as plain tuples, dicts and strings, for marshal."""
+        return tuple(getattr(self, field) for field in self.__slots__)
+
+    @classmethod
+    def from_record(cls, record) -> 'FileSummary':
+        """Rebuild a summary from to_record() output; ValueError if any field has the wrong shape."""
+        if type(record) is not tuple or len(record) != len(cls.__slots__):
+            raise ValueError("not a FileSummary record")
+        fields = dict(zip(cls.__slots__, record))
+        if not (type(fields['path']) is str and type(fields['digest']) is str
+                and (fields['skipped'] is None or type(fields['skipped']) is str)
+                and is_names(fields['entry_points']) and is_names(fields['decorated_functions'])
+                and all(is_rows(fields[field], shape) for field, shape in _ROW_SHAPES)
+                and is_sites(fields['sites'])):
+            raise ValueError("malformed FileSummary record")
+        return cls(*record)
+
+    @property
+    def module_refs(self):
+        """Names loaded outside any def."""
+        return self.sites[''][0] if '' in self.sites else ()
+
+    def intern_names(self):
+        """Share symbol strings with every other summary (unpickling makes fresh copies)."""
+        self.entry_points = intern_names(self.entry_points)
+        self.decorated_functions = intern_names(self.decorated_functions)
+        self.sites = {sys.intern(owner): (intern_names(names), lines)
+                      for owner, (names, lines) in self.sites.items()}
+        self.function_defs = tuple((sys.intern(name), line, sys.intern(qual))
+                                   for name, line, qual in self.function_defs)
+        self.class_defs = tuple((sys.intern(name), line, sys.intern(qual))
+                                for name, line, qual in self.class_defs)
+
+
+# Row-tuple fields of FileSummary and the types of their items
+_ROW_SHAPES = (('unused_imports', (str, int)), ('function_defs', (str, int, str)),
+               ('class_defs', (str, int, str)), ('unused_vars', (int, str)),
+               ('unreachable', (int, str)), ('imports', (str, str, str, int)))
+
+
+def summarize_file(path, limits=DEFAULT_LIMITS):
+    """Parse and visit a single file. Returns None only if it can't be opened."""
+    return _summarize(path, None, limits)
+
+
+def summarize_file_timed(path, limits=DEFAULT_LIMITS):
+    """summarize_file() plus its read/parse/visit timings, for --profile."""
+    times = {}
+    summary = _summarize(path, times, limits)
+    return str(path), summary, times
+
+
+def summarize_imports(path, limits=DEFAULT_LIMITS):
+    """Unused imports only, from the token scanner; parses the file only if the scanner can't decide.
+
+    The other fields are left empty, so these summaries must not be cached or
+    merged with full ones.
+    """
+    from deadcode_finder.fastimports import unused_imports
+
+    try:
+        with open_source(path) as data:
+            check_limits(data, limits)
+            digest = content_digest(data)
+            unused = unused_imports(decode_source(data))
+    except (OSError, SkipFile, SyntaxError, UnicodeDecodeError):
+        unused = None  # Let the full path record why
+    if unused is None:
+        full = _summarize(path, None, limits)
+        if full is None or full.skipped:
+            return full
+        digest, unused = full.digest, full.unused_imports
+    return FileSummary(str(path), digest, unused, (), (), (), (), (), (), {})
+
+
+def skipped_summary(path, digest, reason, names=()):
+    """Summary of a file that wasn't analyzed: no findings, and every name in it counts as used.
+
+    Its imports are unknown, so the names are kept as attribute loads, which
+    keep every def of that name alive wherever it is defined.
+    """
+    names = tuple('.' + name for name in names)
+    return FileSummary(str(path), digest, (), (), (), (), (), (), (),
+                       {'': (names, (0,) * len(names))}, reason)
+
+
+def _summarize(path, times, limits):
+    clock = time.perf_counter if times is not None else None
+    if clock:
+        started = clock()
+    try:
+        with open_source(path) as data:
+            digest = content_digest(data)
+            try:
+                check_limits(data, limits)
+                if clock:
+                    read_done = clock()
+                    times["read"] = read_done - started
+                with time_budget(limits.time_budget):
+                    # Bytes, so the parser applies the encoding cookie itself
+                    tree = ast.parse(data)
+                    if clock:
+                        parse_done = clock()
+                        times["parse"] = parse_done - read_done
+                    module = analyze_module(tree)
+            except SkipFile as e:
+                return skipped_summary(path, digest, str(e), names_in(data))
+            except SyntaxError as e:
+                return skipped_summary(path, digest, f"syntax error on line {e.lineno}: {e.msg}",
+                                       names_in(data))
+            except (ValueError, RecursionError) as e:
+                # Null bytes, or nesting too deep for the parser or the visitor
+                return skipped_summary(path, digest, f"can't parse: {e}", names_in(data))
+    except OSError as e:
+        if not os.path.exists(path):
+            return None
+        return skipped_summary(path, '', f"can't read: {e.strerror or e}")
+    if clock:
+        times["visit"] = clock() - parse_done
+
+    # Process imports: keep only those not used in this file
+    unused = []
+    for imp, lineno in module.imports:
+        base = imp.split(".")[0]
+        if base not in module.used_names:
+            unused.append((imp, lineno))
+
+    return FileSummary(
+        str(path),
+        digest,
+        tuple(unused),
+        tuple((name, lineno, qual) for qual, (name, lineno) in module.function_defs.items()),
+        tuple((name, lineno, qual) for qual, (name, lineno) in module.class_defs.items()),
+        tuple(module.entry_points),
+        tuple(module.decorated_functions),
+        tuple(module.unused_vars),
+        tuple(module.unreachable),
+        {owner: (tuple(refs), tuple(refs.values())) for owner, refs in module.sites.items()},
+        imports=tuple(module.import_sources),
+    )
 
 
 class DeadCodeAnalyzer:
-    def __init__(self, root):
+    def __init__(self, root, jobs=1, cache=None, include=None, exclude=None,
+                 use_gitignore=True, shard=None, only=None, fast=False, limits=DEFAULT_LIMITS):
         self.root = Path(root)
-        self.unused_imports = {}
-        self.unused_functions = []
-        self.unused_classes = []
-        self.unused_variables = {}
-        self.unreachable_code = {}
-        self.function_defs = {}
-        self.class_defs = {}
-        self.used_names = set()
-        self.entry_points = set()  # Track entry points (__main__, test functions, etc.)
-        self.decorated_functions = set()  # Track decorated functions
-        self.magic_methods = set()  # Track magic methods
-
-    def scan(self):
-        py_files = [
-            p for p in self.root.rglob("*.py")
-            if "venv" not in str(p) and ".venv" not in str(p)
-            and "env" not in str(p) and "tests" not in str(p)
-        ]
-
-        for file in py_files:
-            self._analyze_file(file)
-
-        self._compute_dead_functions()
-        self._compute_dead_classes()
-
-    def _analyze_file(self, path):
-        src = read_file(path)
-        try:
-            tree = ast.parse(src)
-        except SyntaxError:
+        self.jobs = max(1, jobs or os.cpu_count() or 1)
+        self.cache = cache  # Optional AnalysisCache for warm rescans
+        # (i, N), 1-based: analyze every Nth file of the walk, starting at the i-th
+        self.shard = shard
+        self.walk_positions = {}  # str(path) -> position in the full walk, when sharded
+        self.walked_files = 0
+        self.generation = 0  # Bumped whenever results change
+        self._usage_index = None  # (generation, ReferenceIndex) for who-uses queries
+        self.walker = FileWalker(self.root, include=include, exclude=exclude,
+                                 use_gitignore=use_gitignore)
+        self.summaries = {}  # str(path) -> FileSummary, in scan order
+        self.profiler = None  # Optional profiling.Profiler, set for --profile
+        self.baseline = None  # Optional baseline.Baseline; its findings are left out of reports
+        # Report keys to produce (e.g. {'unused_imports'}); None = everything
+        self.only = frozenset(only) if only else None
+        # Token-scan imports instead of parsing (needs only == {'unused_imports'}); never cached
+        self.fast = fast
+        # Size, line and time limits for each file (ingest.Limits); over-limit files are skipped
+        self.limits = limits
+        self.summarize = partial(summarize_imports if fast else summarize_file, limits=limits)
+        # Guards results while a watcher updates them and the server reads them
+        self.lock = threading.RLock()
+        self._reset_results()
+
+    def _reset_results(self):
+        # File-local findings stay in self.summaries; get_report() builds the dicts
+        self.paths = PathTable()
+        self.function_defs = DefTable()
+        self.class_defs = DefTable()
+        self.dead_functions = array('i')  # rows of function_defs
+        self.dead_classes = array('i')  # rows of class_defs
+        self.call_graph = None
+        self.reachable = set()
+
+    def _store(self, summary):
+        """Keep a summary, sharing its path and symbol strings with the rest of the scan."""
+        summary.intern_names()
+        self.summaries[summary.path] = summary
+
+    def scan(self, on_summary=None, files=None):
+        """Analyze the whole tree. `on_summary` sees each file's summary as soon as it is ready.
+
+        `files` restricts the scan to those paths instead of walking the root
+        (e.g. the staged files a pre-commit hook passes); the cache is bypassed.
+        """
+        self.summaries = {}
+        explicit = files is not None
+        files = iter(self.walker) if files is None else (Path(path) for path in files)
+        if self.shard is not None:
+            files = self._select_shard(files)
+        if self.profiler is not None:
+            files = self.profiler.timed_iter("walk", files)
+        # The walk is lazy, so this phase also contains the walk time
+        with self.phase("summarize"):
+            if explicit:
+                summaries = self._summarize_files(files)
+            else:
+                # A shard sees part of the tree; the other shards' entries must survive it
+                summaries = self._summarize_all(files, prune=self.shard is None)
+            for summary in summaries:
+                if summary is not None:
+                    self._store(summary)
+                    if on_summary is not None:
+                        on_summary(summary)
+        self._rebuild()
+
+    def load(self, summaries, on_summary=None):
+        """Use precomputed summaries (e.g. merged shard partials) instead of scanning."""
+        self.summaries = {}
+        for summary in summaries:
+            self._store(summary)
+            if on_summary is not None:
+                on_summary(summary)
+        self._rebuild()
+
+    def scan_changed(self, paths, index, on_summary=None):
+        """Analyze only `paths` against a ReferenceIndex of the rest of the tree (--since).
+
+        File-local findings come from the changed files; dead functions and
+        classes are the defs the change could have affected that the index
+        now finds unreachable. The index is updated in place.
+        """
+        from deadcode_finder.refindex import file_refs
+
+        present = [path for path in paths if Path(path).is_file() and self.walker.accepts(path)]
+        summaries = {}
+        for summary in self._summarize_files(present):
+            if summary is not None:
+                summaries[summary.path] = summary
+        changes = {str(path): None for path in paths}
+        for key, summary in summaries.items():
+            changes[key] = file_refs(summary, self.module_name(key))
+        dead = index.apply(changes)
+
+        with self.lock:
+            self.summaries = {}
+            for summary in summaries.values():
+                self._store(summary)
+                if on_summary is not None:
+                    on_summary(summary)
+            self._reset_results()
+            for qual in sorted(dead):
+                for kind, path, line, name in index.definitions_of(qual):
+                    table = self.function_defs if kind == 'function' else self.class_defs
+                    table.add(qual, name, self.paths.intern(path), line)
+            self.dead_functions = array('i', range(len(self.function_defs)))
+            self.dead_classes = array('i', range(len(self.class_defs)))
+            self.generation += 1
+
+    def usage_index(self):
+        """ReferenceIndex over the current results, rebuilt only after they change."""
+        from deadcode_finder.refindex import ReferenceIndex
+
+        with self.lock:
+            if self._usage_index is None or self._usage_index[0] != self.generation:
+                self._usage_index = (self.generation, ReferenceIndex.from_analyzer(self))
+            return self._usage_index[1]
+
+    def _select_shard(self, files):
+        """Keep this shard's files; every node walks the same tree, so positions agree."""
+        index, count = self.shard
+        self.walk_positions = {}
+        self.walked_files = 0
+        for position, path in enumerate(files):
+            self.walked_files = position + 1
+            if position % count == index - 1:
+                self.walk_positions[str(path)] = position
+                yield path
+
+    def phase(self, name):
+        """Context manager timing a named phase when a profiler is attached."""
+        return self.profiler.phase(name) if self.profiler is not None else nullcontext()
+
+    def update(self, paths):
+        """Re-analyze only the given files (changed, added or deleted) and refresh results."""
+        with self.lock:
+            self._update(paths)
+
+    def _update(self, paths):
+        # With a full reference graph, fold the changes in instead of rebuilding it
+        index = self.usage_index() if self.call_graph is not None else None
+        changed = {}  # str(path) -> new summary, or None if the file is gone
+        for path in paths:
+            path = Path(path)
+            key = str(path)
+            if key not in self.summaries and not path.is_file():
+                # A removed directory: forget everything that lived under it
+                prefix = key + os.sep
+                for stale in [k for k in self.summaries if k.startswith(prefix)]:
+                    del self.summaries[stale]
+                    changed[stale] = None
+                continue
+            fp = fingerprint(path)
+            summary = self.summarize(path) if fp is not None else None
+            if summary is None:
+                if self.summaries.pop(key, None) is not None:
+                    changed[key] = None
+                continue
+            self._store(summary)
+            changed[key] = summary
+            if self.cache is not None and not self.fast and self._cacheable(summary):
+                self.cache.put(path, fp, summary)
+        if index is None:
+            self._rebuild()
+        elif changed:
+            self._apply_changes(index, changed)
+
+    def _apply_changes(self, index, changed):
+        """Update the dead sets for re-analyzed files through the ReferenceIndex.
+
+        Only defs whose liveness the change can affect are re-checked, which for
+        one edited file is a tiny fraction of a rebuild. self.call_graph still
+        describes the last full rebuild; reachable and the dead rows are current.
+        """
+        from deadcode_finder.refindex import file_refs
+
+        with self.phase("refresh"):
+            index.refresh({
+                key: None if summary is None else file_refs(summary, self.module_name(key))
+                for key, summary in changed.items()})
+            self.reachable = set(index.live)
+            path_ids = {self.paths.intern(key) for key in changed}
+            self.function_defs = self.function_defs.without_paths(path_ids)
+            self.class_defs = self.class_defs.without_paths(path_ids)
+            for summary in changed.values():
+                self._merge_summary(summary)
+            self.dead_functions = self.function_defs.rows_where_missing(self.reachable)
+            self.dead_classes = self.class_defs.rows_where_missing(self.reachable)
+            self.generation += 1
+            self._usage_index = (self.generation, index)
+
+    def _rebuild(self):
+        """Recompute the global sets and dead-code lists from the stored summaries."""
+        with self.lock:
+            self.generation += 1
+            self._reset_results()
+            with self.phase("merge"):
+                for summary in self.summaries.values():
+                    self._merge_summary(summary)
+
+            # Dead defs need the whole reference graph; skip it when they won't be reported
+            if self.only is None or not self.only.isdisjoint(('unused_functions', 'unused_classes')):
+                self._compute_dead_functions()
+                self._compute_dead_classes()
+
+    def _cacheable(self, summary):
+        """False for files skipped over the time budget; a rescan may well finish them."""
+        return summary.skipped != budget_reason(self.limits.time_budget)
+
+    def _summarize_all(self, files, prune=True):
+        """Yield summaries in input order, reusing cached ones where the file is unchanged.
+
+        Each path is looked up in the cache as the walk yields it, and only
+        misses go on to be parsed, so the walk stays lazy. A summary is yielded
+        as soon as it and every file before it are ready. With prune, entries
+        for files the walk didn't yield are evicted at the end; only pass it
+        when files is the whole tree.
+        """
+        if self.cache is None or self.fast:
+            yield from self._summarize_files(files)
+            return
+
+        cache = self.cache
+        walked = []
+        pending = deque()  # (path, fp, cached summary or None) in walk order, not yet yielded
+
+        def misses():
+            for path in files:
+                walked.append(path)
+                fp = fingerprint(path)
+                with self.phase("cache"):
+                    summary = cache.get(path, fp)
+                pending.append((path, fp, summary))
+                if summary is None:
+                    yield path
+
+        def cached_run():
+            while pending and pending[0][2] is not None:
+                yield pending.popleft()[2]
+
+        for summary in self._summarize_files(misses()):
+            # Hits walked before this miss come first; the miss itself is the next entry
+            yield from cached_run()
+            path, fp, _ = pending.popleft()
+            if self._cacheable(summary):
+                cache.put(path, fp, summary)
+            yield summary
+        yield from cached_run()
+
+        if prune:
+            cache.prune(walked)
+        cache.save()
+
+    def _summarize_files(self, files):
+        """Yield summaries in input order, fanning out to a process pool if allowed.
+
+        `files` may be a lazy iterator; workers start parsing while the walk continues.
+        """
+        if self.profiler is None or self.fast:
+            yield from self._map_files(self.summarize, files)
+            return
+        timed = partial(summarize_file_timed, limits=self.limits)
+        for path, summary, times in self._map_files(timed, files):
+            if summary is not None:
+                self.profiler.record_file(path, times)
+            yield summary
+
+    def _map_files(self, func, files):
+        """Apply func to each file in order, in a process pool once there are enough files."""
+        files = iter(files)
+        if self.jobs == 1:
+            for path in files:
+                yield func(path)
+            return
+
+        head = list(itertools.islice(files, PARALLEL_MIN_FILES))
+        if len(head) < PARALLEL_MIN_FILES:
+            for path in head:
+                yield func(path)
             return
 
-        visitor = DeadCodeVisitor()
-        visitor.visit(tree)
+        # Imported here: it pulls in multiprocessing, which small runs (pre-commit) never need
+        from concurrent.futures import ProcessPoolExecutor
 
-        # Record used names from this file
-        self.used_names.update(visitor.used_names)
-        self.entry_points.update(visitor.entry_points)
-        self.decorated_functions.update(visitor.decorated_functions)
+        with ProcessPoolExecutor(max_workers=self.jobs) as pool:
+            # Modest chunks keep IPC overhead low without knowing the total up front.
+            yield from pool.map(func, itertools.chain(head, files), chunksize=32)
 
-        # Process imports: keep only those not used in this file
-        unused = []
-        for imp, lineno in visitor.imports:
-            base = imp.split(".")[0]
-            if base not in visitor.used_names:
-                unused.append((imp, lineno))
-        if unused:
-            # store as string path for template friendliness
-            self.unused_imports[str(path)] = unused
+    def _merge_summary(self, summary):
+        if summary is None:
+            return
+        path_id = self.paths.intern(summary.path)
+        module = self.module_name(summary.path)
 
         # Store function/class definitions with the file path and lineno
-        for name, (nm, lineno) in visitor.function_defs.items():
-            self.function_defs[name] = (str(path), lineno)
-        for name, (nm, lineno) in visitor.class_defs.items():
-            self.class_defs[name] = (str(path), lineno)
+        for name, lineno, qual in summary.function_defs:
+            self.function_defs.add(qualify(module, qual), name, path_id, lineno)
+        for name, lineno, qual in summary.class_defs:
+            self.class_defs.add(qualify(module, qual), name, path_id, lineno)
 
-        if visitor.unused_vars:
-            self.unused_variables[str(path)] = visitor.unused_vars
+    def module_name(self, path):
+        """Dotted module name of a file relative to the scanned root (pkg/mod.py -> pkg.mod)."""
+        parts = Path(os.path.relpath(path, self.root)).with_suffix('').parts
+        if parts and parts[-1] == '__init__':
+            parts = parts[:-1]
+        return '.'.join(parts)
 
-        if visitor.unreachable:
-            self.unreachable_code[str(path)] = visitor.unreachable
+    def _build_call_graph(self):
+        """Reference graph over every qualified def, rooted at module-level code and entry points."""
+        return build_reference_graph(file_refs(summary, self.module_name(path))
+                                     for path, summary in self.summaries.items())
 
     def _compute_dead_functions(self):
-        magic_methods = {'__init__', '__str__', '__repr__', '__eq__', '__hash__', 
-                        '__lt__', '__le__', '__gt__', '__ge__', '__len__', '__getitem__',
-                        '__setitem__', '__delitem__', '__iter__', '__next__', '__contains__',
-                        '__enter__', '__exit__', '__call__', '__new__', '__del__'}
-        
-        for name, (file, lineno) in self.function_defs.items():
-            # Skip if used, is an entry point, decorated, or magic method
-            if (name not in self.used_names and 
-                name not in self.entry_points and
-                name not in self.decorated_functions and
-                name not in magic_methods):
-                self.unused_functions.append((file, lineno, name))
+        with self.phase("call_graph"):
+            self.call_graph = self._build_call_graph()
+        with self.phase("reachability"):
+            self.reachable = self.call_graph.reachable()
+
+        # Dead unless reachable from module-level code, an entry point,
+        # a decorated function or a magic method
+        self.dead_functions = self.function_defs.rows_where_missing(self.reachable)
 
     def _compute_dead_classes(self):
-        for name, (file, lineno) in self.class_defs.items():
-            if name not in self.used_names:
-                self.unused_classes.append((file, lineno, name))
-
-    def get_report(self):
-        return {
-            "unused_imports": self.unused_imports,
-            "unused_functions": self.unused_functions,
-            "unused_classes": self.unused_classes,
-            "unused_variables": self.unused_variables,
-            "unreachable_code": self.unreachable_code
-        }
-
-
-class DeadCodeVisitor(ast.NodeVisitor):
-    def __init__(self):
-        self.imports = []
-        self.used_names = set()
-        self.function_defs = {}
-        self.class_defs = {}
-        self.unused_vars = []
-        self.unreachable = []
-        self.scope = []
-        self.entry_points = set()
-        self.decorated_functions = set()
-        self.in_function = False
-        self.after_return = False
-
-    def visit_Import(self, node):
-        for alias in node.names:
-            # Use the alias if present, otherwise use the import name
-            name_used = alias.asname if alias.asname else alias.name
-            self.imports.append((name_used, node.lineno))
-        self.generic_visit(node)
-
-    def visit_ImportFrom(self, node):
-        for alias in node.names:
-            # Use the alias if present, otherwise use the import name
-            name_used = alias.asname if alias.asname else alias.name
-            self.imports.append((name_used, node.lineno))
-        self.generic_visit(node)
-
-    def visit_FunctionDef(self, node):
-        # Check for decorators
-        if node.decorator_list:
-            self.decorated_functions.add(node.name)
-            # Track decorator names as used
-            for decorator in node.decorator_list:
-                if isinstance(decorator, ast.Name):
-                    self.used_names.add(decorator.id)
-                elif isinstance(decorator, ast.Call) and isinstance(decorator.func, ast.Name):
-                    self.used_names.add(decorator.func.id)
-        
-        # Check for entry points
-        if node.name in ('main', 'run', 'execute'):
-            self.entry_points.add(node.name)
-        # Check for test functions
-        if node.name.startswith('test_'):
-            self.entry_points.add(node.name)
-            
-        self.function_defs[node.name] = (node.name, node.lineno)
-        self.scope.append(set())
-        old_in_function = self.in_function
-        old_after_return = self.after_return
-        self.in_function = True
-        self.after_return = False
-        
-        self.generic_visit(node)
-        
-        self.in_function = old_in_function
-        self.after_return = old_after_return
-        assigned = self.scope.pop()
-        unused = assigned - self.used_names
-        for v in unused:
-            self.unused_vars.append((node.lineno, v))
-
-    def visit_ClassDef(self, node):
-        self.class_defs[node.name] = (node.name, node.lineno)
-        self.generic_visit(node)
-
-    def visit_Name(self, node):
-        if isinstance(node.ctx, ast.Load):
-            self.used_names.add(node.id)
-        self.generic_visit(node)
-
-    def visit_Assign(self, node):
-        if isinstance(node.targets[0], ast.Name):
-            if self.scope:
-                self.scope[-1].add(node.targets[0].id)
-        self.generic_visit(node)
-
-    def visit_Return(self, node):
-        if self.in_function:
-            self.after_return = True
-        self.generic_visit(node)
-
-    def visit_stmt_after_return(self, node):
-        """Helper to detect unreachable code after return"""
-        if self.after_return and self.in_function:
-            if not isinstance(node, (ast.FunctionDef, ast.ClassDef, ast.Return)):
-                self.unreachable.append((node.lineno, "code after return"))
-        return node
-
-    def visit_If(self, node):
-        """Check for __main__ entry point"""
-        if isinstance(node.test, ast.Compare):
-            if (isinstance(node.test.left, ast.Name) and 
-                node.test.left.id == '__name__' and
-                any(isinstance(comp, ast.Constant) and comp.value == '__main__' 
-                    for comp in node.test.comparators)):
-                # Mark functions called in __main__ as entry points
-                for child in ast.walk(node):
-                    if isinstance(child, ast.Call) and isinstance(child.func, ast.Name):
-                        self.entry_points.add(child.func.id)
-        self.generic_visit(node)
+        self.dead_classes = self.class_defs.rows_where_missing(self.reachable)
+
+    def get_report(self, apply_baseline=True):
+        """Materialize the report dicts (as the template and formats expect) from the compact store."""
+        with self.lock:
+            summaries = self.summaries.values()
+            report = {
+                "unused_imports": {s.path: s.unused_imports for s in summaries if s.unused_imports},
+                "unused_functions": list(self.function_defs.materialize(self.dead_functions, self.paths)),
+                "unused_classes": list(self.class_defs.materialize(self.dead_classes, self.paths)),
+                "unused_variables": {s.path: s.unused_vars for s in summaries if s.unused_vars},
+                "unreachable_code": {s.path: s.unreachable for s in summaries if s.unreachable},
+                # Not findings: files that were too large, didn't parse or ran out of time
+                "skipped_files": {s.path: s.skipped for s in summaries if s.skipped},
+            }
+        if self.only is not None:
+            # Keep every key (the template expects them), emptied unless requested
+            report = {key: value if key in self.only or key == "skipped_files" else type(value)()
+                      for key, value in report.items()}
+        if self.baseline is not None and apply_baseline:
+            report, known = self.baseline.filter_report(report)
+            report["baselined_findings"] = known
+        return report
@@ -0,0 +1,264 @@
+"""
+Content-addressed backup store used by CodeRemover.
+
+Every snapshot is named by the SHA-256 of its content, so identical
+snapshots are stored once. An append-only index maps each change id to the
+original file's full path and its snapshot, which makes finding a backup a
+single dictionary lookup.
+
+Removals usually change a few lines of a file that was snapshotted a moment
+earlier, so a snapshot is stored as a line delta against the previous
+snapshot of the same path when that is smaller. Delta chains are capped at
+MAX_CHAIN links, and every fresh full snapshot starts a new chain, so a
+restore reads a bounded number of objects. Only the newest `keep` changes
+are retained. Once the index grows a quarter past that, it is rewritten
+without the oldest entries, and objects nothing retained refers to are
+deleted.
+
+Deltas are read with marshal and checked before use, and every restored
+snapshot must hash to its name, so a tampered store fails loudly instead
+of writing bad content back. The index is checked too: entries without an
+id and path are skipped, and a restore only writes to paths under the
+project root.
+"""
+import difflib
+import hashlib
+import json
+import marshal
+import os
+import threading
+import uuid
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+INDEX_FILE_NAME = 'index.jsonl'
+# Deltas reference at most this many earlier snapshots before a full one is stored
+MAX_CHAIN = 16
+# Changes kept restorable; older ones are dropped when the index is compacted
+DEFAULT_KEEP = 1000
+
+
+class BackupStore:
+    """Deduplicated, compressed, delta-encoded snapshots keyed by change id."""
+
+    def __init__(self, store_dir, keep: int = DEFAULT_KEEP, root=None):
+        self.store_dir = Path(store_dir)
+        # Restores only write under here; the store normally lives in the project root
+        self.root = Path(root if root is not None else self.store_dir.parent).resolve()
+        self.objects_dir = self.store_dir / 'objects'
+        self.deltas_dir = self.store_dir / 'deltas'
+        self.index_path = self.store_dir / INDEX_FILE_NAME
+        self.keep = max(1, keep)
+        self.index: Dict[str, Dict] = {}
+        self.latest: Dict[str, Dict] = {}  # path -> its newest index entry, the next delta base
+        self.lock = threading.Lock()
+        self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Tolerate a torn final line
+                    if not (type(entry) is dict and type(entry.get('id')) is str
+                            and type(entry.get('path')) is str and type(entry.get('blob')) is str):
+                        continue  # Nor an entry that can't be restored
+                    self.index[entry['id']] = entry
+                    self.latest[entry['path']] = entry
+        except OSError:
+            pass
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest[2:]
+
+    def _delta_path(self, digest: str) -> Path:
+        return self.deltas_dir / digest[:2] / digest[2:]
+
+    def save(self, file_path, data: Optional[bytes] = None) -> str:
+        """Snapshot a file (or the given bytes of it) and return the new change id."""
+        path = Path(file_path).resolve()
+        if data is None:
+            data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+
+        with self.lock:
+            depth = self._store_object(str(path), digest, data)
+            entry = {
+                'id': uuid.uuid4().hex,
+                'path': str(path),
+                'blob': digest,
+                'depth': depth,
+                'created': datetime.now().isoformat(timespec='seconds'),
+            }
+            self.store_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + '\n')
+            self.index[entry['id']] = entry
+            self.latest[entry['path']] = entry
+            if len(self.index) > self.keep + self.keep // 4:
+                self._compact()
+        return entry['id']
+
+    def _store_object(self, path: str, digest: str, data: bytes) -> int:
+        """Write the snapshot unless it is already stored; return its delta chain depth."""
+        if self._blob_path(digest).exists():
+            return 0
+        if self._delta_path(digest).exists():
+            return self._chain_depth(digest)
+
+        base = self.latest.get(path)
+        full = zlib.compress(data, 6)
+        if base is not None and base.get('depth', 0) < MAX_CHAIN and base['blob'] != digest:
+            try:
+                base_data = self._read_object(base['blob'])
+            except (OSError, ValueError):
+                base_data = None  # Base lost or damaged: start a new chain
+            if base_data is not None:
+                delta = zlib.compress(marshal.dumps((base['blob'], _diff(base_data, data))), 6)
+                if len(delta) < len(full):
+                    _write_atomic(self._delta_path(digest), delta)
+                    return base.get('depth', 0) + 1
+        _write_atomic(self._blob_path(digest), full)
+        return 0
+
+    def _chain_depth(self, digest: str) -> int:
+        """Deltas between a stored snapshot and its full base; MAX_CHAIN if that can't be told."""
+        depth = 0
+        while not self._blob_path(digest).exists():
+            if depth >= MAX_CHAIN:
+                return MAX_CHAIN
+            try:
+                digest, _ = _load_delta(self._delta_path(digest).read_bytes())
+            except (OSError, ValueError):
+                return MAX_CHAIN
+            depth += 1
+        return depth
+
+    def get(self, change_id: str) -> Optional[Dict]:
+        return self.index.get(change_id)
+
+    def read(self, change_id: str) -> bytes:
+        """Return the snapshot content recorded for a change id."""
+        entry = self.index.get(change_id)
+        if entry is None:
+            raise KeyError(f'Unknown backup id: {change_id}')
+        return self._read_object(entry['blob'])
+
+    def _read_object(self, digest: str) -> bytes:
+        """Content of a full or delta snapshot, checked against its name."""
+        chain: List[list] = []
+        current = digest
+        while True:
+            try:
+                raw = self._blob_path(current).read_bytes()
+            except FileNotFoundError:
+                if len(chain) > MAX_CHAIN:
+                    raise ValueError(f'Backup {digest} has a delta chain longer than {MAX_CHAIN}')
+                current, ops = _load_delta(self._delta_path(current).read_bytes())
+                chain.append(ops)
+                continue
+            try:
+                data = zlib.decompress(raw)
+            except zlib.error as e:
+                raise ValueError(f'Backup {current} is corrupt: {e}')
+            break
+        for ops in reversed(chain):
+            data = _patch(data, ops)
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f'Backup {digest} is corrupt (content does not match its hash)')
+        return data
+
+    def restore(self, change_id: str) -> str:
+        """Write the snapshot back to its original path and return that path."""
+        data = self.read(change_id)
+        path = self.index[change_id]['path']
+        if self.root not in Path(path).resolve().parents:
+            raise ValueError(f'Backup {change_id} is for {path}, outside {self.root}')
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def _compact(self):
+        """Keep the newest `keep` changes; rewrite the index and delete unreferenced objects."""
+        entries = list(self.index.values())[-self.keep:]
+        tmp = self.index_path.with_name(INDEX_FILE_NAME + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + '\n')
+        os.replace(tmp, self.index_path)
+        self.index = {entry['id']: entry for entry in entries}
+        self.latest = {entry['path']: entry for entry in entries}
+        self._collect_garbage()
+
+    def _collect_garbage(self):
+        live: Set[str] = set()
+        for entry in self.index.values():
+            current = entry['blob']
+            while current not in live:
+                live.add(current)
+                delta = self._delta_path(current)
+                if self._blob_path(current).exists() or not delta.exists():
+                    break
+                try:
+                    current, _ = _load_delta(delta.read_bytes())
+                except (OSError, ValueError):
+                    break
+        for directory in (self.objects_dir, self.deltas_dir):
+            if not directory.is_dir():
+                continue
+            for prefix in directory.iterdir():
+                for obj in prefix.iterdir():
+                    if prefix.name + obj.name not in live:
+                        obj.unlink()
+
+
+def _write_atomic(path: Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _diff(old: bytes, new: bytes) -> list:
+    """Line delta turning old into new: (start, end) copies old lines, bytes are inserted."""
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append((i1, i2))
+        elif j1 < j2:
+            ops.append(b''.join(new_lines[j1:j2]))
+    return ops
+
+
+def _patch(old: bytes, ops: list) -> bytes:
+    old_lines = old.splitlines(keepends=True)
+    out = []
+    for op in ops:
+        if type(op) is bytes:
+            out.append(op)
+        else:
+            out.extend(old_lines[op[0]:op[1]])
+    return b''.join(out)
+
+
+def _load_delta(raw: bytes):
+    """(base digest, ops) from a stored delta; ValueError if it isn't one."""
+    try:
+        record = marshal.loads(zlib.decompress(raw))
+    except (zlib.error, EOFError, TypeError) as e:
+        raise ValueError(f'corrupt delta: {e}')
+    if not (type(record) is tuple and len(record) == 2 and type(record[0]) is str
+            and len(record[0]) == 64 and type(record[1]) is list
+            and all(type(op) is bytes
+                    or (type(op) is tuple and len(op) == 2
+                        and type(op[0]) is int and type(op[1]) is int)
+                    for op in record[1])):
+        raise ValueError('corrupt delta')
+    return record
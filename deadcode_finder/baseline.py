@@ -0,0 +1,154 @@
+"""
+Baseline of accepted findings, so a legacy tree only reports what is new.
+
+Each finding gets a fingerprint that survives unrelated edits: its type,
+file (relative to the baseline file), name, and the whitespace-normalized
+source line it points at, plus an occurrence number for findings that would
+otherwise collide (two identical `x = 1` lines after a return). Line numbers
+are not part of it, so code moving up or down keeps its fingerprint; editing
+the flagged line itself makes the finding new again.
+
+The baseline file is JSON. Entries carry their type, file and name next to
+the fingerprint so a baseline change can be reviewed; only the fingerprints
+are loaded, into a set.
+"""
+import hashlib
+import json
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from deadcode_finder.cache import fingerprint as stat_fingerprint
+from deadcode_finder.findings import Finding, iter_findings
+from deadcode_finder.utils import read_file
+
+BASELINE_VERSION = 1
+DEFAULT_BASELINE_NAME = '.deadcode-baseline.json'
+
+
+class BaselineError(ValueError):
+    """The baseline file exists but can't be used."""
+
+
+def finding_fingerprint(kind: str, file: str, name: str, code: str, occurrence: int) -> str:
+    key = '\0'.join((kind, file, name, code, str(occurrence)))
+    return hashlib.blake2b(key.encode('utf-8', 'surrogatepass'), digest_size=12).hexdigest()
+
+
+class Baseline:
+    """Fingerprints of accepted findings, anchored at the baseline file's directory."""
+
+    def __init__(self, path, fingerprints: Iterable[str] = ()):
+        self.path = Path(path)
+        self.anchor = os.path.abspath(self.path.parent)
+        self.fingerprints = frozenset(fingerprints)
+        # path -> ((size, mtime_ns), {line: normalized source}); only lines with findings are kept
+        self._lines: Dict[str, Tuple[Optional[Tuple[int, int]], Dict[int, str]]] = {}
+
+    @classmethod
+    def load(cls, path) -> 'Baseline':
+        """Read a baseline file; a missing file is an empty baseline."""
+        try:
+            with open(path, encoding='utf-8') as f:
+                document = json.load(f)
+        except FileNotFoundError:
+            return cls(path)
+        except (OSError, ValueError) as e:
+            raise BaselineError(f"can't read baseline {path}: {e}")
+        if not isinstance(document, dict) or document.get('version') != BASELINE_VERSION:
+            raise BaselineError(f"{path} is not a version {BASELINE_VERSION} baseline; "
+                                f"recreate it with `cli.py update-baseline`")
+        entries = document.get('findings', [])
+        if not isinstance(entries, list):
+            raise BaselineError(f"{path}: 'findings' must be a list")
+        for number, entry in enumerate(entries, 1):
+            if not isinstance(entry, dict) or not isinstance(entry.get('fingerprint'), str):
+                raise BaselineError(f"{path}: finding {number} has no fingerprint; "
+                                    f"recreate the baseline with `cli.py update-baseline`")
+        return cls(path, (entry['fingerprint'] for entry in entries))
+
+    def __len__(self):
+        return len(self.fingerprints)
+
+    def _relative(self, file: str) -> str:
+        return os.path.relpath(os.path.abspath(file), self.anchor).replace(os.sep, '/')
+
+    def _source_lines(self, file: str, lines) -> Dict[int, str]:
+        """Normalized text of the given lines of file, re-read only when the file changed."""
+        stamp = stat_fingerprint(file)
+        cached = self._lines.get(file)
+        if cached is None or cached[0] != stamp or not cached[1].keys() >= set(lines):
+            source = read_file(file).splitlines()
+            # Whitespace doesn't change what a line means for this purpose
+            texts = {line: ''.join(source[line - 1].split()) if 0 < line <= len(source) else ''
+                     for line in set(lines)}
+            if cached is not None and cached[0] == stamp:
+                texts.update(cached[1])
+            cached = self._lines[file] = (stamp, texts)
+        return cached[1]
+
+    def fingerprint_all(self, findings: Iterable[Finding]) -> Iterator[Tuple[Finding, str]]:
+        """(finding, fingerprint) for each finding.
+
+        Occurrence numbers count identical findings within one file in line
+        order, so pass every finding of a type in a file together.
+        """
+        by_file: Dict[str, List[Finding]] = {}
+        for finding in findings:
+            by_file.setdefault(finding[1], []).append(finding)
+        for file, group in by_file.items():
+            relative = self._relative(file)
+            texts = self._source_lines(file, [finding[2] for finding in group])
+            seen = Counter()
+            for finding in sorted(group, key=lambda f: (f[0], f[2], f[3])):
+                kind, _, line, name = finding
+                key = (kind, name, texts[line])
+                yield finding, finding_fingerprint(kind, relative, name, texts[line], seen[key])
+                seen[key] += 1
+
+    def new_findings(self, findings: Iterable[Finding]) -> List[Finding]:
+        """The findings not in the baseline."""
+        known = self.fingerprints
+        return [finding for finding, fp in self.fingerprint_all(findings) if fp not in known]
+
+    def filter_report(self, report: Dict) -> Tuple[Dict, int]:
+        """A copy of a get_report() dict without baselined findings, and how many were dropped."""
+        findings = list(iter_findings(report))
+        if not self.fingerprints or not findings:
+            return report, 0
+        kept = set(self.new_findings(findings))
+        if len(kept) == len(findings):
+            return report, 0
+
+        def keep_per_file(key, kind, as_finding):
+            kept_files = {}
+            for file, items in report[key].items():
+                items = [item for item in items if (kind, file) + as_finding(item) in kept]
+                if items:
+                    kept_files[file] = items
+            return kept_files
+
+        filtered = dict(report)
+        filtered["unused_imports"] = keep_per_file("unused_imports", "import",
+                                                   lambda item: (item[1], item[0]))
+        filtered["unused_variables"] = keep_per_file("unused_variables", "variable", tuple)
+        filtered["unreachable_code"] = keep_per_file("unreachable_code", "unreachable", tuple)
+        for key, kind in (("unused_functions", "function"), ("unused_classes", "class")):
+            filtered[key] = [(file, line, name) for file, line, name in report[key]
+                             if (kind, file, line, name) in kept]
+        return filtered, len(findings) - len(kept)
+
+    def write(self, findings: Iterable[Finding]) -> 'Baseline':
+        """Replace the baseline file with these findings and return the new baseline."""
+        entries = sorted(({'file': self._relative(file), 'type': kind, 'name': name, 'fingerprint': fp}
+                          for (kind, file, _, name), fp in self.fingerprint_all(findings)),
+                         key=lambda e: (e['file'], e['type'], e['name'], e['fingerprint']))
+        document = {'version': BASELINE_VERSION, 'count': len(entries), 'findings': entries}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=1)
+            f.write('\n')
+        os.replace(tmp_file, self.path)
+        return Baseline(self.path, (entry['fingerprint'] for entry in entries))
@@ -0,0 +1,163 @@
+"""
+Persistent per-file analysis cache.
+
+Stores each file's FileSummary under `.deadcode_cache/` keyed by path, with
+size + mtime as the fast check and a content hash as the fallback when only
+the mtime moved (checkouts, touch, copies). Entries depend on the ingestion
+limits too (a file over the size limit is summarized differently), so a
+cache written under other limits is discarded.
+
+The file is marshal data, never pickle: it sits in the scanned tree, where a
+checkout can put any file it likes, and loading a pickle runs code. Each
+summary is checked field by field on load (FileSummary.from_record), and a
+cache with anything out of shape is dropped whole.
+"""
+import hashlib
+import marshal
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from deadcode_finder.ingest import DEFAULT_LIMITS, Limits, open_source
+
+# Bump whenever FileSummary or the traversal output changes shape or meaning.
+CACHE_VERSION = 10
+CACHE_DIR_NAME = '.deadcode_cache'
+CACHE_FILE_NAME = 'summaries.marshal'
+
+
+def content_digest(data) -> str:
+    """Hash of the raw source bytes, used when a file's mtime moved but its size didn't."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def fingerprint(path) -> Optional[Tuple[int, int]]:
+    """Return (size, mtime_ns) for path, or None if it cannot be stat'ed."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+class AnalysisCache:
+    """On-disk map of file path -> (size, mtime_ns, digest, FileSummary)."""
+
+    def __init__(self, root_path: str, cache_dir: Optional[str] = None,
+                 limits: Limits = DEFAULT_LIMITS):
+        self.limits = tuple(limits)
+        self.cache_dir = self.default_dir(root_path, cache_dir)
+        self.cache_file = self.cache_dir / CACHE_FILE_NAME
+        self.entries: Dict[str, tuple] = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self.load()
+
+    @staticmethod
+    def default_dir(root_path: str, cache_dir: Optional[str] = None) -> Path:
+        """Where the cache (and the files kept beside it) live for a scanned root."""
+        return Path(cache_dir) if cache_dir else Path(root_path) / CACHE_DIR_NAME
+
+    def load(self):
+        """Load entries from disk, discarding the cache if it is unreadable, stale or malformed."""
+        try:
+            with open(self.cache_file, 'rb') as f:
+                payload = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return
+        if (type(payload) is not dict or payload.get('version') != CACHE_VERSION
+                or payload.get('limits') != self.limits):
+            self._dirty = True
+            return
+        try:
+            self.entries = _decode_entries(payload.get('entries'))
+        except ValueError:
+            self._dirty = True
+
+    def save(self):
+        """Write the cache atomically if anything changed since it was loaded."""
+        if not self._dirty:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.cache_file.with_suffix('.tmp')
+        with open(tmp_file, 'wb') as f:
+            marshal.dump({'version': CACHE_VERSION, 'limits': self.limits,
+                          'entries': {key: (size, mtime_ns, digest, summary.to_record())
+                                      for key, (size, mtime_ns, digest, summary)
+                                      in self.entries.items()}}, f)
+        os.replace(tmp_file, self.cache_file)
+        self._dirty = False
+
+    def get(self, path, fp):
+        """Return the cached summary for path if it is still fresh, else None."""
+        key = str(path)
+        entry = self.entries.get(key)
+        if entry is None or fp is None:
+            self.misses += 1
+            return None
+
+        size, mtime_ns, digest, summary = entry
+        if (size, mtime_ns) == fp:
+            self.hits += 1
+            return summary
+
+        # Same size but new mtime: fall back to comparing content hashes
+        if size == fp[0]:
+            try:
+                with open_source(key) as data:
+                    same = content_digest(data) == digest
+            except OSError:
+                same = False
+            if same:
+                self.entries[key] = (size, fp[1], digest, summary)
+                self._dirty = True
+                self.hits += 1
+                return summary
+
+        self.misses += 1
+        return None
+
+    def put(self, path, fp, summary):
+        """Record a freshly computed summary under the fingerprint taken before reading."""
+        if fp is None or summary is None:
+            return
+        self.entries[str(path)] = (fp[0], fp[1], summary.digest, summary)
+        self._dirty = True
+
+    def knows(self, path) -> bool:
+        return str(path) in self.entries
+
+    def seed(self, path, size: int, digest: str, summary):
+        """Offer a summary from elsewhere (scan history); get() reuses it only if the content hash matches."""
+        # No real mtime is known, so get() always takes the content-hash path for it
+        self.entries[str(path)] = (size, -1, digest, summary)
+        self._dirty = True
+
+    def prune(self, live_paths: Iterable):
+        """Evict entries for files that no longer exist in the scanned tree."""
+        live = {str(p) for p in live_paths}
+        stale = [key for key in self.entries if key not in live]
+        for key in stale:
+            del self.entries[key]
+        if stale:
+            self._dirty = True
+        return len(stale)
+
+
+def _decode_entries(entries) -> Dict[str, tuple]:
+    """Marshalled {path: (size, mtime_ns, digest, record)} -> entries; ValueError if malformed."""
+    from deadcode_finder.analyzer import FileSummary
+
+    if type(entries) is not dict:
+        raise ValueError("cache entries are not a dict")
+    decoded = {}
+    for key, entry in entries.items():
+        if (type(key) is not str or type(entry) is not tuple or len(entry) != 4
+                or type(entry[0]) is not int or type(entry[1]) is not int
+                or type(entry[2]) is not str):
+            raise ValueError("malformed cache entry")
+        summary = FileSummary.from_record(entry[3])
+        summary.intern_names()
+        decoded[key] = entry[:3] + (summary,)
+    return decoded
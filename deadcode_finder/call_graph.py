@@ -1,9 +1,321 @@
+"""
+Reference graph and reachability for dead function/class detection.
+
+Nodes are qualified definitions (pkg.mod.Class.method), interned to integer
+ids, and edges are stored in CSR form (an offsets array indexing into one
+flat targets array), so the graph costs a few bytes per edge and a
+reachability pass is a single linear worklist walk.
+
+Scopes decides which definitions a load can mean. A name loaded in module M
+is the key (M, name): M's own defs of that name, and whatever M imports
+under it, following re-exports and star imports. An attribute load
+(`obj.name`, kept as '.name' in the sites) can't be resolved and is the key
+('*', name), every def of that name; so is a key whose module is outside the
+scan. A live `helper` in one module therefore no longer keeps a `helper`
+defined in another alive unless something imports it from there.
+"""
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Tuple
+
+MAGIC_METHODS = {'__init__', '__str__', '__repr__', '__eq__', '__hash__',
+                 '__lt__', '__le__', '__gt__', '__ge__', '__len__', '__getitem__',
+                 '__setitem__', '__delitem__', '__iter__', '__next__', '__contains__',
+                 '__enter__', '__exit__', '__call__', '__new__', '__del__'}
+
+# Module of the keys attribute loads resolve through: never a scanned module
+ANY_MODULE = '*'
+
+# Per-file entry: (module, function_defs, class_defs, roots, sites, imports)
+#   module: dotted module name relative to the scanned root
+#   function_defs/class_defs: ((name, line, qualified name in module), ...)
+#   roots: names used at module level, entry points and decorated defs
+#   sites: {qualified def name or '' for module level: ((names), (line of first use of each))}
+#   imports: ((bound name or '*', absolute source module, imported name or '*'), ...)
+FileRefs = Tuple[str, tuple, tuple, tuple, Dict[str, tuple], tuple]
+Key = Tuple[str, str]
+
+# 32-bit signed ids: enough for two billion symbols at 4 bytes per slot
+_ID = 'i'
+
+
+class SymbolTable:
+    """Interns symbol names to dense integer ids."""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+
+    def intern(self, name: str) -> int:
+        sid = self.ids.get(name)
+        if sid is None:
+            sid = len(self.names)
+            self.ids[name] = sid
+            self.names.append(name)
+        return sid
+
+    def get(self, name: str, default=None):
+        return self.ids.get(name, default)
+
+    def __len__(self):
+        return len(self.names)
+
+
+class CallGraph:
+    """Immutable CSR adjacency: successors of v are targets[offsets[v]:offsets[v + 1]]."""
+
+    def __init__(self, symbols: SymbolTable, offsets: array, targets: array, roots: array):
+        self.symbols = symbols
+        self.offsets = offsets
+        self.targets = targets
+        self.roots = roots
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    def successors(self, name: str) -> List[str]:
+        sid = self.symbols.get(name)
+        if sid is None:
+            return []
+        names = self.symbols.names
+        return [names[t] for t in self.targets[self.offsets[sid]:self.offsets[sid + 1]]]
+
+    def reachable_ids(self) -> bytearray:
+        """Mark every symbol reachable from the roots; O(symbols + edges)."""
+        offsets = self.offsets
+        targets = self.targets
+        seen = bytearray(len(self.symbols))
+        stack = []
+        for root in self.roots:
+            if not seen[root]:
+                seen[root] = 1
+                stack.append(root)
+        while stack:
+            v = stack.pop()
+            for w in targets[offsets[v]:offsets[v + 1]]:
+                if not seen[w]:
+                    seen[w] = 1
+                    stack.append(w)
+        return seen
+
+    def reachable(self) -> Set[str]:
+        names = self.symbols.names
+        seen = self.reachable_ids()
+        return {names[i] for i in range(len(names)) if seen[i]}
+
+
+def qualify(module: str, qual: str) -> str:
+    """Join a module name and an in-module qualified name."""
+    return f"{module}.{qual}" if module else qual
+
+
+def load_key(module: str, name: str) -> Key:
+    """Key of a name loaded in module: '.attr' for an attribute, else a bare name."""
+    if name[0] == '.':
+        return ANY_MODULE, name[1:]
+    return module, name
+
+
+def file_refs(summary, module: str) -> FileRefs:
+    """What the reference graph needs from one FileSummary."""
+    roots = set(summary.module_refs)
+    roots.update(summary.entry_points)
+    roots.update(summary.decorated_functions)
+    package = module if Path(summary.path).stem == '__init__' else module.rpartition('.')[0]
+    imports = []
+    for bound, source, name, level in summary.imports:
+        if level:
+            # `from ..b import x` in pkg.sub.mod: up level - 1 packages from pkg.sub
+            base = package.split('.') if package else []
+            base = base[:len(base) - (level - 1)] if level - 1 <= len(base) else []
+            source = '.'.join(base + ([source] if source else []))
+        imports.append((bound, source, name))
+    return (module, tuple(summary.function_defs), tuple(summary.class_defs), tuple(roots),
+            dict(summary.sites), tuple(imports))
+
+
+class Scopes:
+    """Per module: its defs by bare name, its from-imports and star imports; resolves keys.
+
+    Modules are set and dropped whole (set_module), so a tree can be kept up
+    to date as files change.
+    """
+
+    def __init__(self):
+        self.defs: Dict[str, Dict[str, Set[str]]] = {}  # module -> bare name -> qualified defs
+        self.by_name: Dict[str, Set[str]] = {}  # bare name -> qualified defs, in any module
+        # module -> bound name -> the (module, name) pairs imported under it
+        self.aliases: Dict[str, Dict[str, Set[Key]]] = {}
+        self.importers: Dict[Key, Set[Key]] = {}  # the reverse of aliases
+        self.sources: Dict[str, Set[str]] = {}  # imported name -> modules it is imported from
+        self.stars: Dict[str, Set[str]] = {}  # module -> modules it star-imports
+        self.star_importers: Dict[str, Set[str]] = {}
+        self._targets: Dict[Key, Tuple[str, ...]] = {}
+
+    @classmethod
+    def from_files(cls, files: Iterable[FileRefs]) -> 'Scopes':
+        by_module: Dict[str, List[FileRefs]] = {}
+        for refs in files:
+            by_module.setdefault(refs[0], []).append(refs)
+        scopes = cls()
+        for module, entries in by_module.items():
+            scopes.set_module(module, entries)
+        return scopes
+
+    def set_module(self, module: str, files: List[FileRefs]):
+        """Replace what is known about module with the entries of its files (none: drop it)."""
+        self._targets.clear()
+        for name, quals in self.defs.pop(module, {}).items():
+            known = self.by_name[name]
+            known -= quals
+            if not known:
+                del self.by_name[name]
+        for source in self.stars.pop(module, ()):
+            _discard(self.star_importers, source, module)
+        for bound, sources in self.aliases.pop(module, {}).items():
+            for source in sources:
+                if _discard(self.importers, source, (module, bound)):
+                    _discard(self.sources, source[1], source[0])
+        if not files:
+            return
+
+        defs = self.defs[module] = {}
+        aliases = self.aliases[module] = {}
+        for refs in files:
+            for name, _, qual in refs[1] + refs[2]:
+                qual = qualify(module, qual)
+                defs.setdefault(name, set()).add(qual)
+                self.by_name.setdefault(name, set()).add(qual)
+            for bound, source, name in refs[5]:
+                if bound == '*':
+                    self.stars.setdefault(module, set()).add(source)
+                    self.star_importers.setdefault(source, set()).add(module)
+                else:
+                    aliases.setdefault(bound, set()).add((source, name))
+                    self.importers.setdefault((source, name), set()).add((module, bound))
+                    self.sources.setdefault(name, set()).add(source)
+
+    def targets(self, key: Key) -> Tuple[str, ...]:
+        """Qualified defs a load with this key can mean."""
+        found = self._targets.get(key)
+        if found is not None:
+            return found
+        result: Set[str] = set()
+        seen = {key}
+        stack = [key]
+        while stack:
+            module, name = stack.pop()
+            defs = self.defs.get(module)
+            if defs is None:
+                result.update(self.by_name.get(name, ()))
+                continue
+            result.update(defs.get(name, ()))
+            for source in self.aliases[module].get(name, ()):
+                if source not in seen:
+                    seen.add(source)
+                    stack.append(source)
+            for star in self.stars.get(module, ()):
+                if (star, name) not in seen:
+                    seen.add((star, name))
+                    stack.append((star, name))
+        found = self._targets[key] = tuple(sorted(result))
+        return found
+
+    def keys_reaching(self, module: str, name: str) -> Set[Key]:
+        """Every key whose targets() include a def called name in module; targets() reversed."""
+        # Where resolution can end at such a def: the module itself, or any def of that name
+        seeds = [(module, name), (ANY_MODULE, name)]
+        seeds += [(source, name) for source in self.sources.get(name, ()) if source not in self.defs]
+        seeds += [(source, name) for source in self.star_importers if source not in self.defs]
+        keys: Set[Key] = set()
+        stack = seeds
+        while stack:
+            key = stack.pop()
+            if key in keys:
+                continue
+            keys.add(key)
+            stack.extend(self.importers.get(key, ()))
+            stack.extend((importer, key[1]) for importer in self.star_importers.get(key[0], ()))
+        return keys
+
+    def magic_methods(self) -> Iterable[str]:
+        for name in MAGIC_METHODS:
+            yield from self.by_name.get(name, ())
+
+
+def _discard(table: Dict, key, value) -> bool:
+    """Remove value from the set at table[key], dropping the key once empty; True if it emptied."""
+    values = table.get(key)
+    if values is None:
+        return False
+    values.discard(value)
+    if values:
+        return False
+    del table[key]
+    return True
+
+
+def build_reference_graph(files: Iterable[FileRefs]) -> CallGraph:
+    """Graph over every def, rooted at module-level code, entry points, decorated defs and magic methods."""
+    files = list(files)
+    scopes = Scopes.from_files(files)
+    targets = scopes.targets
+    builder = CallGraphBuilder()
+    for module, _, _, roots, sites, _ in files:
+        for name in roots:
+            builder.add_roots(targets(load_key(module, name)))
+        for owner, (names, _) in sites.items():
+            if owner:
+                caller = qualify(module, owner)
+                builder.add_calls(caller, [target for name in names
+                                           for target in targets(load_key(module, name))
+                                           if target != caller])
+    builder.add_roots(scopes.magic_methods())
+    return builder.build()
+
+
 class CallGraphBuilder:
+    """Accumulates caller -> callee edges and roots, then freezes them into a CallGraph."""
+
     def __init__(self):
-        self.graph = {}
+        self.symbols = SymbolTable()
+        self._src = array(_ID)
+        self._dst = array(_ID)
+        self._roots = array(_ID)
+
+    def add_call(self, caller: str, callee: str):
+        self._src.append(self.symbols.intern(caller))
+        self._dst.append(self.symbols.intern(callee))
+
+    def add_calls(self, caller: str, callees: Iterable[str]):
+        src = self.symbols.intern(caller)
+        for callee in callees:
+            self._src.append(src)
+            self._dst.append(self.symbols.intern(callee))
+
+    def add_roots(self, names: Iterable[str]):
+        for name in names:
+            self._roots.append(self.symbols.intern(name))
+
+    def build(self) -> CallGraph:
+        """Counting-sort the edge list into CSR form and release the build buffers."""
+        n = len(self.symbols)
+        src, dst = self._src, self._dst
+
+        offsets = array(_ID, [0]) * (n + 1)
+        for s in src:
+            offsets[s + 1] += 1
+        for i in range(n):
+            offsets[i + 1] += offsets[i]
 
-    def add_call(self, caller, callee):
-        self.graph.setdefault(caller, set()).add(callee)
+        targets = array(_ID, [0]) * len(src)
+        cursor = array(_ID, offsets[:n])
+        for s, d in zip(src, dst):
+            targets[cursor[s]] = d
+            cursor[s] += 1
 
-    def get_unused(self, all_funcs):
-        return [fn for fn in all_funcs if fn not in self.graph]
+        graph = CallGraph(self.symbols, offsets, targets, self._roots)
+        self._src = array(_ID)
+        self._dst = array(_ID)
+        return graph
@@ -0,0 +1,859 @@
+"""
+Control-flow graphs for one body of code (a function, a class body or a module).
+
+build_cfg() makes one pass over the body's statements and produces basic
+blocks: each holds the statements (and compound-statement headers) that run
+in sequence, plus its successor blocks. Nested functions and classes are
+single statements here; they get graphs of their own. Building is linear in
+the number of statements.
+
+Two analyses run on a graph:
+
+- unreachable(): statements no path from the entry reaches. Causes include
+  code after return/raise/continue/break, branches whose condition is a
+  constant (`if False:`, `while True:` without a break), and code after
+  compound statements whose every branch exits. Only the first statement of
+  each dead stretch is reported.
+- dead_stores(): assignments to a local name whose value no path reads
+  before the name is assigned again or the function ends. This is
+  backward liveness over the blocks, with names as bits of an int.
+  structured_dead_stores() gives the same answer straight from the
+  statements when the only control flow is if, for and while.
+
+Exceptions are modelled coarsely. Inside a try (or with) body every
+statement may jump to the handlers (or past the with), both before and
+after it runs. A raise goes to the innermost handler, else to the exit.
+Both analyses err on the side of reporting less.
+"""
+import ast
+from typing import Dict, List, Optional, Tuple
+
+# Fields that never hold child nodes worth visiting (identifiers, flags,
+# expression contexts and operators)
+LEAF_FIELDS = frozenset(('ctx', 'op', 'ops', 'id', 'attr', 'arg', 'name', 'names', 'module',
+                         'level', 'asname', 'type_comment', 'kind', 'conversion', 'is_async',
+                         'simple', 'kwd_attrs', 'rest', 'tag', 'type_ignores'))
+_TERMINATORS = {ast.Return: 'return', ast.Raise: 'raise',
+                ast.Continue: 'continue', ast.Break: 'break'}
+_LOOPS = (ast.For, ast.AsyncFor, ast.While)
+# Statements with bodies of their own (nested scopes aside)
+_COMPOUND = frozenset(cls for cls in (ast.If, ast.For, ast.AsyncFor, ast.While, ast.With,
+                                      ast.AsyncWith, ast.Try, getattr(ast, 'TryStar', None),
+                                      ast.Match) if cls is not None)
+_SCOPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)
+# Calls that read locals by name, so no store in the function can be called dead
+_INTROSPECTION = frozenset(('locals', 'vars', 'eval', 'exec', 'dir'))
+
+
+def _constant_truth(test) -> Optional[bool]:
+    """True/False for a constant condition (`while True`, `if 0`), None otherwise."""
+    if type(test) is ast.Constant:
+        return bool(test.value)
+    return None
+
+
+class _Finally:
+    """A finally clause being built: its entry block and where jumps through it continue."""
+    __slots__ = ('entry', 'targets')
+
+    def __init__(self, entry: int):
+        self.entry = entry
+        self.targets = set()
+
+
+class CFG:
+    """Basic blocks of one body. Block 0 is the entry, block 1 the exit."""
+
+    def __init__(self):
+        self.items: List[list] = []  # per block: statements, headers, handlers and match cases
+        self.succ: List[list] = []  # per block: successor block ids
+        self.block_of: Dict[int, int] = {}  # id(statement) -> its block
+        self._reachable = None
+
+    def new_block(self) -> int:
+        self.items.append([])
+        self.succ.append([])
+        return len(self.items) - 1
+
+    def reachable(self) -> bytearray:
+        """Per block: 1 if a path from the entry reaches it."""
+        if self._reachable is None:
+            seen = bytearray(len(self.items))
+            seen[0] = 1
+            stack = [0]
+            succ = self.succ
+            while stack:
+                for nxt in succ[stack.pop()]:
+                    if not seen[nxt]:
+                        seen[nxt] = 1
+                        stack.append(nxt)
+            self._reachable = seen
+        return self._reachable
+
+
+class _Builder:
+    def __init__(self):
+        self.cfg = CFG()
+        self.entry = self.cfg.new_block()
+        self.exit = self.cfg.new_block()
+        self.loops: List[Tuple[int, int, int]] = []  # (continue target, break target, finally depth)
+        self.raise_targets: List[int] = []  # innermost last; empty = the exit
+        self.finallies: List[_Finally] = []
+
+    def edge(self, src: int, dst: int):
+        self.cfg.succ[src].append(dst)
+
+    def place(self, block: int, item):
+        self.cfg.items[block].append(item)
+        self.cfg.block_of[id(item)] = block
+
+    def jump(self, block: int, target: int, depth: int):
+        """Edge to target, through any finally clauses entered since depth."""
+        if len(self.finallies) > depth:
+            self.edge(block, self.finallies[-1].entry)
+            for clause in self.finallies[depth:]:
+                clause.targets.add(target)
+        else:
+            self.edge(block, target)
+
+    def sequence(self, stmts, block: Optional[int]) -> Optional[int]:
+        """Add stmts starting in block (None: nothing reaches them); return where flow continues."""
+        for stmt in stmts:
+            if block is None:
+                block = self.cfg.new_block()  # No predecessors: dead code
+            if self.raise_targets:
+                # The statement may raise before or after it runs
+                target = self.raise_targets[-1]
+                start = self.cfg.new_block()
+                self.edge(block, start)
+                self.edge(block, target)
+                block = self.statement(stmt, start)
+                if block == start:
+                    self.edge(block, target)
+            else:
+                block = self.statement(stmt, block)
+        return block
+
+    def statement(self, stmt, block: int) -> Optional[int]:
+        cls = type(stmt)
+        new_block = self.cfg.new_block
+        if cls in _TERMINATORS:
+            self.place(block, stmt)
+            if cls is ast.Return:
+                self.jump(block, self.exit, 0)
+            elif cls is ast.Raise:
+                self.edge(block, self.raise_targets[-1] if self.raise_targets else self.exit)
+            elif self.loops:
+                cont, brk, depth = self.loops[-1]
+                self.jump(block, cont if cls is ast.Continue else brk, depth)
+            return None
+
+        if cls is ast.If:
+            self.place(block, stmt)
+            truth = _constant_truth(stmt.test)
+            body = new_block()
+            if truth is not False:
+                self.edge(block, body)
+            body_end = self.sequence(stmt.body, body)
+            if not stmt.orelse:
+                # No block for a missing else: the test falls straight through to the join
+                return self._join(body_end, block if truth is not True else None)
+            orelse = new_block()
+            if truth is not True:
+                self.edge(block, orelse)
+            else_end = self.sequence(stmt.orelse, orelse)
+            return self._join(body_end, else_end)
+
+        if cls in _LOOPS:
+            head = new_block()
+            self.edge(block, head)
+            self.place(head, stmt)
+            truth = _constant_truth(stmt.test) if cls is ast.While else None
+            after = new_block()
+            body = new_block()
+            if truth is not False:
+                self.edge(head, body)
+            if cls is not ast.While:
+                # Only an iteration binds the target; leaving the loop keeps the old value
+                self.place(body, stmt.target)
+            self.loops.append((head, after, len(self.finallies)))
+            body_end = self.sequence(stmt.body, body)
+            self.loops.pop()
+            if body_end is not None:
+                self.edge(body_end, head)
+            if not stmt.orelse:
+                if truth is not True:
+                    self.edge(head, after)
+                return after
+            orelse = new_block()
+            if truth is not True:
+                self.edge(head, orelse)
+            else_end = self.sequence(stmt.orelse, orelse)
+            if else_end is not None:
+                self.edge(else_end, after)
+            return after
+
+        if cls is ast.With or cls is ast.AsyncWith:
+            self.place(block, stmt)
+            # The context manager may swallow an exception and carry on after the block
+            after = new_block()
+            body = new_block()
+            self.edge(block, body)
+            self.raise_targets.append(after)
+            body_end = self.sequence(stmt.body, body)
+            self.raise_targets.pop()
+            if body_end is not None:
+                self.edge(body_end, after)
+            return after
+
+        if cls is ast.Try or cls is getattr(ast, 'TryStar', None):
+            return self._try(stmt, block)
+
+        if cls is ast.Match:
+            self.place(block, stmt)
+            after = new_block()
+            exhaustive = False
+            for case in stmt.cases:
+                start = new_block()
+                self.edge(block, start)
+                self.place(start, case)
+                end = self.sequence(case.body, start)
+                if end is not None:
+                    self.edge(end, after)
+                pattern = case.pattern
+                if case.guard is None and type(pattern) is ast.MatchAs and pattern.pattern is None:
+                    exhaustive = True  # `case _:` or `case name:`
+            if not exhaustive:
+                self.edge(block, after)
+            return after
+
+        # Simple statements, and nested defs and classes (their bodies are separate graphs)
+        self.place(block, stmt)
+        return block
+
+    def _join(self, *ends) -> Optional[int]:
+        ends = [end for end in ends if end is not None]
+        if not ends:
+            return None
+        join = self.cfg.new_block()
+        for end in ends:
+            self.edge(end, join)
+        return join
+
+    def _try(self, stmt, block: int) -> Optional[int]:
+        new_block = self.cfg.new_block
+        self.place(block, stmt)
+        outer = self.raise_targets[-1] if self.raise_targets else self.exit
+        clause = _Finally(new_block()) if stmt.finalbody else None
+        if clause is not None:
+            self.finallies.append(clause)
+        propagate = clause.entry if clause is not None else outer
+
+        if stmt.handlers:
+            dispatch = new_block()
+            for handler in stmt.handlers:
+                start = new_block()
+                self.edge(dispatch, start)
+                self.place(start, handler)
+            if not any(handler.type is None for handler in stmt.handlers):
+                self.edge(dispatch, propagate)  # No handler matched
+        else:
+            dispatch = propagate
+
+        body = new_block()
+        self.edge(block, body)
+        self.raise_targets.append(dispatch)
+        body_end = self.sequence(stmt.body, body)
+        self.raise_targets.pop()
+        # Exceptions raised in the else clause or a handler go to the finally clause, or outwards
+        if clause is not None:
+            self.raise_targets.append(propagate)
+        ends = [self.sequence(stmt.orelse, body_end)]
+        for handler in stmt.handlers:
+            ends.append(self.sequence(handler.body, self.cfg.block_of[id(handler)]))
+        if clause is not None:
+            self.raise_targets.pop()
+        ends = [end for end in ends if end is not None]
+
+        if clause is None:
+            return self._join(*ends)
+        self.finallies.pop()
+        for end in ends:
+            self.edge(end, clause.entry)
+        final_end = self.sequence(stmt.finalbody, clause.entry)
+        if final_end is None:
+            return None
+        # After the finally clause: the next statement, the exception carrying on
+        # outwards, or wherever a return/break/continue through it was going
+        self.edge(final_end, outer)
+        for target in clause.targets:
+            self.jump(final_end, target, len(self.finallies))
+        if not ends:
+            return None
+        after = new_block()
+        self.edge(final_end, after)
+        return after
+
+
+def build_cfg(node) -> CFG:
+    """Graph of a Module's, FunctionDef's, AsyncFunctionDef's or ClassDef's body."""
+    builder = _Builder()
+    end = builder.sequence(node.body, builder.entry)
+    if end is not None:
+        builder.edge(end, builder.exit)
+    return builder.cfg
+
+
+# -- unreachable code -------------------------------------------------------
+
+def _branches(stmt):
+    """(statement list, why its first statement would be dead) for each body under stmt."""
+    cls = type(stmt)
+    if cls is ast.If or cls is ast.While:
+        truth = _constant_truth(stmt.test)
+        yield stmt.body, "condition is always false" if truth is False else None
+        yield stmt.orelse, "condition is always true" if truth is True else None
+    elif cls is ast.For or cls is ast.AsyncFor:
+        yield stmt.body, None
+        yield stmt.orelse, None
+    elif cls is ast.With or cls is ast.AsyncWith:
+        yield stmt.body, None
+    elif cls is ast.Try or cls is getattr(ast, 'TryStar', None):
+        yield stmt.body, None
+        yield stmt.orelse, "else of a try whose body always exits"
+        for handler in stmt.handlers:
+            yield handler.body, None
+        yield stmt.finalbody, None
+    elif cls is ast.Match:
+        for case in stmt.cases:
+            yield case.body, None
+
+
+_COMPOUND_LABELS = {ast.If: 'an if', ast.For: 'a for', ast.AsyncFor: 'an async for',
+                    ast.While: 'a while', ast.With: 'a with', ast.AsyncWith: 'an async with',
+                    ast.Try: 'a try', ast.Match: 'a match'}
+
+
+def _is_yield(stmt) -> bool:
+    return type(stmt) is ast.Expr and type(stmt.value) in (ast.Yield, ast.YieldFrom)
+
+
+def _reason_after(stmt) -> str:
+    keyword = _TERMINATORS.get(type(stmt))
+    if keyword is not None:
+        return f"code after {keyword}"
+    if type(stmt) is ast.While and _constant_truth(stmt.test):
+        return "code after an infinite loop"
+    label = _COMPOUND_LABELS.get(type(stmt), 'a try')
+    return f"code after {label} statement that never completes"
+
+
+def unreachable(cfg: CFG, body) -> List[Tuple[int, str]]:
+    """(line, reason) for the first statement of each stretch of dead code in body."""
+    reachable = cfg.reachable()
+    block_of = cfg.block_of
+    found = []
+    pending = [(body, None)]
+    while pending:
+        stmts, first_reason = pending.pop()
+        previous = None
+        for stmt in stmts:
+            if not reachable[block_of[id(stmt)]]:
+                if previous is None:
+                    if first_reason is not None and not _is_yield(stmt):
+                        found.append((stmt.lineno, first_reason))
+                # A dead `yield` (after return, under `while False`) only makes the function a generator
+                elif not _is_yield(stmt):
+                    found.append((stmt.lineno, _reason_after(previous)))
+                break
+            if not isinstance(stmt, _SCOPES):
+                pending.extend(_branches(stmt))
+            previous = stmt
+    found.sort()
+    return found
+
+
+def may_be_unreachable(body) -> bool:
+    """False if unreachable() can't find anything in body; decided without building a graph.
+
+    Nearly every body is dead-code free, so the traversal asks this first
+    and builds the graph only when the answer is True.
+    """
+    return _completes(body) is None
+
+
+def _completes(stmts) -> Optional[bool]:
+    """Whether control surely reaches the end of stmts; None if some statement may be dead.
+
+    Dead code needs a constant condition, a try else after a body that may
+    exit, or a statement after one that may not complete. False and None
+    are conservative: they only ever cost building a graph that finds nothing.
+    """
+    completes = True
+    for stmt in stmts:
+        if not completes:
+            return None  # Follows a statement that may not complete
+        cls = type(stmt)
+        if cls in _TERMINATORS:
+            completes = False
+        elif cls not in _COMPOUND:
+            continue
+        elif cls is ast.If or cls is ast.While:
+            if _constant_truth(stmt.test) is not None:
+                return None
+            body, orelse = _completes(stmt.body), _completes(stmt.orelse)
+            if body is None or orelse is None:
+                return None
+            # A loop exits through its else (or a break, which this ignores)
+            completes = (body or orelse) if cls is ast.If else orelse
+        elif cls is ast.For or cls is ast.AsyncFor:
+            body, orelse = _completes(stmt.body), _completes(stmt.orelse)
+            if body is None or orelse is None:
+                return None
+            completes = orelse
+        elif cls is ast.With or cls is ast.AsyncWith:
+            # The context manager may swallow an exception and carry on after the block
+            if _completes(stmt.body) is None:
+                return None
+        elif cls is ast.Try or cls is getattr(ast, 'TryStar', None):
+            body, orelse = _completes(stmt.body), _completes(stmt.orelse)
+            handlers = [_completes(handler.body) for handler in stmt.handlers]
+            final = _completes(stmt.finalbody)
+            if body is None or orelse is None or final is None or None in handlers:
+                return None
+            if stmt.orelse and not body:
+                return None
+            completes = ((body and orelse) or any(handlers)) and final
+        elif cls is ast.Match:
+            cases = [_completes(case.body) for case in stmt.cases]
+            if None in cases:
+                return None
+            completes = any(cases)
+    return completes
+
+
+# -- dead stores ----------------------------------------------------------------
+
+def _header(item) -> list:
+    """The parts of an item that run where it sits in the graph (not nested bodies)."""
+    cls = type(item)
+    if cls is ast.If or cls is ast.While:
+        return [item.test]
+    if cls is ast.For or cls is ast.AsyncFor:
+        # The target is bound at the start of the body (see _Builder.statement)
+        return [item.iter]
+    if cls is ast.With or cls is ast.AsyncWith:
+        return list(item.items)
+    if cls is ast.Match:
+        return [item.subject]
+    if cls is ast.match_case:
+        return [item.pattern, item.guard]
+    if cls is ast.ExceptHandler:
+        return [item.type]
+    if cls is ast.Try or cls is getattr(ast, 'TryStar', None):
+        return []
+    if cls is ast.FunctionDef or cls is ast.AsyncFunctionDef:
+        # Decorators and defaults run here; the body runs later (see _Scan.capture)
+        args = item.args
+        return item.decorator_list + args.defaults + args.kw_defaults
+    if cls is ast.ClassDef:
+        return item.decorator_list + item.bases + [keyword.value for keyword in item.keywords]
+    return [item]
+
+
+class _Scan:
+    """Per item, which tracked names it reads and writes, as bit masks.
+
+    Also collects what rules names out for the whole function: reads from
+    nested scopes (closures can run at any later point), global and
+    nonlocal declarations, and calls that read locals by name.
+    """
+
+    def __init__(self, bits: Dict[str, int]):
+        self.bits = bits
+        self.ignored = 0  # captured or declared names
+        self.introspective = False  # calls locals(), vars(), eval(), exec() or dir()
+
+    def item_masks(self, item) -> Tuple[int, int]:
+        bits = self.bits
+        uses = defs = 0
+        cls = type(item)
+        if cls is ast.ExceptHandler:
+            if item.name:
+                defs = bits.get(item.name, 0)
+        elif cls is ast.AugAssign and type(item.target) is ast.Name:
+            uses = bits.get(item.target.id, 0)
+        elif cls in _DEFS:
+            defs = bits.get(item.name, 0)
+            self.capture(item)
+
+        stack = _header(item) if cls in _HEADED else [item]
+        fields_of = _FIELDS
+        special_of = _SPECIAL
+        Name, Store = ast.Name, ast.Store
+        while stack:
+            node = stack.pop()
+            cls = type(node)
+            if cls is Name:
+                # `del x` counts as a read: deleting a name that was just bound is deliberate
+                if type(node.ctx) is Store:
+                    defs |= bits.get(node.id, 0)
+                else:
+                    uses |= bits.get(node.id, 0)
+                continue
+            special = special_of.get(cls)
+            if special is not None:
+                if special == _NESTED_SCOPE:
+                    self.capture(node)  # A lambda (defs and classes are items of their own)
+                    continue
+                if special == _COMPREHENSION:
+                    # Loop variables are the comprehension's own. A `:=` inside binds out
+                    # here only if an iteration runs, so it kills nothing
+                    uses |= self._comprehension(node)
+                    continue
+                if special == _DECLARATION:
+                    for name in node.names:
+                        self.ignored |= bits.get(name, 0)
+                    continue
+                if special == _IMPORT:
+                    for alias in node.names:
+                        defs |= bits.get((alias.asname or alias.name).partition('.')[0], 0)
+                    continue
+                if special == _CALL:
+                    if type(node.func) is Name and node.func.id in _INTROSPECTION:
+                        self.introspective = True
+                elif special == _CAPTURE_PATTERN:
+                    if node.name:
+                        defs |= bits.get(node.name, 0)
+                elif node.rest:  # _MAPPING_PATTERN
+                    defs |= bits.get(node.rest, 0)
+            fields = fields_of.get(cls)
+            if fields is None:
+                fields = _fields(cls)
+            for field in fields:
+                value = getattr(node, field)
+                if type(value) is list:
+                    stack.extend(value)
+                elif value is not None:
+                    stack.append(value)
+        return uses, defs
+
+    def _comprehension(self, node) -> int:
+        bits = self.bits
+        uses = 0
+        for sub in _walk(node):
+            cls = type(sub)
+            if cls is ast.Name:
+                if type(sub.ctx) is ast.Load:
+                    uses |= bits.get(sub.id, 0)
+            elif cls is ast.Call and type(sub.func) is ast.Name and sub.func.id in _INTROSPECTION:
+                self.introspective = True
+        return uses
+
+    def capture(self, scope):
+        """Names a nested scope reads stay alive for as long as the function runs."""
+        bits = self.bits
+        for sub in _walk(scope):
+            cls = type(sub)
+            if cls is ast.Name:
+                if type(sub.ctx) is ast.Load:
+                    self.ignored |= bits.get(sub.id, 0)
+            elif cls is ast.Call and type(sub.func) is ast.Name and sub.func.id in _INTROSPECTION:
+                self.introspective = True
+
+
+_DEFS = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+# Items that run only part of themselves where they sit (see _header)
+_HEADED = _COMPOUND | frozenset(_DEFS + (ast.match_case, ast.ExceptHandler))
+# Per node type: fields that can hold child nodes
+_FIELDS: Dict[type, Tuple[str, ...]] = {ast.Constant: (), ast.MatchSingleton: (), type(None): ()}
+# Node types _Scan.item_masks does more with than follow their fields
+_NESTED_SCOPE, _COMPREHENSION, _DECLARATION, _IMPORT, _CALL, _CAPTURE_PATTERN, _MAPPING_PATTERN = range(7)
+_SPECIAL = {ast.FunctionDef: _NESTED_SCOPE, ast.AsyncFunctionDef: _NESTED_SCOPE,
+            ast.ClassDef: _NESTED_SCOPE, ast.Lambda: _NESTED_SCOPE,
+            ast.ListComp: _COMPREHENSION, ast.SetComp: _COMPREHENSION,
+            ast.DictComp: _COMPREHENSION, ast.GeneratorExp: _COMPREHENSION,
+            ast.Global: _DECLARATION, ast.Nonlocal: _DECLARATION,
+            ast.Import: _IMPORT, ast.ImportFrom: _IMPORT, ast.Call: _CALL,
+            ast.MatchAs: _CAPTURE_PATTERN, ast.MatchStar: _CAPTURE_PATTERN,
+            ast.MatchMapping: _MAPPING_PATTERN}
+
+
+def _fields(cls) -> Tuple[str, ...]:
+    fields = _FIELDS[cls] = tuple(f for f in cls._fields if f not in LEAF_FIELDS)
+    return fields
+
+
+def _walk(node):
+    """Like ast.walk, minus the fields that never hold nodes."""
+    stack = [node]
+    fields_of = _FIELDS
+    while stack:
+        node = stack.pop()
+        yield node
+        fields = fields_of.get(type(node))
+        if fields is None:
+            fields = _fields(type(node))
+        for field in fields:
+            value = getattr(node, field)
+            if type(value) is list:
+                stack.extend(value)
+            elif value is not None:
+                stack.append(value)
+
+
+_ASSIGNMENTS = frozenset((ast.Assign, ast.AnnAssign, ast.AugAssign))
+
+
+def _store_targets(item) -> List[str]:
+    """Local names item assigns with `=`, `: T =` or an augmented assignment."""
+    cls = type(item)
+    if cls is ast.Assign:
+        return [target.id for target in item.targets if type(target) is ast.Name]
+    if (cls is ast.AnnAssign and item.value is not None) or cls is ast.AugAssign:
+        return [item.target.id] if type(item.target) is ast.Name else []
+    return []
+
+
+def _reportable(name: str) -> bool:
+    # `_` is a throwaway by convention; dunders (__tracebackhide__) are read through frames
+    return name != '_' and not (name.startswith('__') and name.endswith('__'))
+
+
+def has_stores(node) -> bool:
+    """Whether a def's body assigns a name dead_stores() would track; no graph needed if not."""
+    pending = [node.body]
+    while pending:
+        for stmt in pending.pop():
+            cls = type(stmt)
+            if cls in _ASSIGNMENTS:
+                if any(_reportable(name) for name in _store_targets(stmt)):
+                    return True
+            elif cls in _COMPOUND:
+                pending.extend(stmts for stmts, _ in _branches(stmt))
+    return False
+
+
+def dead_stores(cfg: CFG) -> List[Tuple[int, str]]:
+    """(line, name) for each assignment whose value is never read."""
+    reachable = cfg.reachable()
+    items = cfg.items
+    # Only names with a reportable assignment are tracked, one bit each
+    bits: Dict[str, int] = {}
+    for block, block_items in enumerate(items):
+        if reachable[block]:
+            for item in block_items:
+                if type(item) in _ASSIGNMENTS:
+                    for name in _store_targets(item):
+                        if name not in bits and _reportable(name):
+                            bits[name] = 1 << len(bits)
+    if not bits:
+        return []
+
+    scan = _Scan(bits)
+    per_item = []  # per block: [(item, use mask, def mask)]
+    gen = []
+    kill = []
+    for block_items in items:
+        if not block_items:
+            per_item.append(())
+            gen.append(0)
+            kill.append(0)
+            continue
+        rows = [(item,) + scan.item_masks(item) for item in block_items]
+        # Backwards through the block: gen = read before any write in the block
+        block_gen = block_kill = 0
+        for _, use_mask, def_mask in reversed(rows):
+            block_gen = use_mask | (block_gen & ~def_mask)
+            block_kill |= def_mask
+        per_item.append(rows)
+        gen.append(block_gen)
+        kill.append(block_kill)
+    if scan.introspective:
+        return []
+    ignored = scan.ignored
+
+    # Backward liveness to a fixed point; a block is revisited only when a successor changes
+    succ = cfg.succ
+    preds: List[list] = [[] for _ in items]
+    for block, targets in enumerate(succ):
+        for target in targets:
+            preds[target].append(block)
+    live_in = [0] * len(items)
+    live_out = [0] * len(items)
+    worklist = list(range(len(items)))
+    queued = bytearray([1]) * len(items)
+    while worklist:
+        block = worklist.pop()
+        queued[block] = 0
+        out = 0
+        for target in succ[block]:
+            out |= live_in[target]
+        live_out[block] = out
+        new_in = gen[block] | (out & ~kill[block])
+        if new_in != live_in[block]:
+            live_in[block] = new_in
+            for pred in preds[block]:
+                if not queued[pred]:
+                    queued[pred] = 1
+                    worklist.append(pred)
+
+    found = []
+    for block, rows in enumerate(per_item):
+        if not reachable[block]:
+            continue  # Reported as unreachable instead
+        live = live_out[block]
+        for item, use_mask, def_mask in reversed(rows):
+            if def_mask and not _is_none(item):
+                for name in _store_targets(item):
+                    bit = bits.get(name, 0)
+                    if bit and not (live & bit) and not (ignored & bit):
+                        found.append((item.lineno, name))
+            live = use_mask | (live & ~def_mask)
+    found.sort()
+    return found
+
+
+def _is_none(item) -> bool:
+    """`x = None`: a placeholder, usually overwritten on every path on purpose."""
+    value = getattr(item, 'value', None)
+    return type(item) is not ast.AugAssign and type(value) is ast.Constant and value.value is None
+
+
+# -- dead stores without a graph ----------------------------------------------
+
+def structured_dead_stores(node) -> Optional[List[Tuple[int, str]]]:
+    """dead_stores() for a def whose body only branches with if, for and while.
+
+    Returns None, meaning build the graph, if the body returns early,
+    raises, breaks, continues, tests a constant, or has try, with or match.
+    Otherwise every statement is reachable and liveness follows the
+    nesting: a statement list maps the set live after it to
+    gen | (live & ~kill), so a loop's fixed point is known without
+    iterating.
+    """
+    bits = _structured_bits(node.body)
+    if bits is None:
+        return None
+    if not bits:
+        return []
+    liveness = _Liveness(bits)
+    liveness.scan_body(node.body)
+    if liveness.scan.introspective:
+        return []
+    liveness.walk(node.body, 0)
+    liveness.found.sort()
+    return liveness.found
+
+
+def _structured_bits(body) -> Optional[Dict[str, int]]:
+    """Bits for the names dead_stores() would track, or None if body needs the graph."""
+    bits: Dict[str, int] = {}
+    pending = [(body, True)]
+    while pending:
+        stmts, top = pending.pop()
+        last = len(stmts) - 1
+        for i, stmt in enumerate(stmts):
+            cls = type(stmt)
+            if cls in _ASSIGNMENTS:
+                for name in _store_targets(stmt):
+                    if name not in bits and _reportable(name):
+                        bits[name] = 1 << len(bits)
+            elif cls in _TERMINATORS:
+                # A closing return flows to the exit like falling off the end
+                if not (top and i == last and cls is ast.Return):
+                    return None
+            elif cls is ast.If or cls is ast.While:
+                if _constant_truth(stmt.test) is not None:
+                    return None
+                pending.append((stmt.body, False))
+                pending.append((stmt.orelse, False))
+            elif cls is ast.For or cls is ast.AsyncFor:
+                pending.append((stmt.body, False))
+                pending.append((stmt.orelse, False))
+            elif cls in _COMPOUND:
+                return None
+    return bits
+
+
+class _Liveness:
+    """Backward liveness over nested statement lists, with the masks _Scan gives."""
+
+    def __init__(self, bits: Dict[str, int]):
+        self.bits = bits
+        self.scan = _Scan(bits)
+        self.masks: Dict[int, Tuple[int, int]] = {}  # id(stmt) -> (use mask, def mask)
+        self.summaries: Dict[int, Tuple[int, int]] = {}  # id(statement list) -> (gen, kill)
+        self.found: List[Tuple[int, str]] = []
+
+    def scan_body(self, body):
+        # Every statement first: a closure late in the body rules names out everywhere
+        masks, item_masks = self.masks, self.scan.item_masks
+        pending = [body]
+        while pending:
+            for stmt in pending.pop():
+                masks[id(stmt)] = item_masks(stmt)
+                cls = type(stmt)
+                if cls is ast.If or cls in _LOOPS:
+                    if cls is ast.For or cls is ast.AsyncFor:
+                        masks[id(stmt.target)] = item_masks(stmt.target)
+                    pending.append(stmt.body)
+                    pending.append(stmt.orelse)
+
+    def summary(self, stmts) -> Tuple[int, int]:
+        """(gen, kill) of a statement list; memoized, so nested loops stay linear."""
+        key = id(stmts)
+        known = self.summaries.get(key)
+        if known is not None:
+            return known
+        masks = self.masks
+        gen = kill = 0
+        for stmt in reversed(stmts):
+            use_mask, def_mask = masks[id(stmt)]
+            cls = type(stmt)
+            if cls is ast.If:
+                body_gen, body_kill = self.summary(stmt.body)
+                else_gen, else_kill = self.summary(stmt.orelse)
+                use_mask |= (body_gen | else_gen) & ~def_mask
+                def_mask |= body_kill & else_kill
+            elif cls in _LOOPS:
+                # The body may run no times, so only the else kills
+                body_gen = self.iteration_gen(stmt)
+                else_gen, else_kill = self.summary(stmt.orelse)
+                use_mask |= (body_gen | else_gen) & ~def_mask
+                def_mask |= else_kill
+            gen = use_mask | (gen & ~def_mask)
+            kill |= def_mask
+        self.summaries[key] = (gen, kill)
+        return gen, kill
+
+    def iteration_gen(self, loop) -> int:
+        """What one iteration of loop reads first: a for binds its target, then runs the body."""
+        body_gen = self.summary(loop.body)[0]
+        if type(loop) is ast.While:
+            return body_gen
+        use_mask, def_mask = self.masks[id(loop.target)]
+        return use_mask | (body_gen & ~def_mask)
+
+    def walk(self, stmts, live: int) -> int:
+        """Live set before stmts given the one after; records the dead stores on the way."""
+        masks = self.masks
+        for stmt in reversed(stmts):
+            use_mask, def_mask = masks[id(stmt)]
+            cls = type(stmt)
+            if cls is ast.If:
+                branches = self.walk(stmt.body, live) | self.walk(stmt.orelse, live)
+                live = use_mask | (branches & ~def_mask)
+            elif cls in _LOOPS:
+                # Live at the loop head: what its test, the body or the exit reads first
+                exits = self.walk(stmt.orelse, live)
+                live = use_mask | ((self.iteration_gen(stmt) | exits) & ~def_mask)
+                self.walk(stmt.body, live)
+            else:
+                if def_mask and not _is_none(stmt):
+                    for name in _store_targets(stmt):
+                        bit = self.bits.get(name, 0)
+                        if bit and not (live & bit) and not (self.scan.ignored & bit):
+                            self.found.append((stmt.lineno, name))
+                live = use_mask | (live & ~def_mask)
+        return live
@@ -0,0 +1,320 @@
+"""
+Unused-import check without building an AST, for `--only imports --fast`.
+
+A single compiled regex splits the source into strings, comments, names,
+numbers and operators. A small state machine then tracks brackets and
+statement boundaries, which is enough to tell a name that is read
+(`os.path`, `Foo(`, `x: Foo`, `return foo`) from one that is only bound
+(`foo = 1`, `def foo`, parameters, `for foo in`, `with ... as (a, foo)`,
+keyword arguments).
+
+The answer has to match the full visitor's: an import is unused when its
+bound name (the first part of a dotted `import a.b`) is never loaded
+anywhere in the file. When the scanner can't be sure, it returns None and
+the caller parses the file properly. That happens on unbalanced brackets,
+unterminated strings, `match` statements (capture patterns bind names)
+and imports whose only possible use is inside an f-string.
+
+Files with syntax errors are not detected here; the full path skips them.
+"""
+import keyword
+import re
+from typing import List, Optional, Tuple
+
+_TOKEN = re.compile(r'''
+    (?P<string>(?:[rRbBuUfF]{1,2})?
+        (?:'{3}(?:[^'\\]|\\.|'(?!''))*'{3}
+          |"{3}(?:[^"\\]|\\.|"(?!""))*"{3}
+          |'(?:[^'\\\n]|\\.)*'
+          |"(?:[^"\\\n]|\\.)*"))
+  | (?P<name>[^\W\d]\w*)
+  | (?P<number>\d[\w.]*)
+  | (?P<nl>\n)
+  | (?P<op>:=|->|\*\*=?|//=|>>=|<<=|[-+*/%&|^@]=|(?<![=!<>])=(?!=)|[*:;,.()\[\]{}])
+  | (?P<comment>\#[^\n]*)
+  | (?P<cont>\\\r?\n)
+  | (?P<bad>['"\\])
+''', re.S | re.X)
+
+# m.lastindex of each group above
+_STRING, _NAME, _NUMBER, _NL, _OP, _COMMENT, _CONT, _BAD = range(1, 9)
+
+# Text after each `import` keyword up to the end of its statement, for candidate names
+_IMPORT_TAIL = re.compile(r'\bimport\b[ \t]*(?:\([^)]*\)|(?:[^\n\\]|\\.)*)', re.S)
+_FSTRING_PREFIX = re.compile(r'[rRbBuU]?[fF]|[fF][rR]')
+_IDENTIFIER = re.compile(r'[^\W\d]\w*')
+_KEYWORDS = frozenset(keyword.kwlist)
+_COMPOUND = frozenset(('if', 'elif', 'else', 'while', 'for', 'try', 'except', 'finally',
+                       'with', 'def', 'class', 'async'))
+_OPEN = {'(': ')', '[': ']', '{': '}'}
+_CLOSE = frozenset(')]}')
+_AUGMENTED = frozenset(('+=', '-=', '*=', '/=', '//=', '%=', '@=', '&=', '|=', '^=',
+                        '>>=', '<<=', '**=', ':='))
+# A name followed by one of these is read (unless it is being defined)
+_READ_BEFORE = frozenset('.([')
+_PARAM_BEFORE = frozenset(('(', ',', '*', '**', 'lambda'))
+
+
+class Undecidable(Exception):
+    """The scanner can't match the full visitor's answer for this source."""
+
+
+def unused_imports(source: str) -> Optional[Tuple[Tuple[str, int], ...]]:
+    """(bound name, line) of each unused import, as the full visitor reports them; None if undecided."""
+    if 'import' not in source:
+        return ()
+    # Every bound name appears after an `import` keyword; only those names need tracking
+    candidates = set()
+    for tail in _IMPORT_TAIL.findall(source):
+        candidates.update(_IDENTIFIER.findall(tail))
+    try:
+        imports, reads, fstring_names = _Scanner(candidates).scan(source)
+    except Undecidable:
+        return None
+    unused = []
+    for name, line in imports:
+        base = name.split('.')[0]
+        if base in reads:
+            continue
+        if base in fstring_names:
+            return None
+        unused.append((name, line))
+    return tuple(unused)
+
+
+class _Scanner:
+    """One pass over a source string; see the module docstring."""
+
+    def __init__(self, candidates):
+        self.candidates = candidates
+        self.imports: List[Tuple[str, int]] = []
+        self.reads = set()
+        self.fstring_names = set()
+        # Open brackets: (closer, is a tuple/list display rather than a call or subscript,
+        # len(pending) when it opened)
+        self.brackets = []
+        self.closed_display = None  # pending start of the display that just closed, if one did
+        self.pending = []  # bare names that are assignment targets if an '=' follows in the statement
+        self.mode = None  # 'def', 'params', 'lambda', 'for', 'as', 'del', 'global' or 'annotation'
+        self.mode_depth = 0
+        self.first = None  # first token of the current statement
+
+    def scan(self, source):
+        """Imports in source order, names read, and names that may be read inside f-strings."""
+        brackets = self.brackets
+        candidates = self.candidates
+        line, line_pos = 1, 0
+        stmt_start = True
+        import_kind = None  # 'import' or 'from' while inside an import statement
+        import_line = 0
+        import_tokens = []
+        prev, prev_kind = None, _NL
+        last_name = None  # (name, prev, prev_kind, depth, targetable), resolved on the next token
+
+        for m in _TOKEN.finditer(source):
+            kind = m.lastindex
+            if kind == _COMMENT or kind == _CONT:
+                continue
+            if kind == _BAD:
+                raise Undecidable
+            text = m.group()
+
+            if last_name is not None:
+                self._resolve(*last_name, text if kind == _OP or kind == _NL else None)
+                last_name = None
+
+            if kind == _NL:
+                if brackets:
+                    continue
+                if import_kind is not None:
+                    self._add_import(import_kind, import_line, import_tokens)
+                    import_kind = None
+                self._end_statement()
+                stmt_start = True
+                prev, prev_kind = None, _NL
+                continue
+
+            if import_kind is not None:
+                if text == ';' and not brackets:
+                    self._add_import(import_kind, import_line, import_tokens)
+                    import_kind = None
+                    self._end_statement()
+                    stmt_start = True
+                else:
+                    if text in _OPEN:
+                        brackets.append((_OPEN[text], False, 0))
+                    elif text in _CLOSE:
+                        self._close(text)
+                    import_tokens.append(text)
+                prev, prev_kind = text, kind
+                continue
+
+            if stmt_start:
+                stmt_start = False
+                self.first = text
+
+            if kind == _STRING:
+                if _FSTRING_PREFIX.match(text):
+                    self.fstring_names.update(_IDENTIFIER.findall(text))
+            elif kind == _NAME:
+                if text not in _KEYWORDS:
+                    if text not in candidates:
+                        prev, prev_kind = text, kind
+                        continue
+                    if self.mode == 'for' or self.mode == 'as':
+                        targetable = all(entry[1] for entry in brackets[self.mode_depth:])
+                    else:
+                        targetable = all(entry[1] for entry in brackets)
+                    last_name = (text, prev, prev_kind, len(brackets), targetable)
+                elif text == 'import' or text == 'from' and prev_kind == _NL:
+                    line += source.count('\n', line_pos, m.start())
+                    line_pos = m.start()
+                    import_kind, import_line, import_tokens = text, line, []
+                else:
+                    self._keyword(text)
+            elif kind == _OP:
+                if self._operator(text, prev, prev_kind):
+                    stmt_start = True
+                    text, kind = None, _NL
+            prev, prev_kind = text, kind
+
+        if last_name is not None:
+            self._resolve(*last_name, None)
+        if brackets:
+            raise Undecidable
+        if import_kind is not None:
+            self._add_import(import_kind, import_line, import_tokens)
+        self._end_statement()
+        return self.imports, self.reads, self.fstring_names
+
+    def _resolve(self, name, before, before_kind, depth, targetable, after):
+        """Record `name` as read unless the tokens around it show it is being bound."""
+        if before == '.' and before_kind == _OP:
+            return  # attribute
+        mode = self.mode
+        if mode == 'annotation':
+            self.reads.add(name)
+            return
+        if before_kind == _NAME and before in ('def', 'class'):
+            return
+        if after in _READ_BEFORE:
+            self.reads.add(name)
+            return
+        if before_kind == _NAME and before in ('as', 'global', 'nonlocal'):
+            return
+        if after in _AUGMENTED or after == '=' and (depth == 0 or before in _PARAM_BEFORE):
+            return  # assignment target, keyword argument or parameter with a default
+        if mode == 'global':
+            return
+        if mode == 'for' or mode == 'as':
+            if not targetable:
+                self.reads.add(name)
+            return
+        if mode in ('params', 'lambda') and depth == self.mode_depth and before in _PARAM_BEFORE:
+            return
+        if targetable and mode in (None, 'del'):
+            self.pending.append(name)
+            return
+        self.reads.add(name)
+
+    def _end_statement(self, assigned=None):
+        """Close the current statement (or target list); pending names were read unless assigned."""
+        if assigned is None:
+            assigned = self.mode == 'del'
+            self.mode = None
+            self.first = None
+        if not assigned:
+            self.reads.update(self.pending)
+        self.pending.clear()
+
+    def _keyword(self, text):
+        mode = self.mode
+        if text == 'def':
+            self.mode = 'def'
+        elif text == 'del' and self.first == 'del':
+            self.mode = 'del'
+        elif text in ('global', 'nonlocal') and self.first == text:
+            self.mode = 'global'
+        elif text == 'for' and mode in (None, 'for'):
+            self.mode, self.mode_depth = 'for', len(self.brackets)
+        elif text == 'in' and mode == 'for' and len(self.brackets) == self.mode_depth:
+            self.mode = None
+        elif text == 'lambda' and mode is None:
+            self.mode, self.mode_depth = 'lambda', len(self.brackets)
+        elif text == 'as' and mode is None and self.first in ('with', 'async'):
+            # `with a as (b, c):` binds every name in the display, like a for target
+            self.mode, self.mode_depth = 'as', len(self.brackets)
+
+    def _operator(self, text, prev, prev_kind):
+        """Track brackets and statement structure; True if a new statement starts after text."""
+        brackets = self.brackets
+        if self.closed_display is not None and prev in _CLOSE and text in _READ_BEFORE:
+            # `(a, b)[0] = x` assigns into the display, which is read, not bound
+            self.reads.update(self.pending[self.closed_display:])
+            del self.pending[self.closed_display:]
+        if text in _OPEN:
+            # A bracket right after a name, string or closing bracket is a call or subscript
+            display = text != '{' and (prev_kind == _NL or prev_kind == _OP and prev not in _CLOSE
+                                       or prev_kind == _NAME and prev in _KEYWORDS)
+            brackets.append((_OPEN[text], display, len(self.pending)))
+            if text == '(' and self.mode == 'def':
+                self.mode, self.mode_depth = 'params', len(brackets)
+        elif text in _CLOSE:
+            self._close(text)
+            if self.mode in ('params', 'as') and len(brackets) < self.mode_depth:
+                self.mode = None
+        elif text == ':' and self.mode == 'lambda' and len(brackets) == self.mode_depth:
+            self.mode = None
+        elif text == ',' and self.mode == 'as' and len(brackets) == self.mode_depth:
+            self.mode = None  # The next with item
+        elif brackets:
+            pass
+        elif text == '=' and self.mode != 'lambda':
+            self._end_statement(assigned=True)
+        elif text in _AUGMENTED:
+            self._end_statement(assigned=True)
+        elif text == ':':
+            if self.first in _COMPOUND:
+                # End of a compound statement's header; a simple statement may follow on the line
+                self._end_statement()
+                return True
+            elif self.first == 'match':
+                raise Undecidable  # match statement: case patterns bind names
+            else:
+                # Annotated assignment: what came before is the target, the annotation is read
+                self._end_statement(assigned=True)
+                self.mode = 'annotation'
+        elif text == ';':
+            self._end_statement()
+            return True
+        return False
+
+    def _close(self, text):
+        if not self.brackets or self.brackets[-1][0] != text:
+            raise Undecidable
+        _, display, pending_start = self.brackets.pop()
+        self.closed_display = pending_start if display else None
+
+    def _add_import(self, kind, line, tokens):
+        """Record the bound name of each alias in an import statement's tokens."""
+        if kind == 'from':
+            if 'import' not in tokens:
+                raise Undecidable
+            tokens = tokens[tokens.index('import') + 1:]
+        alias = []
+        for token in tokens + [',']:
+            if token == '(' or token == ')':
+                continue
+            if token != ',':
+                alias.append(token)
+                continue
+            if not alias:
+                continue  # trailing comma inside parentheses
+            if len(alias) >= 3 and alias[-2] == 'as':
+                bound = alias[-1]
+            elif 'as' in alias or (kind == 'from' and len(alias) != 1):
+                raise Undecidable
+            else:
+                bound = ''.join(alias)  # `import a.b` binds a, reported as a.b
+            self.imports.append((bound, line))
+            alias = []
@@ -0,0 +1,73 @@
+"""
+Flat view of an analyzer report: one (type, file, line, name) tuple per finding.
+"""
+from typing import Dict, Iterator, List, Tuple
+
+Finding = Tuple[str, str, int, str]
+
+# `--only` choices -> (finding type, get_report() key)
+KINDS = {
+    "imports": ("import", "unused_imports"),
+    "functions": ("function", "unused_functions"),
+    "classes": ("class", "unused_classes"),
+    "variables": ("variable", "unused_variables"),
+    "unreachable": ("unreachable", "unreachable_code"),
+}
+# Kinds decided from one file alone, without the project's reference graph
+FILE_LOCAL_KINDS = ("imports", "variables", "unreachable")
+
+
+def iter_findings(report: Dict) -> Iterator[Finding]:
+    """Yield every finding in a get_report() dict as (type, file, line, name)."""
+    for file, items in report.get("unused_imports", {}).items():
+        for name, line in items:
+            yield ("import", file, line, name)
+    for file, line, name in report.get("unused_functions", []):
+        yield ("function", file, line, name)
+    for file, line, name in report.get("unused_classes", []):
+        yield ("class", file, line, name)
+    for file, items in report.get("unused_variables", {}).items():
+        for line, name in items:
+            yield ("variable", file, line, name)
+    for file, items in report.get("unreachable_code", {}).items():
+        for line, reason in items:
+            yield ("unreachable", file, line, reason)
+
+
+def finding_dict(finding: Finding) -> Dict:
+    kind, file, line, name = finding
+    return {"type": kind, "file": file, "line": line, "name": name}
+
+
+def diff_findings(old: Dict, new: Dict) -> Dict[str, List[Dict]]:
+    """Findings that appeared, disappeared or only changed line between two reports.
+
+    A finding whose type, file and name are unchanged but whose line moved
+    (an edit above it) is reported under "moved" with its old line as
+    "from_line", rather than as one removal plus one addition.
+    """
+    before = set(iter_findings(old))
+    after = set(iter_findings(new))
+    removed = sorted(before - after)
+    added = sorted(after - before)
+
+    # Pair same-named findings in line order; unpaired ones really came or went
+    unmatched: Dict[Tuple[str, str, str], List[Finding]] = {}
+    for finding in removed:
+        kind, file, _, name = finding
+        unmatched.setdefault((kind, file, name), []).append(finding)
+    moved = []
+    still_added = []
+    for finding in added:
+        kind, file, line, name = finding
+        candidates = unmatched.get((kind, file, name))
+        if candidates:
+            old_line = candidates.pop(0)[2]
+            moved.append(dict(finding_dict(finding), from_line=old_line))
+        else:
+            still_added.append(finding)
+    return {
+        "added": [finding_dict(f) for f in still_added],
+        "removed": [finding_dict(f) for group in unmatched.values() for f in group],
+        "moved": moved,
+    }
@@ -0,0 +1,154 @@
+"""
+Machine-readable output formats: JSON, JSONL, SARIF and one-line-per-finding text.
+
+None of these touch jinja2 or the removal server. JSONL is written one
+finding per line as soon as it is known, so consumers can start before the
+scan finishes.
+
+Files the analyzer skipped (too large, unparsable, out of time) are not
+findings, but every format lists them so they don't silently drop out.
+"""
+import json
+import os
+from typing import Dict, IO, Iterable, Optional
+
+from deadcode_finder.findings import Finding, finding_dict, iter_findings
+
+FORMATS = ("html", "json", "jsonl", "sarif", "text")
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+TOOL_NAME = "py-deadcode-finder"
+TOOL_URI = "https://github.com/Yash-s0/py-deadcode-finder"
+
+# SARIF rule id and description per finding type
+RULES = {
+    "import": ("DC001", "Unused import"),
+    "function": ("DC002", "Unused function"),
+    "class": ("DC003", "Unused class"),
+    "variable": ("DC004", "Unused variable"),
+    "unreachable": ("DC005", "Unreachable code"),
+}
+
+
+def iter_file_findings(summary) -> Iterable[Finding]:
+    """Findings that depend on one file only, available as soon as it is analyzed."""
+    for name, line in summary.unused_imports:
+        yield ("import", summary.path, line, name)
+    for line, name in summary.unused_vars:
+        yield ("variable", summary.path, line, name)
+    for line, reason in summary.unreachable:
+        yield ("unreachable", summary.path, line, reason)
+
+
+def iter_project_findings(report: Dict) -> Iterable[Finding]:
+    """Findings that need the whole project's reference graph."""
+    for file, line, name in report.get("unused_functions", []):
+        yield ("function", file, line, name)
+    for file, line, name in report.get("unused_classes", []):
+        yield ("class", file, line, name)
+
+
+class JsonlWriter:
+    """Writes one JSON object per finding and flushes so readers see it immediately."""
+
+    def __init__(self, stream: IO[str], kinds: Optional[Iterable[str]] = None, baseline=None):
+        self.stream = stream
+        self.kinds = frozenset(kinds) if kinds else None  # finding types to keep, e.g. {"import"}
+        # Optional baseline.Baseline; streamed file-local findings it knows are dropped
+        # (project findings come from get_report(), which already leaves them out)
+        self.baseline = baseline
+        self.count = 0
+
+    def write(self, finding: Finding):
+        if self.kinds is not None and finding[0] not in self.kinds:
+            return
+        self.stream.write(json.dumps(finding_dict(finding)) + "\n")
+        self.stream.flush()
+        self.count += 1
+
+    def write_all(self, findings: Iterable[Finding]):
+        for finding in findings:
+            self.write(finding)
+
+    def on_summary(self, summary):
+        """Analyzer hook: stream a file's local findings as soon as it is merged."""
+        if summary.skipped:
+            # Always written, whatever the kinds filter
+            self.stream.write(json.dumps({"type": "skipped", "file": summary.path,
+                                          "reason": summary.skipped}) + "\n")
+            self.stream.flush()
+        findings = iter_file_findings(summary)
+        if self.baseline is not None:
+            findings = self.baseline.new_findings(findings)
+        self.write_all(findings)
+
+
+def write_json(report: Dict, stream: IO[str], summary: Dict):
+    """Whole report as one JSON document: a summary block plus the flat findings list."""
+    document = dict(summary)
+    document["findings"] = [finding_dict(f) for f in iter_findings(report)]
+    document["skipped"] = [{"file": file, "reason": reason}
+                           for file, reason in report.get("skipped_files", {}).items()]
+    json.dump(document, stream, indent=2)
+    stream.write("\n")
+
+
+def write_sarif(report: Dict, stream: IO[str], root: str):
+    """SARIF 2.1.0 log, with artifact URIs relative to the scanned root."""
+    results = []
+    for kind, file, line, name in iter_findings(report):
+        rule_id, title = RULES[kind]
+        uri = os.path.relpath(file, root).replace(os.sep, "/")
+        results.append({
+            "ruleId": rule_id,
+            "level": "warning",
+            "message": {"text": f"{title}: {name}"},
+            "locations": [{
+                "physicalLocation": {
+                    "artifactLocation": {"uri": uri, "uriBaseId": "SRCROOT"},
+                    "region": {"startLine": max(1, int(line))},
+                }
+            }],
+        })
+
+    notifications = [{
+        "level": "warning",
+        "message": {"text": f"Not analyzed: {reason}"},
+        "locations": [{"physicalLocation": {"artifactLocation": {
+            "uri": os.path.relpath(file, root).replace(os.sep, "/"), "uriBaseId": "SRCROOT"}}}],
+    } for file, reason in report.get("skipped_files", {}).items()]
+
+    log = {
+        "$schema": SARIF_SCHEMA,
+        "version": "2.1.0",
+        "runs": [{
+            "tool": {
+                "driver": {
+                    "name": TOOL_NAME,
+                    "informationUri": TOOL_URI,
+                    "rules": [
+                        {"id": rule_id, "name": kind, "shortDescription": {"text": title}}
+                        for kind, (rule_id, title) in RULES.items()
+                    ],
+                }
+            },
+            "originalUriBaseIds": {"SRCROOT": {"uri": "file://" + os.path.abspath(root).replace(os.sep, "/") + "/"}},
+            "invocations": [{"executionSuccessful": True,
+                             "toolExecutionNotifications": notifications}],
+            "results": results,
+        }],
+    }
+    json.dump(log, stream, indent=2)
+    stream.write("\n")
+
+
+def write_text(report: Dict, stream: IO[str], root: str) -> int:
+    """One `file:line: ID message` line per finding, paths relative to root (for hooks and editors)."""
+    count = 0
+    for kind, file, line, name in iter_findings(report):
+        rule_id, title = RULES[kind]
+        stream.write(f"{os.path.relpath(file, root)}:{line}: {rule_id} {title}: {name}\n")
+        count += 1
+    for file, reason in report.get("skipped_files", {}).items():
+        stream.write(f"{os.path.relpath(file, root)}: not analyzed: {reason}\n")
+    return count
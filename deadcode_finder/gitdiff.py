@@ -0,0 +1,57 @@
+"""
+Minimal git plumbing for --since: which files changed relative to a ref.
+"""
+import os
+import subprocess
+from pathlib import Path
+from typing import List, Optional
+
+
+class GitError(RuntimeError):
+    """git is missing, the path is not in a work tree, or the ref is unknown."""
+
+
+def _git(root, *args) -> str:
+    try:
+        proc = subprocess.run(['git', '-C', str(root), *args], capture_output=True)
+    except OSError as e:
+        raise GitError(f"cannot run git: {e}")
+    if proc.returncode != 0:
+        raise GitError(proc.stderr.decode('utf-8', 'replace').strip() or f"git {args[0]} failed")
+    return proc.stdout.decode('utf-8', 'surrogateescape')
+
+
+def resolve_commit(root, ref: str) -> str:
+    return _git(root, 'rev-parse', '--verify', '--quiet', ref + '^{commit}').strip()
+
+
+def head_commit(root) -> Optional[str]:
+    """HEAD's sha, or None outside a git work tree."""
+    try:
+        return resolve_commit(root, 'HEAD')
+    except GitError:
+        return None
+
+
+def changed_files(root, ref: str) -> List[Path]:
+    """Files under root that differ from `ref` in the work tree (committed, staged or not), plus untracked ones.
+
+    Deleted files are included so callers can drop what they knew about them.
+    """
+    toplevel = Path(_git(root, 'rev-parse', '--show-toplevel').strip())
+    resolve_commit(root, ref)  # Fail early on a bad ref
+    names = _git(root, 'diff', '--name-only', '--no-renames', '-z', ref, '--').split('\0')
+    names += _git(root, 'ls-files', '--others', '--exclude-standard', '--full-name', '-z').split('\0')
+
+    base = os.path.realpath(root)
+    files = []
+    seen = set()
+    for name in names:
+        if not name or name in seen:
+            continue
+        seen.add(name)
+        path = toplevel / name
+        if os.path.commonpath([base, os.path.realpath(path)]) == base:
+            # Report paths under the root as the caller spelled it, like the walker does
+            files.append(Path(root) / os.path.relpath(os.path.realpath(path), base))
+    return files
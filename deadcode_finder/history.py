@@ -0,0 +1,228 @@
+"""
+Local scan history: one SQLite file with every full scan's counts, findings and per-file summaries.
+
+Each recorded scan keeps its commit, time, health score and per-kind counts
+in one `scans` row, so trend queries read a few hundred indexed rows and
+never touch the findings. The findings themselves are kept per scan for
+per-file trends. Per-file summaries are stored once per (path, content
+digest), so an unchanged file costs one small row per scan.
+
+Those stored summaries also warm-start analysis: a checkout without an
+analysis cache (a fresh CI job) gets cache entries seeded from the last
+recorded scan. AnalysisCache confirms each by content hash before reusing it.
+They are stored as marshal records, not pickles, and each is shape-checked
+before it is seeded: the history file sits in the scanned tree like the cache.
+"""
+import marshal
+import os
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from deadcode_finder.analyzer import FileSummary
+from deadcode_finder.cache import CACHE_VERSION
+from deadcode_finder.findings import iter_findings
+from deadcode_finder.ingest import Limits, budget_reason
+
+HISTORY_FILE_NAME = 'history.sqlite3'
+# Stored in PRAGMA user_version; bump whenever the tables below change.
+HISTORY_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    root TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    git_commit TEXT,
+    duration REAL,
+    files INTEGER,
+    skipped INTEGER,
+    total_issues INTEGER,
+    health INTEGER,
+    imports INTEGER,
+    functions INTEGER,
+    classes INTEGER,
+    variables INTEGER,
+    unreachable INTEGER
+);
+CREATE INDEX IF NOT EXISTS scans_by_root ON scans (root, started_at);
+CREATE INDEX IF NOT EXISTS scans_by_commit ON scans (git_commit);
+CREATE TABLE IF NOT EXISTS findings (
+    scan_id INTEGER NOT NULL REFERENCES scans (id) ON DELETE CASCADE,
+    type TEXT NOT NULL,
+    file TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS findings_by_scan ON findings (scan_id);
+CREATE INDEX IF NOT EXISTS findings_by_file ON findings (file, scan_id);
+CREATE TABLE IF NOT EXISTS scan_files (
+    scan_id INTEGER NOT NULL REFERENCES scans (id) ON DELETE CASCADE,
+    path TEXT NOT NULL,
+    digest TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scan_files_by_scan ON scan_files (scan_id);
+CREATE TABLE IF NOT EXISTS summaries (
+    path TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    format TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (path, digest, format)
+);
+"""
+
+# Finding type -> scans column
+_COUNT_COLUMNS = {"import": "imports", "function": "functions", "class": "classes",
+                  "variable": "variables", "unreachable": "unreachable"}
+_TREND_COLUMNS = ("id", "started_at", "git_commit", "duration", "files", "skipped",
+                  "total_issues", "health") + tuple(_COUNT_COLUMNS.values())
+
+
+class HistoryError(RuntimeError):
+    """The history file can't be opened or was written by another version."""
+
+
+def summary_format(limits) -> str:
+    """Summaries are only interchangeable under the same cache version and ingestion limits.
+
+    The encoding is part of it, so rows pickled by older versions are never read.
+    """
+    return f"marshal:{CACHE_VERSION}:{tuple(limits)!r}"
+
+
+class HistoryStore:
+    """Scan history of one scanned root, in a SQLite file."""
+
+    def __init__(self, path, root):
+        self.path = Path(path)
+        self.root = os.path.abspath(root)
+
+    @staticmethod
+    def path_in(cache_dir) -> Path:
+        return Path(cache_dir) / HISTORY_FILE_NAME
+
+    def _connect(self) -> sqlite3.Connection:
+        """A new connection (one per call, so server threads never share one), schema ensured."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            conn = sqlite3.connect(str(self.path))
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version not in (0, HISTORY_VERSION):
+                conn.close()
+                raise HistoryError(f"{self.path} was written by another version "
+                                   f"(schema {version}, expected {HISTORY_VERSION})")
+            if version == 0:
+                with conn:
+                    conn.executescript(_SCHEMA)
+                    conn.execute(f"PRAGMA user_version = {HISTORY_VERSION}")
+            conn.execute("PRAGMA foreign_keys = ON")
+        except sqlite3.Error as e:
+            raise HistoryError(f"can't open history {self.path}: {e}")
+        return conn
+
+    # -- recording ---------------------------------------------------------
+
+    def record(self, analyzer, report: Dict, total_issues: int, health: int,
+               commit: Optional[str] = None, duration: Optional[float] = None) -> int:
+        """Store one full scan; report must be unfiltered (no --only, no baseline)."""
+        counts = dict.fromkeys(_COUNT_COLUMNS.values(), 0)
+        findings = []
+        for kind, file, line, name in iter_findings(report):
+            counts[_COUNT_COLUMNS[kind]] += 1
+            findings.append((kind, file, line, name))
+        summaries = [s for s in analyzer.summaries.values() if s.digest]
+        fmt = summary_format(analyzer.limits)
+
+        with closing(self._connect()) as conn, conn:
+            scan_id = conn.execute(
+                "INSERT INTO scans (root, started_at, git_commit, duration, files, skipped, "
+                "total_issues, health, imports, functions, classes, variables, unreachable) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.root, time.time(), commit, duration, len(analyzer.summaries),
+                 len(report.get("skipped_files", {})), total_issues, health,
+                 *(counts[column] for column in _COUNT_COLUMNS.values()))).lastrowid
+            conn.executemany("INSERT INTO findings (scan_id, type, file, line, name) "
+                             "VALUES (?, ?, ?, ?, ?)",
+                             ((scan_id,) + finding for finding in findings))
+            conn.executemany("INSERT INTO scan_files (scan_id, path, digest) VALUES (?, ?, ?)",
+                             ((scan_id, s.path, s.digest) for s in summaries))
+            # Only files whose content is new to the store are serialized
+            stored = set(conn.execute("SELECT path, digest FROM summaries WHERE format = ?", (fmt,)))
+            conn.executemany(
+                "INSERT INTO summaries (path, digest, format, size, data) VALUES (?, ?, ?, ?, ?)",
+                ((s.path, s.digest, fmt, _size(s.path), marshal.dumps(s.to_record()))
+                 for s in summaries if (s.path, s.digest) not in stored))
+        return scan_id
+
+    # -- queries -----------------------------------------------------------
+
+    def trends(self, limit: int = 50) -> List[Dict]:
+        """The latest `limit` scans of this root, oldest first, with the change in findings."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(f"SELECT {', '.join(_TREND_COLUMNS)} FROM scans WHERE root = ? "
+                                "ORDER BY started_at DESC LIMIT ?", (self.root, limit)).fetchall()
+        scans = []
+        previous = None
+        for row in reversed(rows):
+            scan = dict(zip(_TREND_COLUMNS, row))
+            scan["findings"] = sum(scan[column] for column in _COUNT_COLUMNS.values())
+            scan["change"] = None if previous is None else scan["findings"] - previous
+            previous = scan["findings"]
+            scans.append(scan)
+        return scans
+
+    def file_trend(self, file: str, limit: int = 50) -> List[Dict]:
+        """Findings in one file (as the scan spelled its path) for the latest `limit` scans, oldest first."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT s.id, s.started_at, s.git_commit, "
+                "(SELECT COUNT(*) FROM findings f WHERE f.file = ? AND f.scan_id = s.id) "
+                "FROM scans s WHERE s.root = ? ORDER BY s.started_at DESC LIMIT ?",
+                (file, self.root, limit)).fetchall()
+        return [dict(zip(("id", "started_at", "git_commit", "findings"), row))
+                for row in reversed(rows)]
+
+    # -- warm start --------------------------------------------------------
+
+    def warm_start(self, cache) -> int:
+        """Seed cache with the last scan's summaries it lacks; returns how many were offered."""
+        fmt = summary_format(cache.limits)
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT id FROM scans WHERE root = ? ORDER BY started_at DESC LIMIT 1",
+                               (self.root,)).fetchone()
+            if row is None:
+                return 0
+            rows = conn.execute(
+                "SELECT f.path, s.size, s.digest, s.data FROM scan_files f "
+                "JOIN summaries s ON s.path = f.path AND s.digest = f.digest AND s.format = ? "
+                "WHERE f.scan_id = ?", (fmt, row[0])).fetchall()
+        over_budget = budget_reason(Limits(*cache.limits).time_budget)
+        seeded = 0
+        for path, size, digest, data in rows:
+            if cache.knows(path):
+                continue
+            summary = _decode_summary(data)
+            if (summary is None or summary.path != path or summary.digest != digest
+                    or summary.skipped == over_budget):
+                continue  # Malformed, or not the file it claims to be; the scan re-parses it
+            cache.seed(path, size, digest, summary)
+            seeded += 1
+        return seeded
+
+
+def _decode_summary(data) -> Optional[FileSummary]:
+    """A stored summary, or None if the blob isn't a well-formed record."""
+    try:
+        return FileSummary.from_record(marshal.loads(data))
+    except (ValueError, EOFError, TypeError):
+        return None
+
+
+def _size(path) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return -1
@@ -0,0 +1,149 @@
+"""
+Reading source files for analysis: bytes in, limits enforced, failures kept.
+
+Files are read as bytes, memory-mapped once they are large, and handed to
+ast.parse undecoded so the encoding cookie and BOM are honoured exactly as
+the interpreter honours them.
+
+Generated code (protobuf stubs, vendored bundles) can be tens of megabytes.
+Files over the size or line limit are not parsed. One regex pass collects
+every identifier in them instead, and the analyzer treats those names as
+used, so nothing such a file references is reported dead. The same applies
+to files that fail to parse or run over their time budget.
+"""
+import mmap
+import os
+import re
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from typing import NamedTuple, Tuple
+
+# Smaller files are cheaper to read() than to map
+MMAP_MIN_BYTES = 1 << 20
+# Oversized files are scanned for names in windows of about this size
+SCAN_WINDOW_BYTES = 1 << 20
+
+_IDENTIFIER = re.compile(rb'[A-Za-z_][A-Za-z0-9_]*')
+_SIZE = re.compile(r'(\d+)\s*([kKmMgG]?)[bB]?')
+_SIZE_UNITS = {'': 1, 'k': 1 << 10, 'm': 1 << 20, 'g': 1 << 30}
+
+
+class Limits(NamedTuple):
+    """Per-file ingestion limits; 0 disables a limit."""
+    max_bytes: int = 2 << 20
+    max_lines: int = 50_000
+    time_budget: float = 10.0  # seconds for parse + visit
+
+
+DEFAULT_LIMITS = Limits()
+
+
+class SkipFile(Exception):
+    """A file won't be analyzed; str() is the reason shown in the report."""
+
+
+def parse_size(text: str) -> int:
+    """'500000', '512K', '2M' or '1G' -> bytes."""
+    m = _SIZE.fullmatch(text.strip())
+    if m is None:
+        raise ValueError(f"invalid size {text!r} (expected e.g. 500000, 512K or 2M)")
+    return int(m.group(1)) * _SIZE_UNITS[m.group(2).lower()]
+
+
+@contextmanager
+def open_source(path):
+    """The file's bytes (an mmap for large files), valid inside the with block."""
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < MMAP_MIN_BYTES:
+            yield f.read()
+            return
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield data
+        finally:
+            data.close()
+
+
+def decode_source(data) -> str:
+    """Decode source bytes the way the interpreter would (cookie, BOM, utf-8 default).
+
+    Raises SyntaxError for an unknown encoding and UnicodeDecodeError for bad bytes.
+    """
+    # The cookie can only be on the first two lines
+    if b'coding' not in data[:512]:
+        return bytes(data).decode('utf-8-sig')
+    import io
+    import tokenize
+
+    encoding, _ = tokenize.detect_encoding(io.BytesIO(data[:512]).readline)
+    return bytes(data).decode(encoding)
+
+
+def check_limits(data, limits: Limits):
+    """Raise SkipFile if the source is over the size or line limit."""
+    if limits.max_bytes and len(data) > limits.max_bytes:
+        raise SkipFile(f"{len(data):,} bytes, over the {limits.max_bytes:,} byte limit")
+    if limits.max_lines:
+        lines = sum(data[start:end].count(b'\n') for start, end in _windows(data))
+        if lines > limits.max_lines:
+            raise SkipFile(f"{lines:,} lines, over the {limits.max_lines:,} line limit")
+
+
+def _windows(data):
+    """(start, end) spans of about SCAN_WINDOW_BYTES, split after a newline."""
+    start = 0
+    while start < len(data):
+        end = data.find(b'\n', start + SCAN_WINDOW_BYTES)
+        end = len(data) if end == -1 else end + 1
+        yield start, end
+        start = end
+
+
+def names_in(data) -> Tuple[str, ...]:
+    """Every ASCII identifier in the source, including those in strings and comments."""
+    names = set()
+    for start, end in _windows(data):
+        names.update(_IDENTIFIER.findall(data, start, end))
+    return tuple(sorted(name.decode('ascii') for name in names))
+
+
+def budget_reason(seconds: float) -> str:
+    """Skip reason for a file that ran past the time budget.
+
+    Unlike the size and line limits this depends on machine load, so
+    summaries skipped for it must not be cached.
+    """
+    return f"over the {seconds:g}s time budget"
+
+
+@contextmanager
+def time_budget(seconds: float):
+    """Raise SkipFile if the block runs for longer than seconds (0 = unlimited).
+
+    On POSIX in the main thread (worker processes, --jobs 1) a timer interrupts
+    the visitor; elsewhere the budget is only checked when the block ends.
+    ast.parse itself can't be interrupted, so a slow parse is caught when it returns.
+    """
+    if not seconds:
+        yield
+        return
+    reason = budget_reason(seconds)
+    started = time.perf_counter()
+    preempt = hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread()
+    if preempt:
+        def expire(signum, frame):
+            raise SkipFile(reason)
+
+        previous = signal.signal(signal.SIGALRM, expire)
+        signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        if preempt:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+    if time.perf_counter() - started > seconds:
+        raise SkipFile(reason)
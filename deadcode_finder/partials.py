@@ -0,0 +1,139 @@
+"""
+Partial results for sharded scans.
+
+`cli.py scan --shard i/N --emit-partial out.bin` writes one of these per CI
+node; `cli.py merge *.bin` loads them and makes the cross-file dead-code
+decision once, over every file. A partial holds FileSummaries only, so merging
+never re-parses source.
+
+Layout: a fixed header (magic, format version, marshal version) followed by a
+zlib-compressed marshal body. Symbol names are interned before writing, which
+lets marshal store each distinct name once per partial.
+"""
+import marshal
+import os
+import struct
+import zlib
+from typing import Dict, List, Tuple
+
+from deadcode_finder.analyzer import FileSummary
+from deadcode_finder.records import is_rows
+
+PARTIAL_MAGIC = b'DCPART'
+# Bump whenever the body layout or FileSummary's fields change.
+PARTIAL_VERSION = 4
+_HEADER = struct.Struct('<6sHH')
+
+
+class PartialFormatError(ValueError):
+    """Raised when a file is not a partial this version can read."""
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """Parse 'i/N' (1-based) into (i, N)."""
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"shard must look like i/N, got {spec!r}")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"shard index must be between 1 and N, got {spec!r}")
+    return index, count
+
+
+class Partial:
+    """One shard's summaries, with the walk position of each file in the whole tree."""
+
+    def __init__(self, root: str, shard: Tuple[int, int], total_files: int,
+                 entries: List[Tuple[int, FileSummary]]):
+        self.root = root
+        self.shard = shard
+        self.total_files = total_files
+        self.entries = entries  # (walk position, summary), paths relative to root
+
+
+def write_partial(path, analyzer):
+    """Write the analyzer's shard summaries, with paths made relative to its root."""
+    root = str(analyzer.root)
+    fields = FileSummary.__slots__
+    rows = []
+    for key, summary in analyzer.summaries.items():
+        summary.intern_names()
+        record = [getattr(summary, field) for field in fields]
+        record[fields.index('path')] = os.path.relpath(summary.path, root)
+        rows.append((analyzer.walk_positions[key], tuple(record)))
+
+    body = {
+        'root': root,
+        'shard': tuple(analyzer.shard or (1, 1)),
+        'total_files': analyzer.walked_files,
+        'fields': fields,
+        'rows': rows,
+    }
+    data = zlib.compress(marshal.dumps(body), 6)
+    tmp = str(path) + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(_HEADER.pack(PARTIAL_MAGIC, PARTIAL_VERSION, marshal.version))
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def read_partial(path, root=None) -> Partial:
+    """Load a partial; summary paths are joined onto `root` (default: the recorded root)."""
+    with open(path, 'rb') as f:
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise PartialFormatError(f"{path}: not a deadcode partial")
+        magic, version, marshal_version = _HEADER.unpack(header)
+        if magic != PARTIAL_MAGIC:
+            raise PartialFormatError(f"{path}: not a deadcode partial")
+        if version != PARTIAL_VERSION or marshal_version > marshal.version:
+            raise PartialFormatError(f"{path}: partial format {version} is not supported "
+                                     f"(expected {PARTIAL_VERSION}); re-run the shard")
+        try:
+            body = marshal.loads(zlib.decompress(f.read()))
+        except (zlib.error, ValueError, EOFError, TypeError) as e:
+            raise PartialFormatError(f"{path}: corrupt partial ({e})")
+
+    # Partials are passed between CI jobs, so the body is checked like a cache would be
+    if not (type(body) is dict and type(body.get('root')) is str
+            and is_rows((body.get('shard'),), (int, int)) and type(body.get('total_files')) is int
+            and type(body.get('fields')) is tuple and type(body.get('rows')) is list):
+        raise PartialFormatError(f"{path}: corrupt partial (malformed body)")
+    if body['fields'] != FileSummary.__slots__:
+        raise PartialFormatError(f"{path}: written by an incompatible version; re-run the shard")
+    base = root if root is not None else body['root']
+    entries = []
+    for row in body['rows']:
+        if type(row) is not tuple or len(row) != 2 or type(row[0]) is not int:
+            raise PartialFormatError(f"{path}: corrupt partial (malformed row)")
+        try:
+            summary = FileSummary.from_record(row[1])
+        except ValueError as e:
+            raise PartialFormatError(f"{path}: corrupt partial ({e})")
+        summary.path = os.path.join(base, summary.path)
+        entries.append((row[0], summary))
+    return Partial(base, tuple(body['shard']), body['total_files'], entries)
+
+
+def merge_partials(partials: List[Partial]) -> List[FileSummary]:
+    """Summaries from every shard in single-node walk order; checks the shards fit together."""
+    if not partials:
+        raise ValueError("no partials to merge")
+    count = partials[0].shard[1]
+    seen: Dict[int, Partial] = {}
+    for partial in partials:
+        index, n = partial.shard
+        if n != count:
+            raise ValueError(f"partials come from different shard counts ({n} and {count})")
+        if partial.total_files != partials[0].total_files:
+            raise ValueError("partials were produced from different trees (file counts differ)")
+        if index in seen:
+            raise ValueError(f"shard {index}/{count} was given twice")
+        seen[index] = partial
+    missing = sorted(set(range(1, count + 1)) - seen.keys())
+    if missing:
+        raise ValueError("missing shard(s): " + ", ".join(f"{i}/{count}" for i in missing))
+
+    entries = [entry for partial in partials for entry in partial.entries]
+    entries.sort(key=lambda entry: entry[0])
+    return [summary for _, summary in entries]
@@ -0,0 +1,94 @@
+"""
+Opt-in instrumentation for --profile.
+
+The analyzer only touches a Profiler when one is attached, so a normal run
+pays for a couple of `is None` checks and nothing else.
+"""
+import heapq
+import json
+import time
+from contextlib import contextmanager
+from typing import Dict, IO, Iterable, Iterator
+
+# Per-file timings recorded by the workers, summed across processes
+FILE_PHASES = ("read", "parse", "visit")
+
+
+class Profiler:
+    """Accumulates wall time per phase and read/parse/visit time per file."""
+
+    def __init__(self, top_n: int = 10):
+        self.top_n = top_n
+        self.phases: Dict[str, float] = {}
+        self.file_totals = dict.fromkeys(FILE_PHASES, 0.0)
+        self.file_times = []  # (parse + visit, path, read, parse, visit)
+        self.started = time.perf_counter()
+
+    def add(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def timed_iter(self, name: str, iterable: Iterable) -> Iterator:
+        """Yield from iterable, charging only the time spent producing items to `name`."""
+        it = iter(iterable)
+        clock = time.perf_counter
+        while True:
+            started = clock()
+            try:
+                item = next(it)
+            except StopIteration:
+                self.add(name, clock() - started)
+                return
+            self.add(name, clock() - started)
+            yield item
+
+    def record_file(self, path: str, times: Dict[str, float]):
+        for key in FILE_PHASES:
+            self.file_totals[key] += times.get(key, 0.0)
+        self.file_times.append((times.get("parse", 0.0) + times.get("visit", 0.0), path,
+                                times.get("read", 0.0), times.get("parse", 0.0),
+                                times.get("visit", 0.0)))
+
+    def slowest_files(self):
+        return [
+            {"path": path, "read": round(read, 6), "parse": round(parse, 6),
+             "visit": round(visit, 6), "total": round(total, 6)}
+            for total, path, read, parse, visit in heapq.nlargest(self.top_n, self.file_times)
+        ]
+
+    def to_dict(self) -> Dict:
+        elapsed = time.perf_counter() - self.started
+        files = len(self.file_times)
+        return {
+            "total_seconds": round(elapsed, 6),
+            "phases": {name: round(seconds, 6) for name, seconds in self.phases.items()},
+            "files_parsed": files,
+            "per_file_totals": {name: round(seconds, 6) for name, seconds in self.file_totals.items()},
+            "slowest_files": self.slowest_files(),
+        }
+
+    def write_json(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+            f.write("\n")
+
+    def print_summary(self, out: IO[str]):
+        data = self.to_dict()
+        print(f"[*] Profile ({data['total_seconds']:.2f}s total)", file=out)
+        for name, seconds in data["phases"].items():
+            print(f"    {name:<14} {seconds:9.3f}s", file=out)
+        # Summed over worker processes, so these can exceed wall time with --jobs > 1
+        totals = data["per_file_totals"]
+        print(f"    per file       read {totals['read']:.3f}s  parse {totals['parse']:.3f}s  "
+              f"visit {totals['visit']:.3f}s  ({data['files_parsed']} files, cumulative)", file=out)
+        if data["slowest_files"]:
+            print(f"[*] Slowest {len(data['slowest_files'])} files (parse + visit):", file=out)
+            for entry in data["slowest_files"]:
+                print(f"    {entry['total'] * 1000:8.1f} ms  {entry['path']}", file=out)
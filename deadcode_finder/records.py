@@ -0,0 +1,123 @@
+"""
+Compact storage for analyzer results.
+
+File paths are interned once into a PathTable and referred to by integer id;
+definitions live in array-backed columns instead of one tuple per def. The
+report dicts the template expects are only materialized by get_report().
+"""
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+_ID = 'i'
+
+
+def intern_names(names: Iterable[str]) -> Tuple[str, ...]:
+    """Tuple of interned names: one shared string per distinct symbol across all files."""
+    return tuple(sys.intern(name) for name in names)
+
+
+# Shape checks for records read back from disk (caches, indexes, history).
+# These files can come from a checkout or another CI job, so nothing in them
+# is trusted until it has the exact types the analyzer produces.
+
+def is_names(value) -> bool:
+    """A tuple of strings."""
+    return type(value) is tuple and all(type(name) is str for name in value)
+
+
+def is_rows(value, shape: Tuple[type, ...]) -> bool:
+    """A tuple of tuples whose items have exactly the types in shape, e.g. (str, int)."""
+    width = len(shape)
+    return type(value) is tuple and all(
+        type(row) is tuple and len(row) == width
+        and all(type(item) is kind for item, kind in zip(row, shape))
+        for row in value)
+
+
+def is_sites(value) -> bool:
+    """{owner: ((names), (lines))}, as FileSummary.sites holds them."""
+    return type(value) is dict and all(
+        type(owner) is str and type(entry) is tuple and len(entry) == 2
+        and is_names(entry[0]) and type(entry[1]) is tuple and len(entry[0]) == len(entry[1])
+        and all(type(line) is int for line in entry[1])
+        for owner, entry in value.items())
+
+
+class PathTable:
+    """Interns file paths to dense integer ids; each path string is stored once."""
+
+    __slots__ = ('ids', 'paths')
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.paths: List[str] = []
+
+    def intern(self, path: str) -> int:
+        pid = self.ids.get(path)
+        if pid is None:
+            pid = len(self.paths)
+            self.ids[path] = pid
+            self.paths.append(path)
+        return pid
+
+    def __getitem__(self, pid: int) -> str:
+        return self.paths[pid]
+
+    def __len__(self):
+        return len(self.paths)
+
+
+class DefTable:
+    """Column store of definitions: qualified name -> row, with path id and line in int arrays.
+
+    Rows are keyed by qualified name (module.Class.method), so same-named defs
+    in different modules or classes each keep their own row, and reachability
+    is decided per row; the bare name is kept alongside for reports. A
+    qualified name defined twice keeps its first row and takes the last
+    definition's location.
+    """
+
+    __slots__ = ('index', 'names', 'quals', 'path_ids', 'lines')
+
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.names: List[str] = []
+        self.quals: List[str] = []
+        self.path_ids = array(_ID)
+        self.lines = array(_ID)
+
+    def add(self, qual: str, name: str, path_id: int, line: int):
+        row = self.index.get(qual)
+        if row is None:
+            self.index[qual] = len(self.names)
+            self.names.append(name)
+            self.quals.append(qual)
+            self.path_ids.append(path_id)
+            self.lines.append(line)
+        else:
+            self.path_ids[row] = path_id
+            self.lines[row] = line
+
+    def __contains__(self, qual: str) -> bool:
+        return qual in self.index
+
+    def __len__(self):
+        return len(self.names)
+
+    def without_paths(self, path_ids) -> 'DefTable':
+        """Copy of the table minus the rows located in any of path_ids (files being replaced)."""
+        table = DefTable()
+        for row, path_id in enumerate(self.path_ids):
+            if path_id not in path_ids:
+                table.add(self.quals[row], self.names[row], path_id, self.lines[row])
+        return table
+
+    def rows_where_missing(self, quals) -> array:
+        """Rows whose qualified name is not in `quals` (e.g. the reachable set)."""
+        return array(_ID, [row for row, qual in enumerate(self.quals) if qual not in quals])
+
+    def materialize(self, rows: Iterable[int], paths: PathTable) -> Iterator[Tuple[str, int, str]]:
+        """(file, line, name) tuples for the given rows, in the report's shape."""
+        for row in rows:
+            yield paths[self.path_ids[row]], self.lines[row], self.names[row]
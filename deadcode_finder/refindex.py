@@ -0,0 +1,414 @@
+"""
+Persisted reverse-reference index, used by --since and who-uses.
+
+A full scan records, per file, its module name, the defs it contains (with
+qualified names), the names it roots (module-level uses, entry points,
+decorated defs), the reference sites of each def and its from-imports.
+Reverse maps go from a reference key (see call_graph.Scopes) to the files
+that load it, so liveness is per qualified def and resolves loads exactly as
+the full reference graph does.
+
+A PR check then parses only the changed files, swaps their entries in, and
+re-decides liveness just for the defs the change could have affected:
+whatever the old or new version of a changed file defines or can refer to,
+and, transitively, whatever a def whose status flipped refers to. Adding or
+removing a module, or changing a star import, can re-resolve loads in any
+file; then liveness is recomputed over the whole index, still without
+parsing anything.
+
+who-uses answers from the same maps: the reverse maps narrow a def down to
+the handful of files that can refer to it, whose sites give the exact lines.
+
+The index is saved as marshal data next to the summary cache, and for the
+same reason: it lives in the scanned tree, so it is read as plain data and
+every entry is shape-checked. Only the per-file entries and the live set are
+stored; the reverse maps are rebuilt from them on load.
+"""
+import marshal
+import os
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from deadcode_finder.call_graph import (ANY_MODULE, MAGIC_METHODS, FileRefs, Key, Scopes,
+                                        build_reference_graph, file_refs, load_key, qualify)
+from deadcode_finder.records import is_names, is_rows, is_sites
+
+INDEX_FILE_NAME = 'refindex.marshal'
+# Bump whenever the entry layout (call_graph.FileRefs) changes.
+INDEX_VERSION = 4
+
+MODULE_LEVEL = '<module>'
+
+__all__ = ['FileRefs', 'INDEX_FILE_NAME', 'INDEX_VERSION', 'ReferenceIndex', 'file_refs']
+
+
+def _is_file_refs(refs) -> bool:
+    return (type(refs) is tuple and len(refs) == 6 and type(refs[0]) is str
+            and is_rows(refs[1], (str, int, str)) and is_rows(refs[2], (str, int, str))
+            and is_names(refs[3]) and is_sites(refs[4]) and is_rows(refs[5], (str, str, str)))
+
+
+def _site_name(module: str, key: Key) -> Optional[str]:
+    """How a load with key is spelled in the sites of a file of module, if it can be."""
+    if key[0] == ANY_MODULE:
+        return '.' + key[1]
+    return key[1] if key[0] == module else None
+
+
+class ReferenceIndex:
+    """Reference key -> loading files, plus each file's own defs, references and imports."""
+
+    def __init__(self, base: Optional[str] = None):
+        self.base = base  # git commit the indexed tree corresponds to
+        self.files: Dict[str, FileRefs] = {}
+        self.modules: Dict[str, Set[str]] = {}  # module -> its files
+        self.scopes = Scopes()
+        self.referrers: Dict[Key, Set[str]] = {}  # key -> files where some def loads it
+        self.rooted: Dict[Key, Set[str]] = {}  # key -> files where it is a root
+        self.definers: Dict[str, Set[str]] = {}  # bare name -> files defining it
+        self.defined: Dict[str, Tuple[str, str]] = {}  # qualified def -> (module, bare name)
+        self.live: Set[str] = set()  # qualified defs reachable as of the last scan or refresh
+
+    @classmethod
+    def from_analyzer(cls, analyzer, base: Optional[str] = None) -> 'ReferenceIndex':
+        index = cls(base)
+        for path, summary in analyzer.summaries.items():
+            index.add_file(path, file_refs(summary, analyzer.module_name(path)))
+        index.live = {qual for qual in analyzer.reachable if qual in index.defined}
+        return index
+
+    # -- persistence -------------------------------------------------------
+
+    @staticmethod
+    def path_in(cache_dir) -> Path:
+        return Path(cache_dir) / INDEX_FILE_NAME
+
+    def save(self, cache_dir):
+        path = self.path_in(cache_dir)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        with open(tmp, 'wb') as f:
+            marshal.dump({'version': INDEX_VERSION, 'base': self.base,
+                          'files': {path: (module, tuple(map(tuple, functions)),
+                                           tuple(map(tuple, classes)), tuple(roots), dict(sites),
+                                           tuple(map(tuple, imports)))
+                                    for path, (module, functions, classes, roots, sites, imports)
+                                    in self.files.items()},
+                          'live': tuple(self.live)}, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, cache_dir) -> Optional['ReferenceIndex']:
+        """The saved index, or None if there is none, it is malformed or another version wrote it."""
+        try:
+            with open(cls.path_in(cache_dir), 'rb') as f:
+                payload = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if type(payload) is not dict or payload.get('version') != INDEX_VERSION:
+            return None
+        base, files, live = payload.get('base'), payload.get('files'), payload.get('live')
+        if (not (base is None or type(base) is str) or type(files) is not dict
+                or not is_names(live)
+                or not all(type(path) is str and _is_file_refs(refs)
+                           for path, refs in files.items())):
+            return None
+        index = cls(base)
+        for path, refs in files.items():
+            index.add_file(path, refs)
+        index.live = set(live)
+        return index
+
+    # -- maintenance -------------------------------------------------------
+
+    def add_file(self, path: str, refs: FileRefs):
+        self.files[path] = refs
+        module, functions, classes, roots, sites, _ = refs
+        self.modules.setdefault(module, set()).add(path)
+        self._set_module(module)
+        for name in roots:
+            self.rooted.setdefault(load_key(module, name), set()).add(path)
+        for owner, (names, _) in sites.items():
+            if owner:
+                for name in names:
+                    self.referrers.setdefault(load_key(module, name), set()).add(path)
+
+    def remove_file(self, path: str) -> Optional[FileRefs]:
+        refs = self.files.pop(path, None)
+        if refs is None:
+            return None
+        module, functions, classes, roots, sites, _ = refs
+        paths = self.modules[module]
+        paths.discard(path)
+        if not paths:
+            del self.modules[module]
+        for name, _, qual in functions + classes:
+            self.defined.pop(qualify(module, qual), None)
+        self._set_module(module)
+        referenced = [load_key(module, name) for owner, (names, _) in sites.items() if owner
+                      for name in names]
+        for table, keys in ((self.definers, [name for name, _, _ in functions + classes]),
+                            (self.rooted, [load_key(module, name) for name in roots]),
+                            (self.referrers, referenced)):
+            for key in keys:
+                paths = table.get(key)
+                if paths is not None:
+                    paths.discard(path)
+                    if not paths:
+                        del table[key]
+        return refs
+
+    def _set_module(self, module: str):
+        """Re-register a module's defs after one of its files came or went."""
+        entries = [self.files[path] for path in sorted(self.modules.get(module, ()))]
+        self.scopes.set_module(module, entries)
+        for path, refs in zip(sorted(self.modules.get(module, ())), entries):
+            for name, _, qual in refs[1] + refs[2]:
+                self.definers.setdefault(name, set()).add(path)
+                self.defined[qualify(module, qual)] = (module, name)
+
+    # -- queries -----------------------------------------------------------
+
+    def _loaders(self, key: Key) -> Iterator[str]:
+        """Qualified defs whose bodies load key."""
+        for path in self.referrers.get(key, ()):
+            module, _, _, _, sites, _ = self.files[path]
+            spelled = _site_name(module, key)
+            for owner, (names, _) in sites.items():
+                if owner and spelled in names:
+                    yield qualify(module, owner)
+
+    def is_live(self, qual: str) -> bool:
+        """Walk referrers backwards from a def until a root is found; same rules as the full graph."""
+        seen = {qual}
+        queue = deque([qual])
+        while queue:
+            module, name = self.defined[queue.popleft()]
+            if name in MAGIC_METHODS:
+                return True
+            for key in self.scopes.keys_reaching(module, name):
+                if key in self.rooted:
+                    return True
+                for referrer in self._loaders(key):
+                    if referrer not in seen:
+                        seen.add(referrer)
+                        queue.append(referrer)
+        return False
+
+    def why_live(self, qual: str) -> Optional[List[str]]:
+        """Shortest chain of qualified defs from a root down to qual, or None if it is unreachable.
+
+        The first element describes the root (e.g. 'module-level code of pkg.main').
+        """
+        parents: Dict[str, Optional[str]] = {qual: None}
+        queue = deque([qual])
+        while queue:
+            symbol = queue.popleft()
+            module, name = self.defined[symbol]
+            keys = self.scopes.keys_reaching(module, name)
+            reason = self._root_reason(name, keys)
+            if reason is not None:
+                chain = [reason, symbol]
+                while parents[chain[-1]] is not None:
+                    chain.append(parents[chain[-1]])
+                return chain
+            for key in sorted(keys):
+                for referrer in sorted(self._loaders(key)):
+                    if referrer not in parents:
+                        parents[referrer] = symbol
+                        queue.append(referrer)
+        return None
+
+    def _root_reason(self, name: str, keys: Set[Key]) -> Optional[str]:
+        if name in MAGIC_METHODS:
+            return 'magic method'
+        rooted = sorted((path, key) for key in keys for path in self.rooted.get(key, ()))
+        for path, key in rooted:
+            module, _, _, _, sites, _ = self.files[path]
+            if _site_name(module, key) in sites.get('', ((), ()))[0]:
+                return f'module-level code of {module or path}'
+        if rooted:
+            path = rooted[0][0]
+            return f'entry point or decorated def in {self.files[path][0] or path}'
+        return None
+
+    def locate(self, name: str) -> List[Tuple[str, str, int, str]]:
+        """(kind, path, line, qualified name) for every definition of name."""
+        sites = []
+        for path in sorted(self.definers.get(name, ())):
+            module, functions, classes = self.files[path][:3]
+            for kind, defs in (('function', functions), ('class', classes)):
+                sites += [(kind, path, line, qualify(module, qual))
+                          for def_name, line, qual in defs if def_name == name]
+        return sites
+
+    def definitions_of(self, qual: str) -> List[Tuple[str, str, int, str]]:
+        """(kind, path, line, bare name) for the definition(s) with this qualified name."""
+        entry = self.defined.get(qual)
+        if entry is None:
+            return []
+        name = entry[1]
+        return [(kind, path, line, name) for kind, path, line, found in self.locate(name)
+                if found == qual]
+
+    def _references(self, qual: str) -> Set[Tuple[str, int, str, Key]]:
+        module, name = self.defined[qual]
+        found = set()
+        for key in self.scopes.keys_reaching(module, name):
+            for path in self.referrers.get(key, set()) | self.rooted.get(key, set()):
+                file_module, _, _, _, sites, _ = self.files[path]
+                spelled = _site_name(file_module, key)
+                for owner, (names, lines) in sites.items():
+                    for ref, line in zip(names, lines):
+                        if ref == spelled:
+                            found.add((path, line, qualify(file_module, owner or MODULE_LEVEL), key))
+        return found
+
+    def references_to(self, qual: str) -> List[Tuple[str, int, str]]:
+        """(path, line, qualified referrer) for every site that can load the def qual."""
+        return sorted({site[:3] for site in self._references(qual)})
+
+    def who_uses(self, symbol: str) -> Dict:
+        """Definitions matching symbol (bare or dotted suffix), their reference sites and why they are alive."""
+        name = symbol.rpartition('.')[2]
+        definitions = [site for site in self.locate(name)
+                       if site[3] == symbol or site[3].endswith('.' + symbol) or symbol == name]
+        sites = set()
+        chain = None
+        for _, _, _, qual in definitions:
+            sites |= self._references(qual)
+            if chain is None:
+                chain = self.why_live(qual)
+        return {
+            'symbol': symbol,
+            'name': name,
+            'definitions': [{'kind': kind, 'file': path, 'line': line, 'qualname': qual}
+                            for kind, path, line, qual in definitions],
+            # Attribute loads and imports from outside the scan can mean any same-named def
+            'ambiguous': len(definitions) > 1
+                         or any(len(self.scopes.targets(key)) > 1 for _, _, _, key in sites),
+            'references': [{'file': path, 'line': line, 'from': referrer}
+                           for path, line, referrer in sorted({site[:3] for site in sites})],
+            'live': chain is not None,
+            'alive_via': chain,
+        }
+
+    # -- incremental updates -------------------------------------------------
+
+    def _touched(self, refs: FileRefs) -> Set[str]:
+        """Defs an entry defines or can refer to, under the current scopes."""
+        module, functions, classes, roots, sites, imports = refs
+        targets = self.scopes.targets
+        touched = {qualify(module, qual) for _, _, qual in functions + classes}
+        for name in roots:
+            touched.update(targets(load_key(module, name)))
+        for names, _ in sites.values():
+            for name in names:
+                touched.update(targets(load_key(module, name)))
+        # Other modules can reach these through this one
+        for bound, source, name in imports:
+            if bound != '*':
+                touched.update(targets((source, name)))
+        return touched
+
+    def _swap(self, changes: Dict[str, Optional[FileRefs]]) -> Tuple[Set[str], bool]:
+        """Replace the entries of changed files (None = deleted).
+
+        Returns the defs whose liveness may have changed, and whether the
+        change can re-resolve loads elsewhere too (a module came or went, or
+        a star import changed), so that every def needs re-deciding.
+        """
+        candidates: Set[str] = set()
+        modules = set(self.modules)
+        rescan = False
+        for path, refs in changes.items():
+            for entry in (self.files.get(path), refs):
+                if entry is not None:
+                    rescan = rescan or any(bound == '*' for bound, _, _ in entry[5])
+            old = self.files.get(path)
+            if old is not None:
+                # Resolved before the swap: what the old version referred to may have lost a reference
+                candidates |= self._touched(old)
+        for path, refs in changes.items():
+            self.remove_file(path)
+            if refs is not None:
+                self.add_file(path, refs)
+        for refs in changes.values():
+            if refs is not None:
+                candidates |= self._touched(refs)
+        return candidates, rescan or set(self.modules) != modules
+
+    def _callees(self, qual: str) -> Iterator[str]:
+        """Defs the body of the def qual can refer to."""
+        entry = self.defined.get(qual)
+        if entry is None:
+            return
+        module = entry[0]
+        owner = qual[len(module) + 1:] if module else qual
+        for path in self.modules.get(module, ()):
+            site = self.files[path][4].get(owner)
+            if site is not None:
+                for name in site[0]:
+                    yield from self.scopes.targets(load_key(module, name))
+
+    def _recheck(self, candidates: Set[str]) -> Tuple[Set[str], Set[str]]:
+        """Re-decide liveness of candidates and of whatever a def that flips refers to.
+
+        Returns (candidates found dead, defs that came alive). is_live() searches
+        the current maps, so the order of the checks doesn't matter.
+        """
+        for qual in candidates:
+            if qual not in self.defined:
+                self.live.discard(qual)  # No longer defined anywhere
+        dead: Set[str] = set()
+        revived: Set[str] = set()
+        checked: Set[str] = set()
+        queue = [qual for qual in candidates if qual in self.defined]
+        while queue:
+            qual = queue.pop()
+            if qual in checked:
+                continue
+            checked.add(qual)
+            live = self.is_live(qual)
+            if not live:
+                dead.add(qual)
+            if live == (qual in self.live):
+                continue
+            if live:
+                self.live.add(qual)
+                revived.add(qual)
+            else:
+                self.live.discard(qual)
+            queue.extend(self._callees(qual))
+        return dead, revived
+
+    def _recompute(self, candidates: Set[str]) -> Tuple[Set[str], Set[str]]:
+        """_recheck() for every def at once, from one forward pass over the whole index."""
+        before = self.live
+        reachable = build_reference_graph(self.files.values()).reachable()
+        self.live = {qual for qual in reachable if qual in self.defined}
+        dead = {qual for qual in self.defined
+                if qual not in self.live and (qual in before or qual in candidates)}
+        return dead, self.live - before
+
+    def apply(self, changes: Dict[str, Optional[FileRefs]]) -> Set[str]:
+        """Swap in new entries for changed files (None = deleted) and return the affected defs now dead."""
+        candidates, rescan = self._swap(changes)
+        dead, _ = self._recompute(candidates) if rescan else self._recheck(candidates)
+        return dead
+
+    def refresh(self, changes: Dict[str, Optional[FileRefs]]) -> Tuple[Set[str], Set[str]]:
+        """Swap in changed files and re-decide liveness wherever it can have changed.
+
+        Returns (defs that died, defs that came alive). A def's status can only
+        change if the change touched it, or if it is referred to by a def whose
+        status changed, so only those are re-checked.
+        """
+        before = set(self.live)
+        candidates, rescan = self._swap(changes)
+        if rescan:
+            self._recompute(candidates)
+        else:
+            self._recheck(candidates)
+        return before - self.live, self.live - before
@@ -2,9 +2,30 @@
 Code removal functionality for dead code elimination.
 """
 import ast
+import io
 import os
+import threading
+import tokenize
 from pathlib import Path
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional
+
+from deadcode_finder.backup_store import BackupStore
+
+
+class FileLocks:
+    """One lock per file, so concurrent edits to the same file are serialized."""
+    
+    def __init__(self):
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+    
+    def get(self, file_path: str) -> threading.Lock:
+        key = os.path.realpath(file_path)
+        with self._guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
 
 
 class CodeRemover:
@@ -14,171 +35,185 @@ class CodeRemover:
         self.root_path = Path(root_path)
         self.backup_dir = self.root_path / '.deadcode_backups'
         self.backup_dir.mkdir(exist_ok=True)
+        self.backups = BackupStore(self.backup_dir, root=self.root_path)
+        self.file_locks = FileLocks()
         self.changes_log = []
     
-    def backup_file(self, file_path: str) -> str:
-        """Create a backup of the file before modification."""
-        src_path = Path(file_path)
-        backup_path = self.backup_dir / f"{src_path.name}.backup"
-        
-        # If backup already exists, add timestamp
-        if backup_path.exists():
-            from datetime import datetime
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_path = self.backup_dir / f"{src_path.name}.{timestamp}.backup"
-        
-        with open(src_path, 'r', encoding='utf-8') as src:
-            with open(backup_path, 'w', encoding='utf-8') as dst:
-                dst.write(src.read())
-        
-        return str(backup_path)
+    def backup_file(self, file_path: str, data: Optional[bytes] = None) -> str:
+        """Snapshot the file before modification; returns the change id used to restore it."""
+        return self.backups.save(file_path, data)
     
     def remove_import(self, file_path: str, import_name: str, line_number: int) -> Dict:
         """Remove a specific import from a file."""
-        try:
-            # Ensure line_number is an integer
-            line_number = int(line_number)
-            backup = self.backup_file(file_path)
-            
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            
-            if 0 < line_number <= len(lines):
-                removed_line = lines[line_number - 1]
-                del lines[line_number - 1]
-                
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.writelines(lines)
-                
-                change = {
-                    'status': 'success',
-                    'file': file_path,
-                    'line': line_number,
-                    'type': 'import',
-                    'removed': removed_line.strip(),
-                    'backup': backup
-                }
-                self.changes_log.append(change)
-                return change
-            else:
-                return {'status': 'error', 'message': 'Invalid line number'}
-        
-        except Exception as e:
-            return {'status': 'error', 'message': str(e)}
+        return self._remove_from_file(file_path, [
+            {'type': 'import', 'name': import_name, 'line': line_number}
+        ])[0]
     
     def remove_function(self, file_path: str, function_name: str, line_number: int) -> Dict:
         """Remove a function definition from a file."""
-        try:
-            # Ensure line_number is an integer
-            line_number = int(line_number)
-            backup = self.backup_file(file_path)
-            
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            tree = ast.parse(content)
-            lines = content.splitlines(keepends=True)
-            
-            # Find the function node
-            for node in ast.walk(tree):
-                if isinstance(node, ast.FunctionDef) and node.name == function_name:
-                    if hasattr(node, 'lineno') and hasattr(node, 'end_lineno'):
-                        start_line = node.lineno - 1
-                        end_line = node.end_lineno
-                        
-                        removed_code = ''.join(lines[start_line:end_line])
-                        
-                        # Remove the function
-                        del lines[start_line:end_line]
-                        
-                        with open(file_path, 'w', encoding='utf-8') as f:
-                            f.writelines(lines)
-                        
-                        change = {
-                            'status': 'success',
-                            'file': file_path,
-                            'line': line_number,
-                            'type': 'function',
-                            'name': function_name,
-                            'removed': removed_code[:200] + '...' if len(removed_code) > 200 else removed_code,
-                            'backup': backup
-                        }
-                        self.changes_log.append(change)
-                        return change
-            
-            return {'status': 'error', 'message': f'Function {function_name} not found'}
-        
-        except Exception as e:
-            return {'status': 'error', 'message': str(e)}
+        return self._remove_from_file(file_path, [
+            {'type': 'function', 'name': function_name, 'line': line_number}
+        ])[0]
     
     def remove_class(self, file_path: str, class_name: str, line_number: int) -> Dict:
         """Remove a class definition from a file."""
+        return self._remove_from_file(file_path, [
+            {'type': 'class', 'name': class_name, 'line': line_number}
+        ])[0]
+    
+    def remove_batch(self, items: List[Dict]) -> Dict:
+        """Remove many findings at once, reading, backing up and writing each file only once.
+        
+        Each item is a dict with 'type' (import/function/class), 'file', 'name' and 'line'.
+        """
+        by_file: Dict[str, List[Dict]] = {}
+        for item in items:
+            by_file.setdefault(item.get('file'), []).append(item)
+        
+        results = []
+        for file_path, file_items in by_file.items():
+            results.extend(self._remove_from_file(file_path, file_items))
+        
+        removed = sum(1 for result in results if result['status'] == 'success')
+        return {
+            'status': 'success' if removed else 'error',
+            'message': f'Removed {removed} of {len(results)} items',
+            'removed': removed,
+            'failed': len(results) - removed,
+            'results': results
+        }
+    
+    def _remove_from_file(self, file_path: str, items: List[Dict]) -> List[Dict]:
+        """Apply every removal for one file in a single read/parse/backup/write."""
+        with self.file_locks.get(file_path):
+            return self._remove_from_file_locked(file_path, items)
+    
+    def _remove_from_file_locked(self, file_path: str, items: List[Dict]) -> List[Dict]:
         try:
-            # Ensure line_number is an integer
-            line_number = int(line_number)
-            backup = self.backup_file(file_path)
-            
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            # Read raw bytes once: they feed the backup, and keep line endings intact
+            with open(file_path, 'rb') as f:
+                raw = f.read()
+            # Honour the coding cookie or BOM, and write back in the same encoding
+            encoding, _ = tokenize.detect_encoding(io.BytesIO(raw).readline)
+            content = raw.decode(encoding)
+            # Split where the tokenizer ends lines, not at form feeds or other
+            # separators str.splitlines() knows, so numbers match the analyzer's
+            lines = io.StringIO(content, newline='').readlines()
             
-            tree = ast.parse(content)
-            lines = content.splitlines(keepends=True)
-            
-            # Find the class node
-            for node in ast.walk(tree):
-                if isinstance(node, ast.ClassDef) and node.name == class_name:
-                    if hasattr(node, 'lineno') and hasattr(node, 'end_lineno'):
-                        start_line = node.lineno - 1
-                        end_line = node.end_lineno
-                        
-                        removed_code = ''.join(lines[start_line:end_line])
-                        
-                        # Remove the class
-                        del lines[start_line:end_line]
-                        
-                        with open(file_path, 'w', encoding='utf-8') as f:
-                            f.writelines(lines)
-                        
-                        change = {
-                            'status': 'success',
-                            'file': file_path,
-                            'line': line_number,
-                            'type': 'class',
-                            'name': class_name,
-                            'removed': removed_code[:200] + '...' if len(removed_code) > 200 else removed_code,
-                            'backup': backup
-                        }
-                        self.changes_log.append(change)
-                        return change
-            
-            return {'status': 'error', 'message': f'Class {class_name} not found'}
+            defs = {}
+            if any(item.get('type') in ('function', 'class') for item in items):
+                defs = self._index_definitions(ast.parse(content))
+        except Exception as e:
+            return [{'status': 'error', 'message': str(e)} for _ in items]
+        
+        results: List[Optional[Dict]] = [None] * len(items)
+        plans = []  # (start, end, index): 0-based, end-exclusive line ranges
+        for index, item in enumerate(items):
+            try:
+                span = self._plan_removal(lines, defs, item)
+            except Exception as e:
+                span = str(e)
+            if isinstance(span, str):
+                results[index] = {'status': 'error', 'message': span}
+            else:
+                plans.append((span[0], span[1], index))
+        
+        if not plans:
+            return results
         
+        # Drop ranges nested in another one (e.g. a method inside a removed class)
+        plans.sort(key=lambda plan: (plan[0], -plan[1]))
+        kept = []
+        for plan in plans:
+            if kept and plan[1] <= kept[-1][1]:
+                continue
+            kept.append(plan)
+        
+        try:
+            backup = self.backup_file(file_path, raw)
+            removed_text = {index: ''.join(lines[start:end]) for start, end, index in plans}
+            # Bottom-up so earlier line numbers stay valid while deleting
+            for start, end, _ in reversed(kept):
+                del lines[start:end]
+            with open(file_path, 'w', encoding=encoding, newline='') as f:
+                f.writelines(lines)
         except Exception as e:
-            return {'status': 'error', 'message': str(e)}
+            for _, _, index in plans:
+                results[index] = {'status': 'error', 'message': str(e)}
+            return results
+        
+        for start, _, index in plans:
+            item = items[index]
+            code = removed_text[index]
+            if item['type'] == 'import':
+                code = code.strip()
+            elif len(code) > 200:
+                code = code[:200] + '...'
+            change = {
+                'status': 'success',
+                'file': file_path,
+                'line': int(item['line']),
+                'type': item['type'],
+                'name': item.get('name'),
+                'removed': code,
+                'backup': backup
+            }
+            self.changes_log.append(change)
+            results[index] = change
+        return results
+    
+    @staticmethod
+    def _index_definitions(tree: ast.AST) -> Dict[Tuple[str, str], List[ast.AST]]:
+        """Map (kind, name) to every matching def/class node, from a single walk."""
+        defs: Dict[Tuple[str, str], List[ast.AST]] = {}
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                defs.setdefault(('function', node.name), []).append(node)
+            elif isinstance(node, ast.ClassDef):
+                defs.setdefault(('class', node.name), []).append(node)
+        return defs
     
-    def restore_from_backup(self, backup_path: str) -> Dict:
-        """Restore a file from its backup."""
+    @staticmethod
+    def _plan_removal(lines: List[str], defs: Dict, item: Dict):
+        """Return the (start, end) line range to delete for item, or an error message."""
+        kind = item.get('type')
+        name = item.get('name') or ''
+        # Ensure line_number is an integer
+        line_number = int(item['line'])
+        
+        if kind == 'import':
+            if not 0 < line_number <= len(lines):
+                return 'Invalid line number'
+            # Guard against stale line numbers from an earlier edit
+            if name.split('.')[0] not in lines[line_number - 1]:
+                return f'Line {line_number} no longer contains import {name}'
+            return line_number - 1, line_number
+        
+        if kind in ('function', 'class'):
+            candidates = defs.get((kind, name))
+            if not candidates:
+                return f'{kind.capitalize()} {name} not found'
+            # Prefer the definition at the reported line, else the nearest one
+            node = min(candidates, key=lambda n: abs(n.lineno - line_number))
+            start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+            return start - 1, node.end_lineno
+        
+        return f'Unknown removal type: {kind}'
+    
+    def restore_from_backup(self, backup_id: str) -> Dict:
+        """Restore a file from the snapshot recorded under a change id."""
         try:
-            backup = Path(backup_path)
-            if not backup.exists():
-                return {'status': 'error', 'message': 'Backup file not found'}
-            
-            # Extract original filename from backup
-            original_name = backup.name.split('.')[0] + '.py'
-            
-            # Find the original file in the project
-            for file in self.root_path.rglob(original_name):
-                with open(backup, 'r', encoding='utf-8') as src:
-                    with open(file, 'w', encoding='utf-8') as dst:
-                        dst.write(src.read())
-                
-                return {
-                    'status': 'success',
-                    'message': f'Restored {file} from backup',
-                    'file': str(file)
-                }
+            entry = self.backups.get(backup_id)
+            if entry is None:
+                return {'status': 'error', 'message': 'Backup not found'}
             
-            return {'status': 'error', 'message': 'Original file not found'}
+            with self.file_locks.get(entry['path']):
+                file = self.backups.restore(backup_id)
+            return {
+                'status': 'success',
+                'message': f'Restored {file} from backup',
+                'file': file
+            }
         
         except Exception as e:
             return {'status': 'error', 'message': str(e)}
@@ -1,12 +1,69 @@
-from jinja2 import Template
+import json
+from functools import lru_cache
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 from pathlib import Path
 
+from deadcode_finder.findings import iter_findings
+
+TEMPLATE_DIR = Path(__file__).parent.parent / "templates"
+TEMPLATE_NAME = "report_template.html"
+
+# Above this many findings the report switches to the virtualized layout.
+VIRTUAL_THRESHOLD = 2000
+
+FINDING_TYPES = ("import", "function", "class", "variable", "unreachable")
+
+
+def build_findings_payload(report):
+    """Compact JSON for the virtualized report: file paths and types are stored once."""
+    type_ids = {kind: i for i, kind in enumerate(FINDING_TYPES)}
+    file_ids = {}
+    rows = []
+    for kind, file, line, name in iter_findings(report):
+        fid = file_ids.setdefault(file, len(file_ids))
+        rows.append([type_ids[kind], fid, line, name])
+    payload = {"types": list(FINDING_TYPES), "files": list(file_ids), "rows": rows}
+    # Keep the payload from closing the <script> tag it is embedded in
+    return json.dumps(payload, separators=(",", ":")).replace("</", "<\\/")
+
+
+class _BytecodeCache(FileSystemBytecodeCache):
+    """Jinja's on-disk bytecode cache, minus the failure when the cache directory isn't writable."""
+
+    def dump_bytecode(self, bucket):
+        try:
+            super().dump_bytecode(bucket)
+        except OSError:
+            pass
+
+
+@lru_cache(maxsize=None)
+def template_environment():
+    """Environment whose compiled templates persist across runs.
+
+    Compiling the report template costs more than rendering it. The bytecode
+    is stored in Jinja's per-user temp cache, keyed by the template source's
+    checksum, so editing the template invalidates it.
+    """
+    try:
+        cache = _BytecodeCache(pattern="deadcode-%s.cache")
+    except (OSError, RuntimeError):
+        cache = None  # No safe temp directory: compile every time
+    return Environment(loader=FileSystemLoader(str(TEMPLATE_DIR)), bytecode_cache=cache)
+
+
 class ReportGenerator:
     def __init__(self):
-        template_path = Path(__file__).parent.parent / "templates" / "report_template.html"
-        self.template = Template(template_path.read_text())
+        self.template = template_environment().get_template(TEMPLATE_NAME)
 
-    def generate(self, output_file, context):
+    def generate(self, output_file, context, mode="auto"):
+        """Render the report; mode is 'full', 'virtual' or 'auto' (virtual for large reports)."""
+        total = sum(1 for _ in iter_findings(context))
+        virtual = mode == "virtual" or (mode == "auto" and total > VIRTUAL_THRESHOLD)
+        if virtual:
+            context = dict(context, virtual=True, total_findings=total,
+                           findings_json=build_findings_payload(context))
         html = self.template.render(**context)
         Path(output_file).write_text(html, encoding="utf-8")
         print("[+] Report written to", output_file)
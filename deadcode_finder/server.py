@@ -1,18 +1,92 @@
 """
 Simple HTTP server for handling dead code removal requests.
 """
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlparse
 import json
 import os
+import queue
 import threading
 from pathlib import Path
+from deadcode_finder.findings import diff_findings, finding_dict, iter_findings
 from deadcode_finder.remover import CodeRemover
 
 
+class BadRequest(ValueError):
+    """A query the server can't act on; answered with a 400 JSON error."""
+
+
+def _count_param(query, name: str, default):
+    """A non-negative integer query parameter (negatives clamp to 0), or default if absent."""
+    raw = query.get(name, [''])[0]
+    if not raw:
+        return default
+    try:
+        return max(0, int(raw))
+    except ValueError:
+        raise BadRequest(f'?{name}= must be an integer, got {raw!r}')
+
+
+class EventBroadcaster:
+    """Fans out server-sent events to every connected report."""
+
+    def __init__(self):
+        self.subscribers = []
+        self.lock = threading.Lock()
+
+    def subscribe(self) -> queue.Queue:
+        q = queue.Queue(maxsize=100)
+        with self.lock:
+            self.subscribers.append(q)
+        return q
+
+    def unsubscribe(self, q: queue.Queue):
+        with self.lock:
+            if q in self.subscribers:
+                self.subscribers.remove(q)
+
+    def publish(self, event: str, data):
+        message = f"event: {event}\ndata: {json.dumps(data)}\n\n".encode('utf-8')
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(message)
+            except queue.Full:
+                # A stalled client shouldn't hold up the others; it can reload
+                self.unsubscribe(q)
+
+    def close(self):
+        with self.lock:
+            subscribers, self.subscribers = self.subscribers, []
+        for q in subscribers:
+            q.put(None)
+
+
 class RemovalHandler(BaseHTTPRequestHandler):
     """HTTP request handler for code removal operations."""
     
+    # HTTP/1.1 keeps the connection alive between the report's requests
+    protocol_version = 'HTTP/1.1'
+    # Idle keep-alive connections are dropped after this many seconds
+    timeout = 30
+    
     remover = None
+    events = None
+    executor = None
+    analyzer = None
+    history = None  # Optional HistoryStore behind GET /trends
+    
+    def _send_json(self, payload, status: int = 200):
+        """Send a JSON body with an explicit length so the connection can be reused."""
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
     
     def do_OPTIONS(self):
         """Handle CORS preflight requests."""
@@ -20,54 +94,176 @@ class RemovalHandler(BaseHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
         self.end_headers()
     
-    def do_POST(self):
-        """Handle POST requests for code removal."""
+    def do_GET(self):
+        """Handle GET requests: /events, /findings, /who-uses, /trends and /changes."""
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        
+        try:
+            if url.path == '/events' and self.events is not None:
+                self._stream_events()
+            elif url.path == '/findings':
+                self._send_json(self._findings_page(query))
+            elif url.path == '/who-uses':
+                self._send_json(self._who_uses(query))
+            elif url.path == '/trends':
+                self._send_json(self._trends(query))
+            elif url.path == '/changes':
+                self._send_json({'status': 'success', 'changes': self.remover.get_changes_log()})
+            else:
+                self._send_json({'status': 'error', 'message': 'Not found'}, status=404)
+        except BadRequest as e:
+            self._send_json({'status': 'error', 'message': str(e)}, status=400)
+    
+    def _findings_page(self, query) -> dict:
+        """Current findings, optionally paged with ?offset=&limit= and filtered by ?type=."""
+        if self.analyzer is None:
+            return {'status': 'error', 'message': 'No analysis results available'}
+        offset = _count_param(query, 'offset', 0)
+        limit = _count_param(query, 'limit', None)
+        findings = iter_findings(self.analyzer.get_report())
+        kind = query.get('type', [None])[0]
+        if kind:
+            findings = (f for f in findings if f[0] == kind)
+        findings = [finding_dict(f) for f in findings]
+        end = offset + limit if limit is not None else None
+        return {
+            'status': 'success',
+            'total': len(findings),
+            'offset': offset,
+            'findings': findings[offset:end]
+        }
+    
+    def _who_uses(self, query) -> dict:
+        """Definitions, reference sites and the root chain for ?symbol= (bare or dotted)."""
+        symbol = query.get('symbol', [''])[0]
+        if self.analyzer is None:
+            return {'status': 'error', 'message': 'No analysis results available'}
+        if not symbol:
+            return {'status': 'error', 'message': 'Missing ?symbol='}
+        return dict(self.analyzer.usage_index().who_uses(symbol), status='success')
+    
+    def _trends(self, query) -> dict:
+        """Recorded scans, oldest first (?limit=, default 50), or one file's findings per scan (?file=)."""
+        if self.history is None:
+            return {'status': 'error', 'message': 'No scan history (start the scan with --history)'}
+        from deadcode_finder.history import HistoryError
+
+        limit = _count_param(query, 'limit', 50)
+        file = query.get('file', [None])[0]
+        try:
+            scans = self.history.file_trend(file, limit) if file else self.history.trends(limit)
+        except HistoryError as e:
+            return {'status': 'error', 'message': str(e)}
+        return {'status': 'success', 'scans': scans}
+    
+    def _stream_events(self):
+        """Stream server-sent events until the client disconnects or the server stops."""
         self.send_response(200)
-        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
         self.send_header('Access-Control-Allow-Origin', '*')
         self.end_headers()
+        self.close_connection = True
         
+        q = self.events.subscribe()
+        try:
+            self.wfile.write(b"event: hello\ndata: {}\n\n")
+            self.wfile.flush()
+            while True:
+                try:
+                    message = q.get(timeout=15)
+                except queue.Empty:
+                    # Comment line keeps proxies and the browser from timing out
+                    message = b": keep-alive\n\n"
+                if message is None:
+                    break
+                self.wfile.write(message)
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.events.unsubscribe(q)
+    
+    def do_POST(self):
+        """Handle POST requests for code removal."""
         try:
             content_length = int(self.headers['Content-Length'])
             post_data = self.rfile.read(content_length)
             data = json.loads(post_data.decode('utf-8'))
             
-            action = data.get('action')
-            response = {'status': 'error', 'message': 'Unknown action'}
-            
-            if action == 'remove_import':
-                response = self.remover.remove_import(
-                    data['file'],
-                    data['name'],
-                    data['line']
-                )
-            elif action == 'remove_function':
-                response = self.remover.remove_function(
-                    data['file'],
-                    data['name'],
-                    data['line']
-                )
-            elif action == 'remove_class':
-                response = self.remover.remove_class(
-                    data['file'],
-                    data['name'],
-                    data['line']
-                )
-            elif action == 'restore':
-                response = self.remover.restore_from_backup(data['backup'])
-            elif action == 'get_changes':
-                response = {
-                    'status': 'success',
-                    'changes': self.remover.get_changes_log()
-                }
-            
-            self.wfile.write(json.dumps(response).encode('utf-8'))
+            # File work runs on the bounded pool; the connection thread just waits
+            if self.executor is not None:
+                response = self.executor.submit(self._dispatch_and_refresh, data).result()
+            else:
+                response = self._dispatch_and_refresh(data)
         
         except Exception as e:
-            error_response = {'status': 'error', 'message': str(e)}
-            self.wfile.write(json.dumps(error_response).encode('utf-8'))
+            response = {'status': 'error', 'message': str(e)}
+        
+        self._send_json(response)
+    
+    def _dispatch_and_refresh(self, data: dict) -> dict:
+        """Run the action, then re-analyze just the files it edited and attach the findings delta."""
+        response = self._dispatch(data)
+        if self.analyzer is None:
+            return response
+        results = response.get('results', [response])
+        edited = list(dict.fromkeys(result['file'] for result in results
+                                    if result.get('status') == 'success' and result.get('file')))
+        if edited:
+            # A copy: single removals return the entry kept in the changes log
+            response = dict(response, delta=self._refresh(edited))
+        return response
+    
+    def _refresh(self, files) -> dict:
+        """Update the analyzer for the edited files (not the whole tree) and publish what changed."""
+        with self.analyzer.lock:
+            before = self.analyzer.get_report()
+            self.analyzer.update(files)
+            delta = diff_findings(before, self.analyzer.get_report())
+            # Reports that already applied this generation (e.g. from the response) skip the event
+            delta['generation'] = self.analyzer.generation
+        if self.events is not None and (delta['added'] or delta['removed'] or delta['moved']):
+            self.events.publish('delta', delta)
+        return delta
+    
+    def _dispatch(self, data: dict) -> dict:
+        action = data.get('action')
+        response = {'status': 'error', 'message': 'Unknown action'}
+        
+        if action == 'remove_import':
+            response = self.remover.remove_import(
+                data['file'],
+                data['name'],
+                data['line']
+            )
+        elif action == 'remove_function':
+            response = self.remover.remove_function(
+                data['file'],
+                data['name'],
+                data['line']
+            )
+        elif action == 'remove_class':
+            response = self.remover.remove_class(
+                data['file'],
+                data['name'],
+                data['line']
+            )
+        elif action == 'remove_batch':
+            response = self.remover.remove_batch(data['items'])
+        elif action == 'restore':
+            response = self.remover.restore_from_backup(data['backup'])
+        elif action == 'get_changes':
+            response = {
+                'status': 'success',
+                'changes': self.remover.get_changes_log()
+            }
+        return response
     
     def log_message(self, format, *args):
         """Suppress default logging."""
@@ -77,28 +273,50 @@ class RemovalHandler(BaseHTTPRequestHandler):
 class RemovalServer:
     """Manages the HTTP server for code removal."""
     
-    def __init__(self, root_path: str, port: int = 8765):
+    def __init__(self, root_path: str, port: int = 8765, max_workers: int = 4, analyzer=None,
+                 history=None):
         self.root_path = root_path
         self.port = port
+        self.max_workers = max_workers
         self.server = None
         self.thread = None
+        self.executor = None
+        self.events = EventBroadcaster()
         RemovalHandler.remover = CodeRemover(root_path)
+        RemovalHandler.events = self.events
+        RemovalHandler.analyzer = analyzer
+        RemovalHandler.history = history
     
     def start(self):
         """Start the server in a background thread."""
         if self.server is None:
-            self.server = HTTPServer(('localhost', self.port), RemovalHandler)
+            # Connections get their own threads (cheap, mostly idle keep-alives and
+            # event streams); the file-modifying work is capped by the executor.
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                               thread_name_prefix='deadcode-removal')
+            RemovalHandler.executor = self.executor
+            self.server = ThreadingHTTPServer(('localhost', self.port), RemovalHandler)
+            self.server.daemon_threads = True
             self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
             self.thread.start()
             return f"http://localhost:{self.port}"
         return None
     
+    def publish(self, event: str, data):
+        """Push an event to every report connected to /events."""
+        self.events.publish(event, data)
+    
     def stop(self):
         """Stop the server."""
         if self.server:
+            self.events.close()
             self.server.shutdown()
+            self.server.server_close()
+            self.executor.shutdown(wait=True)
+            RemovalHandler.executor = None
             self.server = None
             self.thread = None
+            self.executor = None
     
     def is_running(self):
         """Check if server is running."""
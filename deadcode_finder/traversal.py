@@ -0,0 +1,238 @@
+"""
+Single-pass analysis of one module's AST.
+
+analyze_module() walks the tree once with an explicit stack, in the same
+pre-order as ast.NodeVisitor (so "first use" lines and every per-file result
+match the visitor it replaced), and collects in that one walk:
+
+- imports and the names loaded anywhere in the file,
+- function and class definitions with their qualified names,
+- per-def reference sites (names and attributes each def loads),
+- where each `from ... import` name comes from, so loads can be resolved,
+- entry points (main/run/execute, test_*, calls under `if __name__ == '__main__'`)
+  and decorated functions.
+
+Other checks plug in as passes: a Pass names the node types it wants and is
+handed each of them during the same walk, with the ModuleAnalysis being
+built. Unreachable code and unused assignments are such passes, both over
+the control-flow graph of each body (deadcode_finder.cfg), which
+ModuleAnalysis.cfg() builds once per body and shares between them. Each
+first asks a cheap question of the statements (can anything here be dead?
+does this def assign anything?) and most bodies never get a graph. Defs
+that only branch with if, for and while get their dead stores without
+one either.
+
+Node dispatch is by exact type in a dict, and only fields that can hold
+nodes are followed (not ctx, operators, identifiers), which is where the
+time goes in NodeVisitor.generic_visit.
+"""
+import ast
+from typing import Dict, List, Sequence, Set, Tuple
+
+from deadcode_finder.cfg import (CFG, LEAF_FIELDS, build_cfg, dead_stores, has_stores,
+                                 may_be_unreachable, structured_dead_stores, unreachable)
+
+# Per node type: fields to follow, in reverse so pushing them keeps source order
+_CHILD_FIELDS: Dict[type, Tuple[str, ...]] = {ast.Constant: (), ast.MatchSingleton: ()}
+for _cls in (ast.FunctionDef, ast.ClassDef):
+    # Decorators are visited first, in the enclosing scope
+    _CHILD_FIELDS[_cls] = tuple(reversed([f for f in _cls._fields
+                                          if f not in LEAF_FIELDS and f != 'decorator_list']))
+
+ENTRY_POINT_NAMES = ('main', 'run', 'execute')
+
+# Markers on the work stack; AST nodes are never tuples
+_ENTER_DEF, _LEAVE_DEF, _LEAVE_MAIN_GUARD = range(3)
+
+
+def _child_fields(cls) -> Tuple[str, ...]:
+    fields = tuple(reversed([f for f in cls._fields if f not in LEAF_FIELDS]))
+    _CHILD_FIELDS[cls] = fields
+    return fields
+
+
+def _is_main_guard(test) -> bool:
+    """`__name__ == '__main__'` (either side of any comparison chain)."""
+    return (type(test) is ast.Compare and type(test.left) is ast.Name
+            and test.left.id == '__name__'
+            and any(type(comp) is ast.Constant and comp.value == '__main__'
+                    for comp in test.comparators))
+
+
+class ModuleAnalysis:
+    """Everything one traversal learns about a module."""
+
+    def __init__(self):
+        self.imports: List[Tuple[str, int]] = []  # (bound name, line)
+        # (bound name or '*', module, imported name or '*', level) per `from ... import`
+        self.import_sources: List[Tuple[str, str, str, int]] = []
+        self.used_names: Set[str] = set()
+        self.function_defs: Dict[str, Tuple[str, int]] = {}  # qualified name -> (name, line)
+        self.class_defs: Dict[str, Tuple[str, int]] = {}
+        self.unused_vars: List[Tuple[int, str]] = []  # (assignment line, name)
+        self.unreachable: List[Tuple[int, str]] = []  # (line, reason)
+        self.entry_points: Set[str] = set()
+        self.decorated_functions: Set[str] = set()
+        # For each def (qualified name, '' for module level): name it loads -> line of first
+        # use; an attribute load is keyed '.attr'
+        self.sites: Dict[str, Dict[str, int]] = {'': {}}
+        self.qualname: List[str] = []  # enclosing class/def names at the current node
+        self._cfgs: Dict[int, CFG] = {}
+
+    def cfg(self, node) -> CFG:
+        """Control-flow graph of a module, def or class body, built on first request."""
+        graph = self._cfgs.get(id(node))
+        if graph is None:
+            graph = self._cfgs[id(node)] = build_cfg(node)
+        return graph
+
+
+class Pass:
+    """A check run inside the shared traversal.
+
+    node_types lists the exact AST classes the pass wants; visit() is called
+    for each one in pre-order, before its children.
+    """
+
+    node_types: Tuple[type, ...] = ()
+
+    def visit(self, node: ast.AST, module: ModuleAnalysis):
+        raise NotImplementedError
+
+
+class UnreachableCode(Pass):
+    """Statements no path reaches: after return/raise/continue/break, under constant conditions."""
+
+    node_types = (ast.Module, ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+    def visit(self, node, module):
+        if may_be_unreachable(node.body):
+            module.unreachable.extend(unreachable(module.cfg(node), node.body))
+
+
+class UnusedAssignments(Pass):
+    """Assignments in a function whose value no path reads (dead stores)."""
+
+    node_types = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+    def visit(self, node, module):
+        found = structured_dead_stores(node)
+        if found is None and has_stores(node):
+            found = dead_stores(module.cfg(node))
+        if found:
+            module.unused_vars.extend(found)
+
+
+DEFAULT_PASSES = (UnreachableCode(), UnusedAssignments())
+
+
+def analyze_module(tree: ast.AST, passes: Sequence[Pass] = DEFAULT_PASSES) -> ModuleAnalysis:
+    """Collect imports, defs, names and entry points, running passes on the way."""
+    module = ModuleAnalysis()
+    hooks: Dict[type, List[Pass]] = {}
+    for check in passes:
+        for cls in check.node_types:
+            hooks.setdefault(cls, []).append(check)
+
+    # Hot state lives in locals; the stacks below carry it across def boundaries
+    used_names = module.used_names
+    sites = module.sites
+    qualname = module.qualname
+    refs = sites['']
+    outer_refs: List[Dict[str, int]] = []
+    main_guards = 0  # depth of `if __name__ == '__main__'` blocks around the node
+
+    Name, Attribute, Call, Load = ast.Name, ast.Attribute, ast.Call, ast.Load
+    FunctionDef, ClassDef, If = ast.FunctionDef, ast.ClassDef, ast.If
+    Import, ImportFrom = ast.Import, ast.ImportFrom
+    child_fields = _CHILD_FIELDS
+
+    stack = [tree]
+    pop, push = stack.pop, stack.append
+    while stack:
+        node = pop()
+        cls = type(node)
+
+        if cls is tuple:
+            marker = node[0]
+            if marker == _ENTER_DEF:
+                _, qual, name = node
+                outer_refs.append(refs)
+                refs = sites.setdefault(qual, {})
+                qualname.append(name)
+            elif marker == _LEAVE_DEF:
+                refs = outer_refs.pop()
+                qualname.pop()
+            else:
+                main_guards -= 1
+            continue
+
+        checks = hooks.get(cls)
+        if checks is not None:
+            for check in checks:
+                check.visit(node, module)
+
+        if cls is Name:
+            if type(node.ctx) is Load:
+                used_names.add(node.id)
+                if node.id not in refs:
+                    refs[node.id] = node.lineno
+            continue
+
+        if cls is Attribute:
+            # `obj.method` can't be resolved statically, so it references every def named `method`
+            if type(node.ctx) is Load:
+                attr = '.' + node.attr
+                if attr not in refs:
+                    refs[attr] = node.lineno
+        elif cls is Call:
+            if main_guards and type(node.func) is Name:
+                module.entry_points.add(node.func.id)
+        elif cls is Import or cls is ImportFrom:
+            for alias in node.names:
+                module.imports.append((alias.asname or alias.name, node.lineno))
+                if cls is ImportFrom:
+                    module.import_sources.append((alias.asname or alias.name, node.module or '',
+                                                  alias.name, node.level or 0))
+            continue
+        elif cls is FunctionDef or cls is ClassDef:
+            name = node.name
+            qual = '.'.join(qualname + [name])
+            if cls is FunctionDef:
+                if node.decorator_list:
+                    module.decorated_functions.add(name)
+                if name in ENTRY_POINT_NAMES or name.startswith('test_'):
+                    module.entry_points.add(name)
+                module.function_defs[qual] = (name, node.lineno)
+            else:
+                module.class_defs[qual] = (name, node.lineno)
+            push((_LEAVE_DEF,))
+            for field in child_fields[cls]:
+                value = getattr(node, field)
+                if type(value) is list:
+                    stack.extend(reversed(value))
+                elif value is not None:
+                    push(value)
+            push((_ENTER_DEF, qual, name))
+            stack.extend(reversed(node.decorator_list))
+            continue
+        elif cls is If and _is_main_guard(node.test):
+            # Functions called under the guard are entry points
+            main_guards += 1
+            push((_LEAVE_MAIN_GUARD,))
+
+        fields = child_fields.get(cls)
+        if fields is None:
+            fields = _child_fields(cls)
+        for field in fields:
+            value = getattr(node, field)
+            if type(value) is list:
+                for item in reversed(value):
+                    if item is not None:
+                        push(item)
+            elif value is not None:
+                push(value)
+    # Passes see bodies outermost first; report in line order
+    module.unreachable.sort()
+    module.unused_vars.sort()
+    return module
@@ -1,5 +1,10 @@
+from deadcode_finder.ingest import decode_source, open_source
+
+
 def read_file(path):
+    """Decoded source of path, or "" if it can't be read or decoded."""
     try:
-        return path.read_text(encoding="utf-8")
-    except:
+        with open_source(path) as data:
+            return decode_source(data)
+    except (OSError, SyntaxError, UnicodeDecodeError):
         return ""
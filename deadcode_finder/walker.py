@@ -0,0 +1,222 @@
+"""
+Filesystem discovery for the analyzer.
+
+Walks the tree with os.scandir, pruning excluded directories before descending
+into them, and yields matching files lazily so parsing can start right away.
+"""
+import fnmatch
+import os
+import re
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional
+
+DEFAULT_INCLUDE = ('*.py',)
+
+# Matched against directory names, so `environment.py` is no longer caught by `env`.
+DEFAULT_EXCLUDE_DIRS = (
+    '.git', '.hg', '.svn', '.tox', '.nox', '.venv', 'venv', 'env', '.env',
+    'node_modules', '__pycache__', '.mypy_cache', '.pytest_cache', '.ruff_cache',
+    '.deadcode_cache', '.deadcode_backups', 'tests',
+)
+
+
+def _translate_gitignore(pattern: str) -> str:
+    """Translate one gitignore glob into a regex matched against a relative posix path."""
+    anchored = '/' in pattern
+    pattern = pattern.lstrip('/')
+    out = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('/**', i) and i + 3 == len(pattern):
+            out.append('/.*')
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            out.append('.*')
+            i += 2
+            continue
+        if c == '*':
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            end = pattern.find(']', i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end
+        elif c == '\\' and i + 1 < len(pattern):
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    prefix = '' if anchored else '(?:.*/)?'
+    return '^' + prefix + ''.join(out) + '$'
+
+
+class GitIgnore:
+    """Rules from a single .gitignore file, relative to the directory holding it."""
+
+    def __init__(self, base: str, lines: Iterable[str]):
+        self.base = base
+        self.rules = []
+        for line in lines:
+            line = line.rstrip('\n')
+            if not line.strip() or line.startswith('#'):
+                continue
+            line = line.rstrip(' ')
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            if line.startswith('\\'):
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            if not line:
+                continue
+            self.rules.append((re.compile(_translate_gitignore(line)), negate, dir_only))
+
+    @classmethod
+    def from_dir(cls, directory: str) -> Optional['GitIgnore']:
+        try:
+            with open(os.path.join(directory, '.gitignore'), encoding='utf-8') as f:
+                ignore = cls(directory, f)
+        except (OSError, UnicodeDecodeError):
+            return None
+        return ignore if ignore.rules else None
+
+    def match(self, path: str, is_dir: bool) -> Optional[bool]:
+        """True if ignored, False if re-included by a `!` rule, None if no rule applies."""
+        rel = os.path.relpath(path, self.base).replace(os.sep, '/')
+        result = None
+        for regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel):
+                result = not negate
+        return result
+
+
+class FileWalker:
+    """Lazily yields files under root that match the include globs and escape the excludes."""
+
+    def __init__(self, root, include: Optional[List[str]] = None,
+                 exclude: Optional[List[str]] = None, use_gitignore: bool = True,
+                 exclude_dirs: Iterable[str] = DEFAULT_EXCLUDE_DIRS):
+        self.root = str(root)
+        self.include = list(include) if include else list(DEFAULT_INCLUDE)
+        self.exclude = list(exclude or [])
+        self.exclude_dirs = frozenset(exclude_dirs)
+        self.use_gitignore = use_gitignore
+        self._gitignore_cache = {}
+
+    def _matches(self, patterns, name, rel):
+        return any(fnmatch.fnmatch(name, pat) or fnmatch.fnmatch(rel, pat) for pat in patterns)
+
+    def _ignored(self, ignores, path, is_dir):
+        # Later (deeper) .gitignore files take precedence, as in git
+        for ignore in reversed(ignores):
+            result = ignore.match(path, is_dir)
+            if result is not None:
+                return result
+        return False
+
+    def accepts(self, path) -> bool:
+        """Whether a single path (e.g. one reported by a file watcher) would be walked."""
+        rel = os.path.relpath(str(path), self.root)
+        if rel.startswith('..'):
+            return False
+        parts = rel.replace(os.sep, '/').split('/')
+        name = parts[-1]
+        if not self._matches(self.include, name, '/'.join(parts)):
+            return False
+
+        ignores = []
+        directory = self.root
+        for i, part in enumerate(parts):
+            rel_part = '/'.join(parts[:i + 1])
+            is_dir = i < len(parts) - 1
+            if is_dir and part in self.exclude_dirs:
+                return False
+            if self._matches(self.exclude, part, rel_part):
+                return False
+            if self.use_gitignore:
+                ignore = self._gitignore_for(directory)
+                if ignore:
+                    ignores.append(ignore)
+                if ignores and self._ignored(ignores, os.path.join(directory, part), is_dir):
+                    return False
+            directory = os.path.join(directory, part)
+        return True
+
+    def _gitignore_for(self, directory):
+        if directory not in self._gitignore_cache:
+            self._gitignore_cache[directory] = GitIgnore.from_dir(directory)
+        return self._gitignore_cache[directory]
+
+    def __iter__(self) -> Iterator[Path]:
+        return self.walk()
+
+    def walk(self, on_directory: Optional[Callable[[str], None]] = None) -> Iterator[Path]:
+        """Yield matching files; `on_directory` is called for every directory entered."""
+        root = self.root
+        root_ignores = []
+        if self.use_gitignore:
+            ignore = GitIgnore.from_dir(root)
+            if ignore:
+                root_ignores.append(ignore)
+
+        # Depth-first with an explicit stack; each entry carries its inherited ignore rules.
+        stack = [(root, root_ignores)]
+        while stack:
+            directory, ignores = stack.pop()
+            if on_directory is not None:
+                on_directory(directory)
+            try:
+                with os.scandir(directory) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except OSError:
+                continue
+
+            subdirs = []
+            for entry in entries:
+                name = entry.name
+                rel = os.path.relpath(entry.path, root).replace(os.sep, '/')
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+
+                if is_dir:
+                    if name in self.exclude_dirs or self._matches(self.exclude, name, rel):
+                        continue
+                    if ignores and self._ignored(ignores, entry.path, True):
+                        continue
+                    subdirs.append(entry.path)
+                    continue
+
+                if not self._matches(self.include, name, rel):
+                    continue
+                if self.exclude and self._matches(self.exclude, name, rel):
+                    continue
+                if ignores and self._ignored(ignores, entry.path, False):
+                    continue
+                yield Path(entry.path)
+
+            for path in reversed(subdirs):
+                child_ignores = ignores
+                if self.use_gitignore:
+                    ignore = GitIgnore.from_dir(path)
+                    if ignore:
+                        child_ignores = ignores + [ignore]
+                stack.append((path, child_ignores))
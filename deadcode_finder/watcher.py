@@ -0,0 +1,161 @@
+"""
+File change detection for watch mode.
+
+Uses Linux inotify through ctypes (no extra dependency) and falls back to
+polling file fingerprints everywhere else.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from typing import Iterator, Optional, Set
+
+from deadcode_finder.cache import fingerprint
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+
+_EVENT = struct.Struct('iIII')
+
+
+class PollingWatcher:
+    """Detects changes by re-walking the tree and comparing (size, mtime) fingerprints."""
+
+    def __init__(self, walker, interval: float = 1.0):
+        self.walker = walker
+        self.interval = interval
+        self._closed = False
+        self._snapshot = self._take_snapshot()
+
+    def _take_snapshot(self):
+        return {str(path): fingerprint(path) for path in self.walker}
+
+    def changes(self) -> Iterator[Optional[Set[str]]]:
+        """Yield batches of changed, added or deleted file paths."""
+        while not self._closed:
+            time.sleep(self.interval)
+            snapshot = self._take_snapshot()
+            changed = {path for path, fp in snapshot.items() if self._snapshot.get(path) != fp}
+            changed.update(path for path in self._snapshot if path not in snapshot)
+            self._snapshot = snapshot
+            if changed:
+                yield changed
+
+    def close(self):
+        self._closed = True
+
+
+class InotifyWatcher:
+    """Watches every walked directory with inotify and reports changed files in batches.
+
+    A batch of None means the kernel queue overflowed and the caller should rescan.
+    """
+
+    def __init__(self, walker, debounce: float = 0.1):
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.walker = walker
+        self.debounce = debounce
+        self._dirs = {}  # watch descriptor -> directory path
+        self._closed = False
+        for _ in walker.walk(on_directory=self._add_watch):
+            pass
+
+    def _add_watch(self, directory):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd >= 0:
+            self._dirs[wd] = directory
+
+    def _watch_new_tree(self, directory, changed):
+        """Start watching a directory that appeared and report the files already in it."""
+        exclude_dirs = self.walker.exclude_dirs
+        for dirpath, dirnames, filenames in os.walk(directory):
+            dirnames[:] = [d for d in dirnames if d not in exclude_dirs]
+            self._add_watch(dirpath)
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                if self.walker.accepts(path):
+                    changed.add(path)
+
+    def _read_events(self, changed):
+        """Drain pending events into `changed`; returns False on queue overflow."""
+        data = os.read(self.fd, 64 * 1024)
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                return False
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None or not name:
+                continue
+
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    if self.walker.accepts(os.path.join(path, '__probe__.py')):
+                        self._watch_new_tree(path, changed)
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    # The analyzer drops every summary under a vanished directory
+                    changed.add(path)
+            elif self.walker.accepts(path):
+                changed.add(path)
+        return True
+
+    def changes(self) -> Iterator[Optional[Set[str]]]:
+        """Yield batches of changed paths, coalescing bursts within the debounce window."""
+        while not self._closed:
+            ready, _, _ = select.select([self.fd], [], [], 0.5)
+            if not ready:
+                continue
+            changed = set()
+            ok = self._read_events(changed)
+            # Editors often write, rename and chmod in quick succession
+            while ok:
+                ready, _, _ = select.select([self.fd], [], [], self.debounce)
+                if not ready:
+                    break
+                ok = self._read_events(changed)
+            if not ok:
+                yield None
+            elif changed:
+                yield changed
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            os.close(self.fd)
+
+
+def create_watcher(walker, polling: bool = False, interval: float = 1.0):
+    """Return an inotify watcher where available, otherwise a polling one."""
+    if not polling:
+        try:
+            return InotifyWatcher(walker)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(walker, interval)
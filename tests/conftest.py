@@ -0,0 +1,16 @@
+import textwrap
+
+import pytest
+
+
+@pytest.fixture
+def make_tree(tmp_path):
+    """Write {relative path: source} under a fresh directory and return its path."""
+    def make(files, root=None):
+        root = root or tmp_path / "project"
+        for name, source in files.items():
+            path = root / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(textwrap.dedent(source))
+        return root
+    return make
@@ -0,0 +1,100 @@
+import os
+
+import pytest
+
+from deadcode_finder.backup_store import MAX_CHAIN, BackupStore
+
+SOURCE = b"".join(b"def f%d():\n    return %d\n\n" % (i, i) for i in range(400))
+
+
+def stored_bytes(store_dir):
+    return sum(path.stat().st_size for path in store_dir.rglob("*")
+               if path.is_file() and path.name != "index.jsonl")
+
+
+def remove_lines(data, count):
+    return b"".join(data.splitlines(keepends=True)[count:])
+
+
+def test_each_snapshot_restores_exactly(tmp_path):
+    target = tmp_path / "mod.py"
+    store = BackupStore(tmp_path / "backups")
+    data = SOURCE
+    versions = {}
+    for _ in range(MAX_CHAIN * 2 + 3):
+        versions[store.save(target, data)] = data
+        data = remove_lines(data, 3)
+
+    reopened = BackupStore(tmp_path / "backups")
+    for change_id, expected in versions.items():
+        assert reopened.read(change_id) == expected
+    reopened.restore(next(iter(versions)))
+    assert target.read_bytes() == SOURCE
+
+
+def test_successive_removals_store_deltas(tmp_path):
+    target = tmp_path / "mod.py"
+    store = BackupStore(tmp_path / "backups")
+    store.save(target, SOURCE)
+    full = stored_bytes(tmp_path / "backups")
+
+    data = SOURCE
+    for _ in range(10):
+        data = remove_lines(data, 3)
+        store.save(target, data)
+    # Ten more snapshots cost far less than one more full copy each
+    assert stored_bytes(tmp_path / "backups") < full * 2
+    assert max(entry["depth"] for entry in store.index.values()) == 10
+
+
+def test_old_changes_and_their_objects_are_dropped(tmp_path):
+    store = BackupStore(tmp_path / "backups", keep=4)
+    ids = [store.save(tmp_path / f"mod{i}.py", b"x = %d\n" % i) for i in range(12)]
+
+    assert len(store.index) <= 5
+    assert ids[-1] in store.index and ids[0] not in store.index
+    with pytest.raises(KeyError):
+        store.read(ids[0])
+    objects = [path for path in (tmp_path / "backups" / "objects").rglob("*") if path.is_file()]
+    assert len(objects) == len(store.index)
+    # The compacted index is what a new process sees
+    assert set(BackupStore(tmp_path / "backups", keep=4).index) == set(store.index)
+
+
+def test_a_damaged_delta_fails_instead_of_restoring_garbage(tmp_path):
+    target = tmp_path / "mod.py"
+    store = BackupStore(tmp_path / "backups")
+    store.save(target, SOURCE)
+    change_id = store.save(target, remove_lines(SOURCE, 3))
+    delta = next(path for path in (tmp_path / "backups" / "deltas").rglob("*") if path.is_file())
+    delta.write_bytes(b"not a delta")
+
+    with pytest.raises(ValueError):
+        store.read(change_id)
+    assert not os.path.exists(target)
+
+
+def test_index_entries_without_an_id_or_path_are_skipped(tmp_path):
+    store = BackupStore(tmp_path / "backups")
+    change_id = store.save(tmp_path / "mod.py", SOURCE)
+    with open(store.index_path, "a", encoding="utf-8") as f:
+        f.write('{"path": "x.py", "blob": "00"}\n["not", "an", "entry"]\n{"id": "x", "path": 1}\n')
+
+    reopened = BackupStore(tmp_path / "backups")
+    assert list(reopened.index) == [change_id]
+    assert reopened.read(change_id) == SOURCE
+
+
+def test_restore_refuses_paths_outside_the_project(tmp_path):
+    project = tmp_path / "project"
+    outside = tmp_path / "outside.py"
+    store = BackupStore(project / ".deadcode_backups")
+    inside_id = store.save(project / "mod.py", SOURCE)
+    outside_id = store.save(outside, SOURCE)
+    escaping_id = store.save(project / ".." / "escape.py", SOURCE)
+
+    assert store.restore(inside_id) == str((project / "mod.py").resolve())
+    for change_id in (outside_id, escaping_id):
+        with pytest.raises(ValueError, match="outside"):
+            store.restore(change_id)
+    assert not outside.exists() and not (tmp_path / "escape.py").exists()
@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+from deadcode_finder.analyzer import DeadCodeAnalyzer
+from deadcode_finder.baseline import Baseline, BaselineError
+from deadcode_finder.findings import iter_findings
+
+TREE = {
+    "legacy.py": """
+        import os
+
+        def old_helper():
+            value = 1
+            return 2
+
+        class OldThing:
+            pass
+    """,
+}
+
+
+def accept_all(root):
+    """Write a baseline of every current finding, as `cli.py update-baseline` does."""
+    analyzer = DeadCodeAnalyzer(root)
+    analyzer.scan()
+    baseline = Baseline(root / ".deadcode-baseline.json")
+    return baseline.write(iter_findings(analyzer.get_report(apply_baseline=False)))
+
+
+def new_findings(root):
+    analyzer = DeadCodeAnalyzer(root)
+    analyzer.baseline = Baseline.load(root / ".deadcode-baseline.json")
+    analyzer.scan()
+    report = analyzer.get_report()
+    return {(kind, name) for kind, _, _, name in iter_findings(report)}, report
+
+
+def test_baselined_findings_are_left_out(make_tree):
+    root = make_tree(TREE)
+    assert len(accept_all(root)) == 4
+
+    found, report = new_findings(root)
+    assert found == set()
+    assert report["baselined_findings"] == 4
+
+
+def test_moved_code_stays_baselined(make_tree):
+    root = make_tree(TREE)
+    accept_all(root)
+    legacy = root / "legacy.py"
+    legacy.write_text('"""Docs."""\n\n\n' + legacy.read_text())
+
+    found, _ = new_findings(root)
+    assert found == set()
+
+
+def test_new_and_edited_findings_are_reported(make_tree):
+    root = make_tree(TREE)
+    accept_all(root)
+    legacy = root / "legacy.py"
+    source = legacy.read_text().replace("value = 1", "value = 3")
+    legacy.write_text(source + "\ndef newer():\n    pass\n")
+
+    found, report = new_findings(root)
+    assert found == {("variable", "value"), ("function", "newer")}
+    assert report["baselined_findings"] == 3
+
+
+def test_a_second_identical_finding_is_new(make_tree):
+    root = make_tree({"dup.py": """
+        def first():
+            return 1
+            x = 1
+
+        first()
+    """})
+    accept_all(root)
+    (root / "dup.py").write_text("def first():\n    return 1\n    x = 1\n\n"
+                                 "def second():\n    return 1\n    x = 1\n\nfirst()\nsecond()\n")
+
+    _, report = new_findings(root)
+    assert report["unreachable_code"] == {str(root / "dup.py"): [(7, "code after return")]}
+    assert report["baselined_findings"] == 1
+
+
+def test_missing_baseline_is_empty_and_foreign_one_is_rejected(tmp_path):
+    assert len(Baseline.load(tmp_path / "none.json")) == 0
+
+    path = tmp_path / "old.json"
+    path.write_text(json.dumps({"version": 0, "findings": []}))
+    with pytest.raises(BaselineError):
+        Baseline.load(path)
+
+
+@pytest.mark.parametrize("findings", [{"a": 1}, ["0123"], [{"file": "a.py"}], [{"fingerprint": 7}]])
+def test_malformed_entries_are_rejected_with_the_file_name(tmp_path, findings):
+    path = tmp_path / "broken.json"
+    path.write_text(json.dumps({"version": 1, "findings": findings}))
+    with pytest.raises(BaselineError, match="broken.json"):
+        Baseline.load(path)
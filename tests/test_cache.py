@@ -0,0 +1,128 @@
+import marshal
+import os
+import pickle
+
+from deadcode_finder.analyzer import DeadCodeAnalyzer
+from deadcode_finder.cache import CACHE_VERSION, AnalysisCache
+from deadcode_finder.ingest import Limits
+
+TREE = {
+    "app.py": """
+        import os
+        from helpers import used
+
+        def main():
+            used()
+    """,
+    "helpers.py": """
+        def used():
+            return 1
+
+        def unused():
+            return 2
+    """,
+}
+
+
+def scan(root, limits=Limits()):
+    cache = AnalysisCache(root, limits=limits)
+    analyzer = DeadCodeAnalyzer(root, cache=cache, limits=limits)
+    analyzer.scan()
+    return analyzer, cache
+
+
+def test_unchanged_files_come_from_the_cache(make_tree):
+    root = make_tree(TREE)
+    first, cache = scan(root)
+    assert (cache.hits, cache.misses) == (0, 2)
+
+    second, cache = scan(root)
+    assert (cache.hits, cache.misses) == (2, 0)
+    assert second.get_report() == first.get_report()
+
+
+def test_edited_file_is_reanalyzed(make_tree):
+    root = make_tree(TREE)
+    scan(root)
+    helpers = root / "helpers.py"
+    helpers.write_text("def used():\n    return 1\n")
+    stat = helpers.stat()
+    os.utime(helpers, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    analyzer, cache = scan(root)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert analyzer.get_report()["unused_functions"] == []
+
+
+def test_touched_file_with_same_content_is_a_hit(make_tree):
+    root = make_tree(TREE)
+    scan(root)
+    helpers = root / "helpers.py"
+    stat = helpers.stat()
+    os.utime(helpers, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    _, cache = scan(root)
+    assert (cache.hits, cache.misses) == (2, 0)
+
+
+def test_other_limits_discard_the_cache(make_tree):
+    root = make_tree(TREE)
+    scan(root)
+    _, cache = scan(root, Limits(max_lines=3))
+    assert cache.hits == 0
+    # Under the new limits both files are skipped, not served from the old entries
+    analyzer, cache = scan(root, Limits(max_lines=3))
+    assert cache.hits == 2
+    assert set(analyzer.get_report()["skipped_files"]) == {str(root / "app.py"),
+                                                           str(root / "helpers.py")}
+
+
+def test_time_budget_skips_are_not_cached(make_tree):
+    root = make_tree(TREE)
+    limits = Limits(time_budget=1e-9)
+    analyzer, cache = scan(root, limits)
+    assert len(analyzer.get_report()["skipped_files"]) == 2
+    assert cache.entries == {}
+
+    # A less loaded rerun gets to analyze them again
+    _, cache = scan(root, limits)
+    assert (cache.hits, cache.misses) == (0, 2)
+
+
+def test_deleted_files_are_pruned(make_tree):
+    root = make_tree(TREE)
+    _, cache = scan(root)
+    (root / "helpers.py").unlink()
+    _, cache = scan(root)
+    assert list(cache.entries) == [str(root / "app.py")]
+
+
+class _Exploit:
+    def __reduce__(self):
+        return (os.mkdir, (self.marker,))
+
+
+def test_a_planted_pickle_is_never_loaded(make_tree, tmp_path):
+    root = make_tree(TREE)
+    cache_file = AnalysisCache.default_dir(root) / "summaries.marshal"
+    cache_file.parent.mkdir()
+    exploit = _Exploit()
+    exploit.marker = str(tmp_path / "pwned")
+    cache_file.write_bytes(pickle.dumps({"version": CACHE_VERSION, "entries": exploit}))
+
+    cache = AnalysisCache(root)
+    assert cache.entries == {}
+    assert not os.path.exists(exploit.marker)
+
+
+def test_malformed_entries_drop_the_cache(make_tree):
+    root = make_tree(TREE)
+    _, cache = scan(root)
+    key, (size, mtime_ns, digest, summary) = next(iter(cache.entries.items()))
+    record = list(summary.to_record())
+    record[summary.__slots__.index("unused_imports")] = (("os", "not a line"),)
+    with open(cache.cache_file, "wb") as f:
+        marshal.dump({"version": CACHE_VERSION, "limits": cache.limits,
+                      "entries": {key: (size, mtime_ns, digest, tuple(record))}}, f)
+
+    assert AnalysisCache(root).entries == {}
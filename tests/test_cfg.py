@@ -0,0 +1,259 @@
+import ast
+import textwrap
+from pathlib import Path
+
+import pytest
+
+import deadcode_finder
+from deadcode_finder.cfg import build_cfg, dead_stores, unreachable
+from deadcode_finder.traversal import analyze_module
+
+
+def analyze(source):
+    return analyze_module(ast.parse(textwrap.dedent(source)))
+
+
+UNREACHABLE = [
+    ("""
+        def f():
+            return 1
+            x = 2
+    """, [(4, "code after return")]),
+    ("""
+        def f(a):
+            if a:
+                return 1
+            else:
+                raise ValueError
+            print("dead")
+    """, [(7, "code after an if statement that never completes")]),
+    ("""
+        def f():
+            while True:
+                pass
+            print("dead")
+    """, [(5, "code after an infinite loop")]),
+    ("""
+        def f():
+            if False:
+                print("never")
+            if True:
+                pass
+            else:
+                print("never")
+    """, [(4, "condition is always false"), (8, "condition is always true")]),
+    ("""
+        def f(items):
+            for item in items:
+                if item:
+                    continue
+                    print(item)
+                break
+    """, [(6, "code after continue")]),
+    ("""
+        def f():
+            try:
+                return 1
+            finally:
+                cleanup()
+            print("dead")
+    """, [(7, "code after a try statement that never completes")]),
+    ("""
+        def f():
+            try:
+                return 1
+            except ValueError:
+                pass
+            else:
+                print("dead")
+    """, [(8, "else of a try whose body always exits")]),
+    ("""
+        def f(command):
+            match command:
+                case "go":
+                    return 1
+                case _:
+                    return 2
+            print("dead")
+    """, [(8, "code after a match statement that never completes")]),
+    ("""
+        if __name__ == "__main__":
+            raise SystemExit
+            main()
+    """, [(4, "code after raise")]),
+    # Reachable: early returns, handlers, with blocks, loops that may not run
+    ("""
+        def f(a):
+            if a:
+                return 1
+            print(a)
+            try:
+                return 2
+            except ValueError:
+                pass
+            with lock:
+                return 3
+            for item in a:
+                return item
+            print("reachable")
+    """, []),
+    # A dead `yield` only makes the function a generator
+    ("""
+        def gen():
+            return
+            yield
+    """, []),
+]
+
+
+@pytest.mark.parametrize("source, expected", UNREACHABLE)
+def test_unreachable_code(source, expected):
+    assert analyze(source).unreachable == expected
+
+
+DEAD_STORES = [
+    ("""
+        def f():
+            x = compute()
+            x = 2
+            return x
+    """, [(3, "x")]),
+    ("""
+        def f():
+            unused = 5
+            y = 1
+            try:
+                y = risky()
+            except Exception:
+                print(y)
+            return 0
+    """, [(3, "unused")]),
+    ("""
+        def f():
+            count = 0
+            count += 1
+    """, [(4, "count")]),
+    ("""
+        async def f():
+            value = await thing()
+            return 1
+    """, [(3, "value")]),
+    ("""
+        def f(items):
+            last = 0
+            for item in items:
+                last = item
+                for part in item:
+                    last = part
+            return 1
+    """, [(3, "last"), (5, "last"), (7, "last")]),
+    ("""
+        def f(xs):
+            for x in xs:
+                y = x
+                if y:
+                    y = 0
+            return 1
+    """, [(6, "y")]),
+    # Not dead: loop-carried, read by a closure, read through locals(), placeholders, `_`
+    ("""
+        def f(items):
+            total = 0
+            for item in items:
+                total += item
+            return total
+    """, []),
+    ("""
+        def f(n):
+            found = False
+            while n:
+                found = check(n)
+                n -= 1
+            else:
+                print(found)
+            return 0
+    """, []),
+    # A for binds its target only when it iterates, so a default read after the loop is live
+    ("""
+        def f(items):
+            i = -1
+            for i, x in enumerate(items):
+                pass
+            return i + 1
+    """, []),
+    ("""
+        def f(lines):
+            lineno = 0
+            try:
+                for lineno, line in enumerate(lines, 1):
+                    parse(line)
+            except ValueError:
+                return None
+            print(lineno)
+    """, []),
+    ("""
+        def f(xs):
+            y = 0
+            [y := x for x in xs]
+            return y
+    """, []),
+    ("""
+        def f():
+            n = 0
+            def inner():
+                return n
+            return inner
+    """, []),
+    ("""
+        def f():
+            x = 1
+            return locals()
+    """, []),
+    ("""
+        def f(a):
+            x = None
+            if a:
+                x = 1
+            else:
+                x = 2
+            _ = x
+            return x
+    """, []),
+    # A store in dead code is reported as unreachable, not as a dead store
+    ("""
+        def f():
+            return 1
+            x = 2
+    """, []),
+]
+
+
+@pytest.mark.parametrize("source, expected", DEAD_STORES)
+def test_dead_stores(source, expected):
+    assert analyze(source).unused_vars == expected
+
+
+def graph_findings(tree):
+    """Both checks over a graph of every body, without the traversal's shortcuts."""
+    dead, stores = [], []
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Module, ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            graph = build_cfg(node)
+            dead += unreachable(graph, node.body)
+            if not isinstance(node, (ast.Module, ast.ClassDef)):
+                stores += dead_stores(graph)
+    return sorted(dead), sorted(stores)
+
+
+# The cases above, and this package's own modules as a larger corpus
+SOURCES = [pytest.param(textwrap.dedent(source), id=f"case{i}")
+           for i, (source, _) in enumerate(UNREACHABLE + DEAD_STORES)]
+SOURCES += [pytest.param(path.read_text(), id=path.name)
+            for path in sorted(Path(deadcode_finder.__file__).parent.glob("*.py"))]
+
+
+@pytest.mark.parametrize("source", SOURCES)
+def test_skipping_graphs_hides_nothing(source):
+    tree = ast.parse(source)
+    module = analyze_module(tree)
+    assert (module.unreachable, module.unused_vars) == graph_findings(tree)
@@ -0,0 +1,121 @@
+import textwrap
+
+import pytest
+
+from deadcode_finder.analyzer import summarize_file
+from deadcode_finder.fastimports import unused_imports
+
+# The scanner must report exactly what the full visitor does
+PARITY = [
+    # Aliases and dotted imports
+    """
+        import os as o, sys as system
+        from os import path as p, sep
+        import xml.dom, email.utils
+        print(o, sep, xml)
+    """,
+    # Star and __future__ imports
+    """
+        from __future__ import annotations
+        from os import *
+        from sys import (argv,
+                         path,)
+        print(argv)
+    """,
+    # Optional dependencies
+    """
+        try:
+            import json
+        except ImportError:
+            json = None
+        try:
+            import tomllib
+        except ImportError:
+            tomllib = None
+        print(json)
+    """,
+    # del and global rebind without reading; reading through them does not
+    """
+        import os, sys, re, io
+        del os
+        del sys.argv[0]
+
+        def f():
+            global re, io
+            re = 1
+            return io.StringIO()
+    """,
+    # A string annotation is not a load
+    """
+        import typing, collections
+
+        def f(x: 'typing.List') -> collections.OrderedDict:
+            y: 'typing.Any' = x
+            return y
+    """,
+    # Targets that bind: assignments, for, with, parameters, keyword arguments, lambdas
+    """
+        import os, sys, re, io, json, csv, abc
+        os = 1
+        for sys, (re, x) in []:
+            pass
+        with open(x) as io, open(x) as (a, json):
+            pass
+        async def f(csv=None, *, abc=1):
+            async with a as [b, abc]:
+                pass
+        g = lambda csv: csv
+        dict(abc=1)
+    """,
+    # Targets that read: subscripts, attributes and calls inside them
+    """
+        import os, sys, re, io
+        os.environ["X"] = 1
+        for sys.argv[0] in []:
+            pass
+        with open(x) as (a, re.flags):
+            pass
+        (b, io)[0] = 1
+    """,
+]
+
+
+@pytest.mark.parametrize("source", [textwrap.dedent(source) for source in PARITY])
+def test_matches_the_full_visitor(source, tmp_path):
+    path = tmp_path / "mod.py"
+    path.write_text(source)
+    assert unused_imports(source) == summarize_file(path).unused_imports
+
+
+UNDECIDABLE = [
+    # Capture patterns bind names
+    """
+        import os
+        match x:
+            case os:
+                pass
+    """,
+    # The only possible use is inside an f-string
+    """
+        import os
+        print(f"{os.sep}")
+    """,
+    # Unbalanced brackets and stray quotes
+    """
+        import os
+        print(os
+    """,
+    """
+        import os
+        x = 'unterminated
+    """,
+    # A from-import the scanner can't split into aliases
+    """
+        from os import path as
+    """,
+]
+
+
+@pytest.mark.parametrize("source", [textwrap.dedent(source) for source in UNDECIDABLE])
+def test_falls_back_when_it_cannot_decide(source):
+    assert unused_imports(source) is None
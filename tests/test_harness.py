@@ -0,0 +1,33 @@
+import json
+
+import pytest
+
+from benchmarks.harness import compare, load_baseline, main
+
+KEY = {"files": 10}
+
+
+def write(path, corpus=KEY, jobs=1, results=None):
+    path.write_text(json.dumps({"corpus": corpus, "jobs": jobs,
+                                "results": results or {"scan": {"scan_seconds": 1.0}}}))
+    return path
+
+
+def test_missing_baseline_fails_the_run(tmp_path):
+    assert main(["--files", "5", "--scenario", "traversal",
+                 "--baseline", str(tmp_path / "none.json")]) == 2
+
+
+@pytest.mark.parametrize("stored", [dict(corpus={"files": 11}), dict(jobs=4),
+                                    dict(results={"report": {"render_seconds": 1.0}})])
+def test_baseline_must_match_the_run(tmp_path, stored):
+    with pytest.raises(ValueError):
+        load_baseline(write(tmp_path / "b.json", **stored), KEY, 1, ["scan"])
+
+
+def test_regressions_past_the_threshold_are_reported(tmp_path):
+    baseline = load_baseline(write(tmp_path / "b.json"), KEY, 1, ["scan"])
+    _, regressions = compare({"scan": {"scan_seconds": 2.0}}, baseline, 0.25)
+    assert [row[1] for row in regressions] == ["scan_seconds"]
+    _, regressions = compare({"scan": {"scan_seconds": 1.1}}, baseline, 0.25)
+    assert regressions == []
@@ -0,0 +1,79 @@
+import pickle
+import sqlite3
+from contextlib import closing
+
+from deadcode_finder.analyzer import DeadCodeAnalyzer
+from deadcode_finder.cache import AnalysisCache
+from deadcode_finder.history import HistoryStore, summary_format
+from deadcode_finder.ingest import Limits
+
+TREE = {
+    "app.py": """
+        import os
+        from helpers import used
+
+        def main():
+            used()
+    """,
+    "helpers.py": """
+        def used():
+            return 1
+
+        def unused():
+            return 2
+    """,
+}
+
+
+def recorded(root, limits=Limits()):
+    """A history with one recorded scan of root, and that scan's analyzer."""
+    analyzer = DeadCodeAnalyzer(root, limits=limits)
+    analyzer.scan()
+    history = HistoryStore(root / "history.sqlite3", root)
+    history.record(analyzer, analyzer.get_report(), 0, 100)
+    return history, analyzer
+
+
+def test_warm_start_seeds_a_fresh_cache(make_tree):
+    root = make_tree(TREE)
+    history, first = recorded(root)
+
+    cache = AnalysisCache(root)
+    assert history.warm_start(cache) == 2
+    analyzer = DeadCodeAnalyzer(root, cache=cache)
+    analyzer.scan()
+    assert (cache.hits, cache.misses) == (2, 0)
+    assert analyzer.get_report() == first.get_report()
+
+
+def test_planted_or_mismatched_rows_are_not_seeded(make_tree):
+    root = make_tree(TREE)
+    history, _ = recorded(root)
+
+    class Payload:
+        def __reduce__(self):
+            return (exec, ("raise SystemExit('pickle executed')",))
+
+    app, helpers = str(root / "app.py"), str(root / "helpers.py")
+    with closing(sqlite3.connect(str(history.path))) as conn, conn:
+        # helpers.py's row now holds app.py's summary
+        conn.execute("UPDATE summaries SET data = (SELECT data FROM summaries WHERE path = ?) "
+                     "WHERE path = ?", (app, helpers))
+        conn.execute("UPDATE summaries SET data = ? WHERE path = ?",
+                     (pickle.dumps(Payload()), app))
+    assert history.warm_start(AnalysisCache(root)) == 0
+
+
+def test_rows_from_other_limits_are_ignored(make_tree):
+    root = make_tree(TREE)
+    history, _ = recorded(root, Limits(max_lines=3))
+    assert summary_format(Limits(max_lines=3)) != summary_format(Limits())
+    assert history.warm_start(AnalysisCache(root)) == 0
+
+
+def test_time_budget_skips_are_not_seeded(make_tree):
+    root = make_tree(TREE)
+    limits = Limits(time_budget=1e-9)
+    history, analyzer = recorded(root, limits)
+    assert len(analyzer.get_report()["skipped_files"]) == 2
+    assert history.warm_start(AnalysisCache(root, limits=limits)) == 0
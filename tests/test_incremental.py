@@ -0,0 +1,121 @@
+from deadcode_finder.analyzer import DeadCodeAnalyzer
+from deadcode_finder.findings import diff_findings, iter_findings
+
+TREE = {
+    "app.py": """
+        from helpers import fetch
+
+        def main():
+            fetch()
+
+        main()
+    """,
+    "helpers.py": """
+        import os
+
+        def fetch():
+            return step()
+
+        def step():
+            return os.sep
+
+        def unused():
+            value = 1
+            return 2
+    """,
+    "pkg/tools.py": """
+        from helpers import step
+
+        def tool():
+            return step()
+
+        tool()
+    """,
+}
+
+
+def fresh_report(root):
+    analyzer = DeadCodeAnalyzer(root)
+    analyzer.scan()
+    return analyzer.get_report()
+
+
+def assert_matches_fresh_scan(analyzer, before, root):
+    fresh = fresh_report(root)
+    after = analyzer.get_report()
+    assert sorted(iter_findings(after)) == sorted(iter_findings(fresh))
+    assert diff_findings(before, after) == diff_findings(before, fresh)
+
+
+def test_update_matches_a_fresh_scan_after_each_edit(make_tree):
+    root = make_tree(TREE)
+    analyzer = DeadCodeAnalyzer(root)
+    analyzer.scan()
+    edits = [
+        # Drop the caller of fetch(): fetch dies, and step() lives on through pkg/tools.py
+        ("app.py", "def main():\n    pass\n\nmain()\n", {"fetch", "unused"}),
+        # Shift every finding in helpers.py down two lines
+        ("helpers.py", "\n\n" + (root / "helpers.py").read_text(), {"fetch", "unused"}),
+        # Now step() loses its last caller too
+        ("pkg/tools.py", "def tool():\n    return 1\n\ntool()\n", {"fetch", "step", "unused"}),
+        # Bring fetch(), and through it step(), back to life from a new file
+        ("extra.py", "from helpers import fetch\n\nfetch()\n", {"unused"}),
+    ]
+    for name, source, dead in edits:
+        before = analyzer.get_report()
+        (root / name).write_text(source)
+        analyzer.update([root / name])
+        assert_matches_fresh_scan(analyzer, before, root)
+        assert {def_name for _, _, def_name in analyzer.get_report()["unused_functions"]} == dead
+
+
+def test_update_after_deleting_files(make_tree):
+    root = make_tree(TREE)
+    analyzer = DeadCodeAnalyzer(root)
+    analyzer.scan()
+
+    before = analyzer.get_report()
+    (root / "pkg" / "tools.py").unlink()
+    (root / "pkg").rmdir()
+    analyzer.update([root / "pkg"])
+    assert_matches_fresh_scan(analyzer, before, root)
+
+    before = analyzer.get_report()
+    (root / "app.py").unlink()
+    analyzer.update([root / "app.py"])
+    assert_matches_fresh_scan(analyzer, before, root)
+    assert {name for _, _, name in analyzer.get_report()["unused_functions"]} >= {"fetch", "step"}
+
+
+def test_a_live_def_does_not_keep_same_named_defs_elsewhere_alive(make_tree):
+    root = make_tree({
+        "a.py": """
+            def helper():
+                return 1
+
+            def main():
+                return helper()
+
+            main()
+        """,
+        "b.py": """
+            def helper():
+                return 2
+        """,
+        "c.py": """
+            from a import *
+
+            helper()
+        """,
+    })
+    analyzer = DeadCodeAnalyzer(root)
+    analyzer.scan()
+    assert analyzer.get_report()["unused_functions"] == [(str(root / "b.py"), 2, "helper")]
+
+    # Importing b's helper under another name makes it live; an attribute load can mean any helper
+    for source in ("from b import helper as other\n\nother()\n", "import b\n\nb.helper()\n"):
+        before = analyzer.get_report()
+        (root / "d.py").write_text(source)
+        analyzer.update([root / "d.py"])
+        assert_matches_fresh_scan(analyzer, before, root)
+        assert analyzer.get_report()["unused_functions"] == []
@@ -0,0 +1,92 @@
+import marshal
+import pickle
+
+from deadcode_finder.analyzer import DeadCodeAnalyzer
+from deadcode_finder.refindex import INDEX_VERSION, ReferenceIndex
+
+TREE = {
+    "app.py": """
+        from helpers import used
+
+        def main():
+            used()
+
+        main()
+    """,
+    "helpers.py": """
+        def used():
+            return inner()
+
+        def inner():
+            return 1
+
+        def unused():
+            return 2
+    """,
+}
+
+
+def indexed(root):
+    analyzer = DeadCodeAnalyzer(root)
+    analyzer.scan()
+    return ReferenceIndex.from_analyzer(analyzer, base="abc123")
+
+
+def test_saved_index_loads_back_the_same(make_tree, tmp_path):
+    index = indexed(make_tree(TREE))
+    index.save(tmp_path)
+
+    loaded = ReferenceIndex.load(tmp_path)
+    assert loaded.base == "abc123"
+    assert loaded.live == index.live == {"app.main", "helpers.used", "helpers.inner"}
+    for table in ("referrers", "rooted", "definers", "defined"):
+        assert getattr(loaded, table) == getattr(index, table)
+    assert loaded.who_uses("inner") == index.who_uses("inner")
+
+
+def test_planted_pickle_is_not_loaded(tmp_path):
+    class Payload:
+        def __reduce__(self):
+            return (exec, ("raise SystemExit('pickle executed')",))
+
+    ReferenceIndex.path_in(tmp_path).write_bytes(pickle.dumps(Payload()))
+    assert ReferenceIndex.load(tmp_path) is None
+
+
+def test_malformed_entry_discards_the_index(tmp_path):
+    payload = {"version": INDEX_VERSION, "base": None, "live": (),
+               "files": {"a.py": ("a", (("f", "not a line", "f"),), (), (), {}, ())}}
+    ReferenceIndex.path_in(tmp_path).write_bytes(marshal.dumps(payload))
+    assert ReferenceIndex.load(tmp_path) is None
+
+
+def test_since_check_uses_the_loaded_index(make_tree, tmp_path):
+    root = make_tree(TREE)
+    indexed(root).save(tmp_path)
+    app = root / "app.py"
+    app.write_text("def main():\n    pass\n\nmain()\n")
+
+    analyzer = DeadCodeAnalyzer(root)
+    analyzer.scan_changed([str(app)], ReferenceIndex.load(tmp_path))
+    dead = {name for _, _, name in analyzer.get_report()["unused_functions"]}
+    assert dead == {"used", "inner"}
+
+
+def test_same_name_in_another_module_is_resolved_per_module(make_tree, tmp_path):
+    root = make_tree(dict(TREE, **{"other.py": """
+        def used():
+            return 3
+    """}))
+    indexed(root).save(tmp_path)
+    index = ReferenceIndex.load(tmp_path)
+    assert "other.used" not in index.live
+    assert index.who_uses("other.used")["references"] == []
+
+    app = root / "app.py"
+    app.write_text("from other import used\n\ndef main():\n    used()\n\nmain()\n")
+    analyzer = DeadCodeAnalyzer(root)
+    analyzer.scan_changed([str(app)], index)
+    dead = {(path.rpartition("/")[2], name)
+            for path, _, name in analyzer.get_report()["unused_functions"]}
+    assert dead == {("helpers.py", "used"), ("helpers.py", "inner")}
+    assert "other.used" in index.live
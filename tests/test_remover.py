@@ -0,0 +1,82 @@
+from deadcode_finder.remover import CodeRemover
+
+
+def test_batch_removes_bottom_up_in_one_write(tmp_path):
+    target = tmp_path / "mod.py"
+    target.write_text("import os\n"
+                      "import sys\n"
+                      "\n"
+                      "def unused():\n"
+                      "    return 1\n"
+                      "\n"
+                      "class Unused:\n"
+                      "    def method(self):\n"
+                      "        pass\n"
+                      "\n"
+                      "print(sys.argv)\n")
+    remover = CodeRemover(tmp_path)
+
+    result = remover.remove_batch([
+        {"type": "import", "file": str(target), "name": "os", "line": 1},
+        {"type": "class", "file": str(target), "name": "Unused", "line": 7},
+        {"type": "function", "file": str(target), "name": "method", "line": 8},
+        {"type": "function", "file": str(target), "name": "unused", "line": 4},
+    ])
+
+    assert (result["removed"], result["failed"]) == (4, 0)
+    assert target.read_text() == "import sys\n\n\n\nprint(sys.argv)\n"
+    # One file, one snapshot
+    assert len({r["backup"] for r in result["results"]}) == 1
+
+
+def test_stale_line_is_refused_and_the_rest_applied(tmp_path):
+    target = tmp_path / "mod.py"
+    target.write_text("import json\nimport os\n\nprint(os.sep)\n")
+    remover = CodeRemover(tmp_path)
+
+    result = remover.remove_batch([
+        {"type": "import", "file": str(target), "name": "os", "line": 1},
+        {"type": "import", "file": str(target), "name": "json", "line": 1},
+        {"type": "function", "file": str(target), "name": "gone", "line": 3},
+    ])
+
+    assert [r["status"] for r in result["results"]] == ["error", "success", "error"]
+    assert "no longer contains import os" in result["results"][0]["message"]
+    assert target.read_text() == "import os\n\nprint(os.sep)\n"
+
+
+def test_restore_puts_the_original_back(tmp_path):
+    target = tmp_path / "mod.py"
+    original = b"import os\r\nimport sys\r\n\r\nprint(sys.argv)\r\n"
+    target.write_bytes(original)
+    remover = CodeRemover(tmp_path)
+
+    change = remover.remove_import(str(target), "os", 1)
+    assert target.read_bytes() == b"import sys\r\n\r\nprint(sys.argv)\r\n"
+
+    assert remover.restore_from_backup(change["backup"])["status"] == "success"
+    assert target.read_bytes() == original
+
+
+def test_line_numbers_ignore_form_feeds(tmp_path):
+    target = tmp_path / "mod.py"
+    target.write_bytes(b"import os\n\x0c\nimport sys\n\x1c# sep\nprint(os.sep)\n")
+    remover = CodeRemover(tmp_path)
+
+    assert remover.remove_import(str(target), "sys", 3)["status"] == "success"
+    assert target.read_bytes() == b"import os\n\x0c\n\x1c# sep\nprint(os.sep)\n"
+
+
+def test_files_keep_their_declared_encoding(tmp_path):
+    target = tmp_path / "mod.py"
+    source = "# -*- coding: latin-1 -*-\nimport os\n\ndef unused():\n    pass\n\nprint('café')\n"
+    target.write_bytes(source.encode("latin-1"))
+    remover = CodeRemover(tmp_path)
+
+    result = remover.remove_batch([
+        {"type": "import", "file": str(target), "name": "os", "line": 2},
+        {"type": "function", "file": str(target), "name": "unused", "line": 4},
+    ])
+
+    assert result["removed"] == 2
+    assert target.read_bytes() == "# -*- coding: latin-1 -*-\n\n\nprint('café')\n".encode("latin-1")
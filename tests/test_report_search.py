@@ -0,0 +1,48 @@
+"""The virtualized report's search index, run under node when it is installed."""
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+TEMPLATE = Path(__file__).resolve().parent.parent / "templates" / "report_template.html"
+
+pytestmark = pytest.mark.skipif(shutil.which("node") is None, reason="needs node")
+
+
+def search(findings, queries):
+    source = TEMPLATE.read_text(encoding="utf-8")
+    start = source.index("// Search tokens of a name or path")
+    end = source.index("function virtualFilter()")
+    script = "\n".join([
+        "const virtualState = {rows: [], postings: new Map(), tokens: [], tokensSorted: true};",
+        source[start:end],
+        f"const findings = {json.dumps(findings)};",
+        "findings.forEach(virtualAddRow);",
+        f"console.log(JSON.stringify({json.dumps(queries)}.map(searchRows)));",
+    ])
+    out = subprocess.run(["node", "-e", script], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+
+FINDINGS = [
+    {"type": "import", "file": "/repo/pkg/models.py", "line": 1, "name": "os"},
+    {"type": "function", "file": "/repo/pkg/models.py", "line": 9, "name": "load_user_cache"},
+    {"type": "class", "file": "/repo/app/views.py", "line": 3, "name": "UserView"},
+    {"type": "variable", "file": "/repo/app/views.py", "line": 20, "name": "tmp"},
+]
+
+
+def test_prefix_of_a_name_file_or_word():
+    assert search(FINDINGS, ["user", "load_u", "views.py", "models", "class", "cache"]) == \
+        [[1, 2], [1], [2, 3], [0, 1], [2], [1]]
+
+
+def test_every_term_must_match():
+    assert search(FINDINGS, ["user views", "user nothing"]) == [[2], []]
+
+
+def test_rows_added_later_are_searchable():
+    rows = FINDINGS + [{"type": "function", "file": "/repo/z.py", "line": 1, "name": "alpha"}]
+    assert search(rows, ["alpha", "z.py"]) == [[4], [4]]
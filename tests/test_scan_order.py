@@ -0,0 +1,86 @@
+from deadcode_finder.analyzer import DeadCodeAnalyzer
+from deadcode_finder.cache import AnalysisCache
+
+
+def make_files(make_tree, count=6):
+    return make_tree({f"mod{i}.py": f"import os\n\ndef f{i}():\n    return {i}\n"
+                      for i in range(count)})
+
+
+class LoggedWalk:
+    """Stands in for the FileWalker, logging when each path is handed out."""
+
+    def __init__(self, walker, events):
+        self.walker = walker
+        self.events = events
+
+    def __iter__(self):
+        for path in self.walker:
+            self.events.append(("walk", path.name))
+            yield path
+
+
+def scan_logged(root, cache=None):
+    events = []
+    analyzer = DeadCodeAnalyzer(root, jobs=1, cache=cache)
+    analyzer.walker = LoggedWalk(analyzer.walker, events)
+    analyzer.scan(on_summary=lambda summary: events.append(("summary", summary.path[-7:])))
+    return analyzer, events
+
+
+def test_walk_stays_lazy_with_the_cache_on(make_tree):
+    root = make_files(make_tree)
+    _, events = scan_logged(root, AnalysisCache(root))
+    # Each file is parsed and handed on before the next one is walked
+    assert [kind for kind, _ in events] == ["walk", "summary"] * 6
+
+
+def test_cache_hits_and_misses_keep_walk_order(make_tree):
+    root = make_files(make_tree)
+    _, cold = scan_logged(root, AnalysisCache(root))
+    (root / "mod3.py").write_text("def g():\n    pass\n")
+
+    analyzer, warm = scan_logged(root, AnalysisCache(root))
+    assert [name for kind, name in warm if kind == "summary"] == \
+        [name for kind, name in cold if kind == "summary"]
+    # Hits before the edited file are handed on no later than its result
+    assert warm.index(("summary", "mod0.py")) < warm.index(("walk", "mod4.py"))
+    assert analyzer.cache.hits == 5
+
+
+def test_pool_with_cache_matches_a_serial_scan(make_tree):
+    root = make_files(make_tree, count=80)
+    serial = DeadCodeAnalyzer(root, jobs=1)
+    serial.scan()
+    for _ in range(2):  # Cold, then warm
+        pooled = DeadCodeAnalyzer(root, jobs=2, cache=AnalysisCache(root))
+        pooled.scan()
+        assert list(pooled.summaries) == list(serial.summaries)
+        assert pooled.get_report() == serial.get_report()
+
+
+class RecordingStream:
+    def __init__(self, parsed):
+        self.parsed = parsed
+        self.lines = []  # (files parsed when written, line)
+
+    def write(self, text):
+        self.lines.append((len(self.parsed), text))
+
+    def flush(self):
+        pass
+
+
+def test_jsonl_streams_before_the_tree_is_parsed(make_tree):
+    from deadcode_finder.formats import JsonlWriter
+
+    root = make_files(make_tree, count=20)
+    for cache in (None, AnalysisCache(root)):
+        parsed = []
+        analyzer = DeadCodeAnalyzer(root, jobs=1, cache=cache)
+        summarize = analyzer.summarize
+        analyzer.summarize = lambda path: parsed.append(path) or summarize(path)
+        stream = RecordingStream(parsed)
+        analyzer.scan(on_summary=JsonlWriter(stream).on_summary)
+        assert len(parsed) == 20
+        assert stream.lines[0][0] == 1
@@ -0,0 +1,55 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from deadcode_finder.analyzer import DeadCodeAnalyzer
+from deadcode_finder.history import HistoryStore
+from deadcode_finder.server import RemovalServer
+
+
+@pytest.fixture
+def server(make_tree, tmp_path):
+    root = make_tree({"mod.py": "import os\nimport sys\nimport json\n"})
+    analyzer = DeadCodeAnalyzer(root, jobs=1)
+    analyzer.scan()
+    history = HistoryStore(tmp_path / "history.sqlite3", root)
+    history.record(analyzer, analyzer.get_report(), 3, 90)
+    server = RemovalServer(str(root), port=0, analyzer=analyzer, history=history)
+    server.start()
+    yield f"http://localhost:{server.server.server_address[1]}"
+    server.stop()
+
+
+def get(url):
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_findings_are_paged(server):
+    status, body = get(server + "/findings?offset=1&limit=1")
+    assert status == 200
+    assert body["total"] == 3 and len(body["findings"]) == 1
+
+
+@pytest.mark.parametrize("query", ["offset=abc", "limit=1.5", "offset=0&limit=x"])
+def test_malformed_paging_is_a_400(server, query):
+    status, body = get(server + "/findings?" + query)
+    assert status == 400
+    assert body["status"] == "error"
+
+
+def test_negative_paging_clamps_to_zero(server):
+    status, body = get(server + "/findings?offset=-5&limit=-1")
+    assert status == 200
+    assert body["offset"] == 0 and body["findings"] == []
+
+
+def test_trends_limit_is_checked(server):
+    assert get(server + "/trends?limit=abc")[0] == 400
+    status, body = get(server + "/trends?limit=5")
+    assert status == 200 and len(body["scans"]) == 1
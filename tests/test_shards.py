@@ -0,0 +1,106 @@
+import marshal
+import zlib
+
+import pytest
+
+from deadcode_finder.analyzer import DeadCodeAnalyzer
+from deadcode_finder.cache import AnalysisCache
+from deadcode_finder.partials import (_HEADER, PartialFormatError, merge_partials, read_partial,
+                                      write_partial)
+
+TREE = {
+    "app.py": """
+        import os
+        from helpers import used, Widget
+
+        def main():
+            used()
+            Widget()
+    """,
+    "helpers.py": """
+        import sys
+
+        def used():
+            return 1
+
+        def unused():
+            return 2
+
+        class Widget:
+            pass
+
+        class Orphan:
+            pass
+    """,
+    "pkg/__init__.py": "",
+    "pkg/core.py": """
+        from helpers import unused
+
+        def helper():
+            x = 1
+            return 2
+
+        def entry():
+            helper()
+    """,
+    "pkg/extra.py": """
+        import json
+
+        def lonely():
+            return
+            print("never")
+    """,
+    "tools.py": """
+        from pkg.extra import lonely
+
+        if __name__ == "__main__":
+            lonely()
+    """,
+}
+
+
+def test_merged_shards_match_a_full_scan(make_tree, tmp_path):
+    root = make_tree(TREE)
+    full = DeadCodeAnalyzer(root)
+    full.scan()
+
+    partials = []
+    for index in (1, 2, 3):
+        shard = DeadCodeAnalyzer(root, shard=(index, 3))
+        shard.scan()
+        path = tmp_path / f"shard{index}.partial"
+        write_partial(path, shard)
+        partials.append(read_partial(path))
+    merged = DeadCodeAnalyzer(root)
+    merged.load(merge_partials(partials))
+
+    assert list(merged.summaries) == list(full.summaries)
+    assert merged.get_report() == full.get_report()
+
+
+def test_shard_run_keeps_other_shards_cache_entries(make_tree):
+    root = make_tree(TREE)
+    DeadCodeAnalyzer(root, cache=AnalysisCache(root)).scan()
+    DeadCodeAnalyzer(root, cache=AnalysisCache(root), shard=(1, 3)).scan()
+
+    cache = AnalysisCache(root)
+    DeadCodeAnalyzer(root, cache=cache).scan()
+    assert (cache.hits, cache.misses) == (len(TREE), 0)
+
+
+def test_malformed_partial_is_rejected(make_tree, tmp_path):
+    root = make_tree(TREE)
+    shard = DeadCodeAnalyzer(root, shard=(1, 1))
+    shard.scan()
+    path = tmp_path / "shard.partial"
+    write_partial(path, shard)
+    header = path.read_bytes()[:_HEADER.size]
+    body = marshal.loads(zlib.decompress(path.read_bytes()[_HEADER.size:]))
+
+    position, record = body["rows"][0]
+    broken_record = dict(body, rows=[(position, record[:2] + ("not a tuple",) + record[3:])])
+    for broken in (["not", "a", "dict"], dict(body, shard=(1,)), dict(body, rows=[(position,)]),
+                   broken_record):
+        path.write_bytes(header + zlib.compress(marshal.dumps(broken)))
+        with pytest.raises(PartialFormatError, match="corrupt partial"):
+            read_partial(path)